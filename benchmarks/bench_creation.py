@@ -0,0 +1,47 @@
+"""
+This module benchmarks tensor creation, random generation and save/load.
+"""
+
+import os, tempfile
+
+import numpy as np
+
+from tensorbackends.utils.benchmark import Case, benchmark_with_backend
+
+
+@benchmark_with_backend(sizes=[2**16, 2**22])
+class CreationBenchmark:
+    def bench_zeros(self, tb, n):
+        return Case(lambda: tb.zeros((n,)), nbytes=8 * n)
+
+    def bench_ones(self, tb, n):
+        return Case(lambda: tb.ones((n,)), nbytes=8 * n)
+
+    def bench_astensor(self, tb, n):
+        x = np.ones(n)
+        return Case(lambda: tb.astensor(x), nbytes=8 * n)
+
+
+@benchmark_with_backend(sizes=[2**16, 2**22])
+class RandomBenchmark:
+    def bench_random(self, tb, n):
+        return Case(lambda: tb.random.random(n), nbytes=8 * n)
+
+    def bench_normal(self, tb, n):
+        return {
+            'float': Case(lambda: tb.random.normal(size=n), nbytes=8 * n),
+            'complex': Case(lambda: tb.random.normal(size=n, dtype=complex), nbytes=16 * n),
+        }
+
+
+@benchmark_with_backend(optional=['chunked', 'torch', 'lazy'], sizes=[2**16, 2**22])
+class SaveLoadBenchmark:
+    def bench_save(self, tb, n):
+        a = tb.random.random(n)
+        filename = os.path.join(tempfile.gettempdir(), 'tensorbackends-benchmark-{}.npy'.format(tb.name))
+        return Case(lambda: tb.save(a, filename), nbytes=8 * n)
+
+    def bench_load(self, tb, n):
+        filename = os.path.join(tempfile.gettempdir(), 'tensorbackends-benchmark-{}.npy'.format(tb.name))
+        tb.save(tb.random.random(n), filename)
+        return Case(lambda: tb.load(filename), nbytes=8 * n)
@@ -0,0 +1,35 @@
+"""
+This module benchmarks einsum on ctfview views against the materialized tensors.
+"""
+
+from tensorbackends.utils import einstr
+from tensorbackends.utils.benchmark import Case, benchmark_with_backend
+
+
+@benchmark_with_backend(required=[], optional=['ctfview'], sizes=[16, 32])
+class ViewBenchmark:
+    def bench_transposed_einsum(self, tb, n):
+        a = tb.random.random((n, n, n)).transpose(2, 0, 1)
+        b = tb.random.random((n, n))
+        flops = einstr.parse('ijk,kl->ijl').cost([a.shape, b.shape]).flops
+        return {
+            'view': Case(lambda: tb.einsum('ijk,kl->ijl', a, b), flops=flops),
+            'materialize': Case(lambda: tb.einsum('ijk,kl->ijl', tb.astensor(a.unwrap()), b), flops=flops),
+        }
+
+    def bench_reshaped_einsum(self, tb, n):
+        # the fused view has to be split to match the groups of the other operand
+        a = tb.random.random((n, n, n)).reshape(n * n, n)
+        b = tb.random.random((n, n, n))
+        flops = einstr.parse('ij,jk->ik').cost([a.shape, (n, n * n)]).flops
+        return {
+            'view': Case(lambda: tb.einsum('ij,jk->ik', a, b.reshape(n, n * n)), flops=flops),
+            'materialize': Case(lambda: tb.einsum('ij,jk->ik', tb.astensor(a.unwrap()), tb.astensor(b.reshape(n, n * n).unwrap())), flops=flops),
+        }
+
+    def bench_sliced_sum(self, tb, n):
+        a = tb.random.random((n, n, n))
+        return {
+            'view': Case(lambda: a[1:, :, ::2].sum(axis=0), nbytes=8 * n ** 3),
+            'materialize': Case(lambda: tb.astensor(a[1:, :, ::2].unwrap()).sum(axis=0), nbytes=8 * n ** 3),
+        }
@@ -0,0 +1,43 @@
+"""
+This module benchmarks einsum on small, many-operand and batched contractions.
+"""
+
+from tensorbackends.utils import einstr
+from tensorbackends.utils.benchmark import Case, benchmark_with_backend
+
+
+def einsum_case(tb, subscripts, *shapes):
+    operands = [tb.random.random(shape) for shape in shapes]
+    cost = einstr.parse(subscripts).cost(shapes)
+    if cost.flops == 0:
+        # pure data movement is measured by the bytes written
+        return Case(lambda: tb.einsum(subscripts, *operands), nbytes=8 * cost.output)
+    return Case(lambda: tb.einsum(subscripts, *operands), flops=cost.flops)
+
+
+@benchmark_with_backend(sizes=[8, 32])
+class SmallEinsumBenchmark:
+    def bench_matmul(self, tb, n):
+        return einsum_case(tb, 'ij,jk->ik', (n, n), (n, n))
+
+    def bench_transpose(self, tb, n):
+        return einsum_case(tb, 'ijk->kji', (n, n, n))
+
+
+@benchmark_with_backend(sizes=[8, 32])
+class ManyOperandEinsumBenchmark:
+    def bench_chain(self, tb, n):
+        return einsum_case(tb, 'ab,bc,cd,de,ef->af', *([(n, n)] * 5))
+
+    def bench_mps_contraction(self, tb, n):
+        # contracts a four-site matrix product state with itself
+        return einsum_case(tb, 'aib,bjc,ckd,dle,AiB,BjC,CkD,DlE->aeAE', *([(n, 2, n)] * 8))
+
+
+@benchmark_with_backend(sizes=[32, 128])
+class BatchedEinsumBenchmark:
+    def bench_batched_matmul(self, tb, n):
+        return einsum_case(tb, 'bij,bjk->bik', (16, n, n), (16, n, n))
+
+    def bench_batched_outer(self, tb, n):
+        return einsum_case(tb, 'bi,bj->bij', (16, n), (16, n))
@@ -0,0 +1,46 @@
+"""
+This module benchmarks einsvd, einsumsvd with each option, einqr and rsvd.
+"""
+
+from tensorbackends.interface import ReducedSVD, RandomizedSVD, ImplicitRandomizedSVD
+from tensorbackends.utils import einstr
+from tensorbackends.utils.benchmark import Case, benchmark_with_backend
+
+
+OPTIONS = {
+    'reduced': lambda n: ReducedSVD(),
+    'truncated': lambda n: ReducedSVD(rank=n // 4),
+    'randomized': lambda n: RandomizedSVD(rank=n // 4, niter=1, oversamp=5),
+    'implicit': lambda n: ImplicitRandomizedSVD(rank=n // 4, niter=1),
+}
+
+
+@benchmark_with_backend(sizes=[16, 32])
+class DecompositionBenchmark:
+    def bench_einsvd(self, tb, n):
+        return {name: self.einsvd_case(tb, n, name) for name in ('reduced', 'truncated', 'randomized')}
+
+    def bench_einsumsvd(self, tb, n):
+        return {name: self.einsumsvd_case(tb, n, name) for name in OPTIONS}
+
+    def bench_einqr(self, tb, n):
+        a = tb.random.random((n, n, 8))
+        flops = einstr.parse('ijk->ia,ajk').qr_cost([a.shape]).flops
+        return Case(lambda: tb.einqr('ijk->ia,ajk', a), flops=flops)
+
+    def bench_rsvd(self, tb, n):
+        a = tb.random.random((8 * n, 8 * n))
+        flops = einstr.parse('ij->ia,aj').svd_cost([a.shape], RandomizedSVD(n, 1, 5)).flops
+        return Case(lambda: tb.rsvd(a, rank=n, niter=1, oversamp=5), flops=flops)
+
+    def einsvd_case(self, tb, n, name):
+        a = tb.random.random((n, n, 8))
+        option = OPTIONS[name](n)
+        flops = einstr.parse('ijk->ia,ajk').svd_cost([a.shape], option).flops
+        return Case(lambda: tb.einsvd('ijk->ia,ajk', a, option=option), flops=flops)
+
+    def einsumsvd_case(self, tb, n, name):
+        a, b = tb.random.random((n, 8, n)), tb.random.random((n, 8, n))
+        option = OPTIONS[name](n)
+        flops = einstr.parse('ijk,klm->ija,alm').svd_cost([a.shape, b.shape], option).flops
+        return Case(lambda: tb.einsumsvd('ijk,klm->ija,alm', a, b, option=option), flops=flops)
@@ -0,0 +1,37 @@
+"""
+This script compares the torch backend with the numpy backend on einsum, einsvd and rsvd.
+"""
+
+import argparse
+
+import tensorbackends as tbs
+from tensorbackends.utils.benchmark import measure
+
+
+def cases(tb, n):
+    a = tb.random.random((n, n, 8))
+    b = tb.random.random((8, n, n))
+    m = tb.random.random((4 * n, 4 * n))
+    return {
+        'einsum': lambda: tb.einsum('ijk,klm->ijlm', a, b),
+        'einsvd': lambda: tb.einsvd('ijk->ia,ajk', a),
+        'rsvd': lambda: tb.rsvd(m, rank=n // 4, niter=1, oversamp=5),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[32, 64, 128])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    backends = [name for name in ['numpy', 'torch'] if tbs.isavailable(name)]
+    print('{:<8} {:>6} '.format('case', 'n') + ' '.join('{:>12}'.format(name) for name in backends))
+    for n in args.sizes:
+        results = {name: cases(tbs.get(name), n) for name in backends}
+        for case in results[backends[0]]:
+            times = [measure(results[name][case], args.repeat, memory=False)['time'] for name in backends]
+            print('{:<8} {:>6} '.format(case, n) + ' '.join('{:>11.2f}ms'.format(t * 1e3) for t in times))
+
+
+if __name__ == '__main__':
+    main()
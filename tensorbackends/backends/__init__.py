@@ -49,3 +49,37 @@ def _():
 def _():
     from .ctfview import CTFViewBackend
     return CTFViewBackend()
+
+@register('blocksparse')
+def _():
+    from .blocksparse import BlockSparseBackend
+    return BlockSparseBackend()
+
+@register('chunked')
+def _():
+    from .chunked import ChunkedBackend
+    return ChunkedBackend()
+
+@register('torch')
+def _():
+    from .torch import TorchBackend
+    return TorchBackend()
+
+@register('numpy-mp')
+def _():
+    from .numpymp import NumPyMPBackend
+    return NumPyMPBackend()
+
+@register('lazy')
+def _():
+    from .lazy import LazyBackend
+    return LazyBackend('numpy')
+
+def _register_lazy(base):
+    @register('lazy-{}'.format(base))
+    def _():
+        from .lazy import LazyBackend
+        return LazyBackend(base)
+
+for _base in ['numpy', 'ctf', 'ctfview', 'chunked', 'torch']:
+    _register_lazy(_base)
@@ -0,0 +1,2 @@
+from .blocksparse_backend import BlockSparseBackend
+from .blocksparse_tensor import BlockSparseTensor, Leg
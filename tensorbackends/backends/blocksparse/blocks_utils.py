@@ -0,0 +1,217 @@
+import itertools, functools, operator
+
+import numpy as np
+
+from ...utils import einstr
+
+
+def prod(iterable):
+    return functools.reduce(operator.mul, iterable, 1)
+
+def common_modulus(legs):
+    moduli = set(leg.modulus for leg in legs)
+    if len(moduli) > 1:
+        raise ValueError('legs should share the same symmetry group: {}'.format(legs))
+    return moduli.pop() if moduli else None
+
+def fuse(charges, legs, modulus):
+    total = sum(leg.flow * c for c, leg in zip(charges, legs))
+    return total % modulus if modulus is not None else total
+
+def allowed_keys(legs, charge):
+    modulus = common_modulus(legs)
+    if charge is not None and modulus is not None:
+        charge %= modulus
+    for key in itertools.product(*(leg.charges for leg in legs)):
+        if charge is None or fuse(key, legs, modulus) == charge:
+            yield key
+
+def block_shape(legs, key):
+    return tuple(leg.dimof(c) for leg, c in zip(legs, key))
+
+def locator(leg):
+    bounds = []
+    offset = 0
+    for c, d in leg.sectors:
+        bounds.append((offset, offset + d, c))
+        offset += d
+    def locate(i):
+        for start, end, c in bounds:
+            if start <= i < end:
+                return c, i - start
+        raise IndexError('index {} is out of bounds for leg of dimension {}'.format(i, offset))
+    return locate
+
+def from_dense(array, legs, charge):
+    offsets = [leg.offsets() for leg in legs]
+    blocks = {}
+    for key in allowed_keys(legs, charge):
+        slices = tuple(
+            slice(offset[c], offset[c] + leg.dimof(c))
+            for offset, leg, c in zip(offsets, legs, key)
+        )
+        blocks[key] = np.array(array[slices])
+    return blocks
+
+
+def einsum(expr, operands):
+    if expr.outputs[0].fusing:
+        raise ValueError('indices fusing is not supported for block-sparse tensors: "{}"'.format(expr.source))
+    output_indices = list(expr.outputs[0])
+    leg_of_index = check_legs(expr, operands, output_indices)
+    terms = [list(term) for term in expr.inputs]
+    def needed_after(n):
+        return set(output_indices).union(*terms[n+1:])
+    current_indices, current_blocks = reduce_term(
+        terms[0], operands[0].blocks, keep_indices(terms[0], needed_after(0))
+    )
+    for n in range(1, len(terms)):
+        other_indices, other_blocks = reduce_term(
+            terms[n], operands[n].blocks, keep_indices(terms[n], set(current_indices) | needed_after(n))
+        )
+        current_indices, current_blocks = contract_pair(
+            current_indices, current_blocks, other_indices, other_blocks, needed_after(n)
+        )
+    _, blocks = reduce_term(current_indices, current_blocks, output_indices)
+    legs = [leg_of_index[idx] for idx in output_indices]
+    return legs, blocks
+
+def check_legs(expr, operands, output_indices):
+    # every leg of an index has the same sectors; to conserve charge, the legs of a summed index
+    # come in pairs of opposite flows and those of an output index all have the same flow. The
+    # flows of tensors without a definite charge, such as singular values, are not checked
+    legs_of_index = {}
+    for term, operand in zip(expr.inputs, operands):
+        for idx, leg in zip(term, operand.legs):
+            legs_of_index.setdefault(idx, []).append((leg, operand.charge is not None))
+    leg_of_index = {}
+    for idx, legs in legs_of_index.items():
+        first = legs[0][0]
+        flows = [leg.flow for leg, charged in legs if charged]
+        if any(leg.sectors != first.sectors or leg.modulus != first.modulus for leg, _ in legs):
+            raise ValueError('legs of index "{}" do not match: "{}"'.format(einstr.chars[idx], expr.source))
+        if idx in output_indices and len(set(flows)) > 1:
+            raise ValueError('legs of output index "{}" have different flows: "{}"'.format(einstr.chars[idx], expr.source))
+        if idx not in output_indices and sum(flows) != 0:
+            raise ValueError('legs of summed index "{}" do not have opposite flows: "{}"'.format(einstr.chars[idx], expr.source))
+        charged = [leg for leg, charged in legs if charged]
+        leg_of_index[idx] = charged[0] if charged else first
+    return leg_of_index
+
+def keep_indices(term, needed):
+    result = []
+    for idx in term:
+        if idx in needed and idx not in result:
+            result.append(idx)
+    return result
+
+def reduce_term(term, blocks, keep):
+    positions = {}
+    for i, idx in enumerate(term):
+        positions.setdefault(idx, []).append(i)
+    if list(term) == list(keep):
+        return list(keep), blocks
+    subscripts = '{}->{}'.format(
+        ''.join(einstr.chars[idx] for idx in term),
+        ''.join(einstr.chars[idx] for idx in keep),
+    )
+    result = {}
+    for key, block in blocks.items():
+        if any(len(set(key[i] for i in p)) > 1 for p in positions.values()):
+            continue
+        newkey = tuple(key[positions[idx][0]] for idx in keep)
+        accumulate(result, newkey, np.einsum(subscripts, block))
+    return list(keep), result
+
+def contract_pair(left_indices, left_blocks, right_indices, right_blocks, needed):
+    shared = [idx for idx in left_indices if idx in right_indices]
+    kept = [idx for idx in left_indices + right_indices if idx in needed]
+    kept = list(dict.fromkeys(kept))
+    left_pos = {idx: i for i, idx in enumerate(left_indices)}
+    right_pos = {idx: i for i, idx in enumerate(right_indices)}
+    subscripts = '{},{}->{}'.format(
+        ''.join(einstr.chars[idx] for idx in left_indices),
+        ''.join(einstr.chars[idx] for idx in right_indices),
+        ''.join(einstr.chars[idx] for idx in kept),
+    )
+    grouped = {}
+    for key, block in right_blocks.items():
+        grouped.setdefault(tuple(key[right_pos[idx]] for idx in shared), []).append((key, block))
+    result = {}
+    for left_key, left_block in left_blocks.items():
+        shared_key = tuple(left_key[left_pos[idx]] for idx in shared)
+        for right_key, right_block in grouped.get(shared_key, []):
+            newkey = tuple(
+                left_key[left_pos[idx]] if idx in left_pos else right_key[right_pos[idx]]
+                for idx in kept
+            )
+            accumulate(result, newkey, np.einsum(subscripts, left_block, right_block))
+    return kept, result
+
+def accumulate(blocks, key, block):
+    if key in blocks:
+        blocks[key] = blocks[key] + block
+    else:
+        blocks[key] = block
+
+def infer_charge(legs, blocks, default):
+    modulus = common_modulus(legs)
+    charges = set(fuse(key, legs, modulus) for key in blocks)
+    if len(charges) > 1:
+        raise ValueError('contraction does not conserve charge: {}'.format(sorted(charges)))
+    return charges.pop() if charges else default
+
+
+def decompose(expr, a, factorize):
+    if expr.outputs[0].fusing or expr.outputs[1].fusing:
+        raise ValueError('indices fusing is not supported for block-sparse tensors: "{}"'.format(expr.source))
+    if a.charge is None:
+        raise ValueError('cannot decompose a tensor without a definite charge')
+    newindex = (expr.output_indices - expr.input_indices).pop()
+    axis_of_index = {index: axis for axis, index in enumerate(expr.inputs[0])}
+    u_axes = [axis_of_index[index] for index in expr.outputs[0] if index != newindex]
+    v_axes = [axis_of_index[index] for index in expr.outputs[1] if index != newindex]
+    u_legs = [a.legs[axis] for axis in u_axes]
+    v_legs = [a.legs[axis] for axis in v_axes]
+    modulus = a.modulus
+    # group blocks into charge sectors of the matricized tensor
+    sectors = {}
+    for key, block in a.blocks.items():
+        u_key = tuple(key[axis] for axis in u_axes)
+        v_key = tuple(key[axis] for axis in v_axes)
+        sector = sectors.setdefault(fuse(u_key, u_legs, modulus), ({}, {}, []))
+        sector[0].setdefault(u_key, prod(block_shape(u_legs, u_key)))
+        sector[1].setdefault(v_key, prod(block_shape(v_legs, v_key)))
+        sector[2].append((u_key, v_key, block.transpose(*u_axes, *v_axes)))
+    factors = {}
+    for charge, (u_sizes, v_sizes, items) in sectors.items():
+        u_offsets = dict(zip(u_sizes, np.cumsum([0, *u_sizes.values()])))
+        v_offsets = dict(zip(v_sizes, np.cumsum([0, *v_sizes.values()])))
+        matrix = np.zeros((sum(u_sizes.values()), sum(v_sizes.values())), dtype=a.dtype)
+        for u_key, v_key, block in items:
+            u_start, v_start = u_offsets[u_key], v_offsets[v_key]
+            matrix[u_start:u_start+u_sizes[u_key], v_start:v_start+v_sizes[v_key]] = block.reshape(u_sizes[u_key], v_sizes[v_key])
+        factors[charge] = (u_sizes, u_offsets, v_sizes, v_offsets, factorize(matrix))
+    return newindex, u_legs, v_legs, factors
+
+def split_factor(matrix, legs, sizes, offsets, rows):
+    blocks = {}
+    for key, size in sizes.items():
+        start = offsets[key]
+        if rows:
+            blocks[key] = matrix[start:start+size, :].reshape(*block_shape(legs, key), -1)
+        else:
+            blocks[key] = matrix[:, start:start+size].reshape(-1, *block_shape(legs, key))
+    return blocks
+
+def truncation(singular_values, rank):
+    if rank is None:
+        return {charge: len(s) for charge, s in singular_values.items()}
+    ordered = sorted(
+        ((value, charge) for charge, s in singular_values.items() for value in s),
+        key=lambda item: -item[0],
+    )
+    kept = {charge: 0 for charge in singular_values}
+    for _, charge in ordered[:rank]:
+        kept[charge] += 1
+    return kept
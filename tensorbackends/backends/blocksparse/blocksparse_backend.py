@@ -0,0 +1,245 @@
+"""
+This module implements the blocksparse backend.
+"""
+
+import json
+
+import numpy as np
+import numpy.linalg as la
+
+from ...interface import Backend
+from ...utils import einstr
+from ...extensions.einqr import parse_einqr
+from .blocksparse_random import BlockSparseRandom
+from .blocksparse_tensor import BlockSparseTensor, Leg
+from . import blocks_utils
+
+
+class BlockSparseBackend(Backend):
+    @property
+    def name(self):
+        return 'blocksparse'
+
+    @property
+    def nproc(self):
+        return 1
+
+    @property
+    def rank(self):
+        return 0
+
+    @property
+    def random(self):
+        return BlockSparseRandom()
+
+    @property
+    def tensor(self):
+        return BlockSparseTensor
+
+    def astensor(self, obj, dtype=None):
+        if isinstance(obj, self.tensor) and dtype is None:
+            return obj
+        elif isinstance(obj, self.tensor) and dtype is not None:
+            return obj.astype(dtype)
+        else:
+            raise TypeError('cannot infer legs of {}; use fromdense instead'.format(type(obj).__qualname__))
+
+    def fromdense(self, obj, legs, charge=0, dtype=None):
+        array = np.asarray(obj, dtype=dtype)
+        if array.shape != tuple(leg.dim for leg in legs):
+            raise ValueError('shape {} does not match legs: {}'.format(array.shape, legs))
+        return self.tensor(legs, blocks_utils.from_dense(array, legs, charge), charge, array.dtype)
+
+    def empty(self, shape, dtype=float, charge=0):
+        blocks = {
+            key: np.empty(blocks_utils.block_shape(shape, key), dtype=dtype)
+            for key in blocks_utils.allowed_keys(shape, charge)
+        }
+        return self.tensor(shape, blocks, charge, dtype)
+
+    def zeros(self, shape, dtype=float, charge=0):
+        blocks = {
+            key: np.zeros(blocks_utils.block_shape(shape, key), dtype=dtype)
+            for key in blocks_utils.allowed_keys(shape, charge)
+        }
+        return self.tensor(shape, blocks, charge, dtype)
+
+    def ones(self, shape, dtype=float, charge=0):
+        blocks = {
+            key: np.ones(blocks_utils.block_shape(shape, key), dtype=dtype)
+            for key in blocks_utils.allowed_keys(shape, charge)
+        }
+        return self.tensor(shape, blocks, charge, dtype)
+
+    def shape(self, a):
+        return a.shape
+
+    def ndim(self, a):
+        return a.ndim
+
+    def copy(self, a):
+        return a.copy()
+
+    def save(self, tsr, filename):
+        header = {
+            'legs': [[list(map(list, leg.sectors)), leg.flow, leg.modulus] for leg in tsr.legs],
+            'keys': [list(key) for key in tsr.blocks],
+            'charge': tsr.charge,
+            'dtype': tsr.dtype.str,
+        }
+        arrays = {'block{}'.format(i): block for i, block in enumerate(tsr.blocks.values())}
+        with open(filename, 'w+b') as file:
+            np.savez(file, header=np.array(json.dumps(header)), **arrays)
+
+    def load(self, filename):
+        with np.load(filename, allow_pickle=False) as data:
+            header = json.loads(str(data['header']))
+            legs = [Leg(sectors, flow, modulus) for sectors, flow, modulus in header['legs']]
+            blocks = {tuple(key): data['block{}'.format(i)] for i, key in enumerate(header['keys'])}
+        return self.tensor(legs, blocks, header['charge'], header['dtype'])
+
+    def einsum(self, subscripts, *operands):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsum(subscripts, ndims)
+        return self._einsum(expr, operands)
+
+    def einsvd_reduced(self, subscripts, a, rank=None):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        expr = einstr.parse_einsvd(subscripts, a.ndim)
+        def svd_func(matrix):
+            return la.svd(matrix, full_matrices=False)
+        return self._einsvd(expr, a, svd_func, rank)
+
+    def einsvd_rand(self, subscripts, a, rank, niter=1, oversamp=5):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        expr = einstr.parse_einsvd(subscripts, a.ndim)
+        def svd_func(matrix):
+            return self._rsvd_matrix(matrix, rank, niter, oversamp)
+        return self._einsvd(expr, a, svd_func, rank)
+
+    def einsumsvd_reduced(self, subscripts, *operands, rank=None):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        def svd_func(matrix):
+            return la.svd(matrix, full_matrices=False)
+        return self._einsvd(einsvd_expr, a, svd_func, rank)
+
+    def einsumsvd_rand(self, subscripts, *operands, rank, niter=1, oversamp=5):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        def svd_func(matrix):
+            return self._rsvd_matrix(matrix, rank, niter, oversamp)
+        return self._einsvd(einsvd_expr, a, svd_func, rank)
+
+    def einsumsvd_implicit_rand(self, subscripts, *operands, rank, niter=1):
+        # the contracted tensor is block-sparse already, so it is formed explicitly
+        return self.einsumsvd_rand(subscripts, *operands, rank=rank, niter=niter)
+
+    def einqr(self, subscripts, a):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        expr = parse_einqr(subscripts, a.ndim)
+        newindex, u_legs, v_legs, factors = blocks_utils.decompose(expr, a, la.qr)
+        q_blocks, r_blocks, sectors = {}, {}, []
+        for charge in sorted(factors):
+            u_sizes, u_offsets, v_sizes, v_offsets, (q, r) = factors[charge]
+            sectors.append((charge, q.shape[1]))
+            for key, block in blocks_utils.split_factor(q, u_legs, u_sizes, u_offsets, rows=True).items():
+                q_blocks[(*key, charge)] = block
+            for key, block in blocks_utils.split_factor(r, v_legs, v_sizes, v_offsets, rows=False).items():
+                r_blocks[(charge, *key)] = block
+        newleg = Leg(sectors, 1, a.modulus)
+        q = self.tensor([*u_legs, newleg.dual()], q_blocks, 0, a.dtype)
+        r = self.tensor([newleg, *v_legs], r_blocks, a.charge, a.dtype)
+        q = self.moveaxis(q, -1, expr.outputs[0].find(newindex))
+        r = self.moveaxis(r, 0, expr.outputs[1].find(newindex))
+        return q, r
+
+    def isclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        a = a.numpy() if isinstance(a, self.tensor) else a
+        b = b.numpy() if isinstance(b, self.tensor) else b
+        return np.isclose(a, b, rtol=rtol, atol=atol)
+
+    def allclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        same_sectors = lambda a, b: [leg.sectors for leg in a.legs] == [leg.sectors for leg in b.legs]
+        if isinstance(a, self.tensor) and isinstance(b, self.tensor) and same_sectors(a, b):
+            for key in set(a.blocks) | set(b.blocks):
+                a_block = a.blocks.get(key, 0)
+                b_block = b.blocks.get(key, 0)
+                if not np.allclose(a_block, b_block, rtol=rtol, atol=atol):
+                    return False
+            return True
+        a = a.numpy() if isinstance(a, self.tensor) else a
+        b = b.numpy() if isinstance(b, self.tensor) else b
+        return np.allclose(a, b, rtol=rtol, atol=atol)
+
+    def svd(self, a):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        if a.ndim != 2:
+            raise TypeError('the input tensor should be a matrix')
+        return self.einsvd_reduced('ij->ia,aj', a)
+
+    def qr(self, a):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        if a.ndim != 2:
+            raise TypeError('the input tensor should be a matrix')
+        return self.einqr('ij->ia,aj', a)
+
+    def rsvd(self, a, rank, niter=1, oversamp=5):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        if a.ndim != 2:
+            raise TypeError('the input tensor should be a matrix')
+        return self.einsvd_rand('ij->ia,aj', a, rank, niter, oversamp)
+
+    def _einsum(self, expr, operands):
+        legs, blocks = blocks_utils.einsum(expr, operands)
+        if not legs:
+            return blocks[()].item() if () in blocks else 0
+        charges = [operand.charge for operand in operands]
+        default = sum(charges) if None not in charges else None
+        charge = blocks_utils.infer_charge(legs, blocks, default)
+        dtype = np.result_type(*(operand.dtype for operand in operands))
+        return self.tensor(legs, blocks, charge, dtype)
+
+    def _einsvd(self, expr, a, svd_func, rank):
+        newindex, u_legs, v_legs, factors = blocks_utils.decompose(expr, a, svd_func)
+        kept = blocks_utils.truncation({charge: factor[4][1] for charge, factor in factors.items()}, rank)
+        u_blocks, s_blocks, vh_blocks, sectors = {}, {}, {}, []
+        for charge in sorted(factors):
+            u_sizes, u_offsets, v_sizes, v_offsets, (u, s, vh) = factors[charge]
+            k = kept[charge]
+            if k == 0:
+                continue
+            sectors.append((charge, k))
+            for key, block in blocks_utils.split_factor(u[:,:k], u_legs, u_sizes, u_offsets, rows=True).items():
+                u_blocks[(*key, charge)] = block
+            for key, block in blocks_utils.split_factor(vh[:k,:], v_legs, v_sizes, v_offsets, rows=False).items():
+                vh_blocks[(charge, *key)] = block
+            s_blocks[(charge,)] = s[:k]
+        newleg = Leg(sectors, 1, a.modulus)
+        u = self.tensor([*u_legs, newleg.dual()], u_blocks, 0, a.dtype)
+        s = self.tensor([newleg], s_blocks, None)
+        vh = self.tensor([newleg, *v_legs], vh_blocks, a.charge, a.dtype)
+        u = self.moveaxis(u, -1, expr.outputs[0].find(newindex))
+        vh = self.moveaxis(vh, 0, expr.outputs[1].find(newindex))
+        return u, s, vh
+
+    def _rsvd_matrix(self, matrix, rank, niter, oversamp):
+        from ..numpy import NumPyBackend, NumPyTensor
+        u, s, vh = NumPyBackend().rsvd(NumPyTensor(matrix), rank, niter, oversamp)
+        return u.unwrap(), s.unwrap(), vh.unwrap()
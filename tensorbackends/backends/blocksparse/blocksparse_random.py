@@ -0,0 +1,44 @@
+"""
+This module implements the random module for blocksparse backend.
+"""
+
+import numpy as np
+
+from ...interface import Random
+from .blocksparse_tensor import BlockSparseTensor
+from . import blocks_utils
+
+
+class BlockSparseRandom(Random):
+    def seed(self, seed):
+        np.random.seed(seed)
+
+    def random(self, size=None, charge=0, dtype=float):
+        return self.uniform(0.0, 1.0, size, charge, dtype)
+
+    def uniform(self, low=0.0, high=1.0, size=None, charge=0, dtype=float):
+        return self._generate(lambda shape: np.random.uniform(low, high, shape), size, charge, dtype)
+
+    def normal(self, loc=0.0, scale=1.0, size=None, charge=0, dtype=float):
+        if np.dtype(dtype).kind == 'c':
+            # complex values split the variance evenly between the real and the imaginary part
+            draw = lambda shape: np.real(loc) + np.random.normal(0.0, scale / np.sqrt(2), shape)
+            imag = lambda shape: np.imag(loc) + np.random.normal(0.0, scale / np.sqrt(2), shape)
+            return self._generate(draw, size, charge, dtype, imag)
+        return self._generate(lambda shape: np.random.normal(loc, scale, shape), size, charge, dtype)
+
+    def _generate(self, draw, size, charge, dtype, imag=None):
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64, np.complex64, np.complex128):
+            raise TypeError('unsupported dtype for random values: {}'.format(dtype))
+        def block(shape):
+            if dtype.kind == 'c':
+                return (draw(shape) + 1j * (imag or draw)(shape)).astype(dtype)
+            return np.asarray(draw(shape)).astype(dtype)
+        if size is None:
+            return block(())[()]
+        blocks = {
+            key: block(blocks_utils.block_shape(size, key))
+            for key in blocks_utils.allowed_keys(size, charge)
+        }
+        return BlockSparseTensor(size, blocks, charge, dtype)
@@ -0,0 +1,241 @@
+"""
+This module implements the block-sparse tensor with abelian symmetry labels.
+"""
+
+import numpy as np
+
+from ...interface import Tensor
+from ...utils import entries
+from . import blocks_utils
+
+
+class Leg:
+    def __init__(self, sectors, flow=1, modulus=None):
+        if isinstance(sectors, dict):
+            sectors = sectors.items()
+        if flow not in (1, -1):
+            raise ValueError('flow of a leg should be 1 or -1: {}'.format(flow))
+        if modulus is not None and modulus < 1:
+            raise ValueError('modulus of a leg should be positive: {}'.format(modulus))
+        normalize = (lambda c: int(c) % modulus) if modulus is not None else int
+        self.sectors = tuple((normalize(c), int(d)) for c, d in sectors)
+        self.flow = flow
+        self.modulus = modulus
+        if len(set(c for c, _ in self.sectors)) != len(self.sectors):
+            raise ValueError('charges of a leg should not repeat: {}'.format(self.sectors))
+
+    @property
+    def dim(self):
+        return sum(d for _, d in self.sectors)
+
+    @property
+    def charges(self):
+        return tuple(c for c, _ in self.sectors)
+
+    def dimof(self, charge):
+        return dict(self.sectors)[charge]
+
+    def offsets(self):
+        result, offset = {}, 0
+        for c, d in self.sectors:
+            result[c] = offset
+            offset += d
+        return result
+
+    def dual(self):
+        return Leg(self.sectors, -self.flow, self.modulus)
+
+    def __eq__(self, other):
+        return (isinstance(other, Leg) and self.sectors == other.sectors
+            and self.flow == other.flow and self.modulus == other.modulus)
+
+    def __hash__(self):
+        return hash((self.sectors, self.flow, self.modulus))
+
+    def __repr__(self):
+        return 'Leg({}, flow={}, modulus={})'.format(dict(self.sectors), self.flow, self.modulus)
+
+
+class BlockSparseTensor(Tensor):
+    def __init__(self, legs, blocks, charge=0, dtype=None):
+        self.legs = tuple(legs)
+        self.blocks = blocks
+        self.modulus = blocks_utils.common_modulus(self.legs)
+        self.charge = charge if charge is None or self.modulus is None else charge % self.modulus
+        if dtype is None:
+            dtype = np.result_type(*self.blocks.values()) if self.blocks else np.dtype(float)
+        self._dtype = np.dtype(dtype)
+
+    @property
+    def backend(self):
+        from . import BlockSparseBackend
+        return BlockSparseBackend()
+
+    @property
+    def shape(self):
+        return tuple(leg.dim for leg in self.legs)
+
+    @property
+    def ndim(self):
+        return len(self.legs)
+
+    @property
+    def size(self):
+        return blocks_utils.prod(self.shape)
+
+    @property
+    def nnz(self):
+        return sum(block.size for block in self.blocks.values())
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    def unwrap(self):
+        return self.blocks
+
+    def numpy(self):
+        result = np.zeros(self.shape, dtype=self.dtype)
+        offsets = [leg.offsets() for leg in self.legs]
+        for key, block in self.blocks.items():
+            slices = tuple(
+                slice(offset[c], offset[c] + d)
+                for offset, c, d in zip(offsets, key, block.shape)
+            )
+            result[slices] = block
+        return result
+
+    def __repr__(self):
+        return 'BlockSparseTensor(shape={}, charge={}, nblocks={}, dtype={})'.format(
+            self.shape, self.charge, len(self.blocks), self.dtype
+        )
+
+    def __str__(self):
+        return str(self.numpy())
+
+    def copy(self):
+        blocks = {key: block.copy() for key, block in self.blocks.items()}
+        return BlockSparseTensor(self.legs, blocks, self.charge, self.dtype)
+
+    def astype(self, dtype):
+        blocks = {key: block.astype(dtype) for key, block in self.blocks.items()}
+        return BlockSparseTensor(self.legs, blocks, self.charge, dtype)
+
+    def conj(self):
+        blocks = {key: block.conj() for key, block in self.blocks.items()}
+        charge = None if self.charge is None else -self.charge
+        return BlockSparseTensor([leg.dual() for leg in self.legs], blocks, charge, self.dtype)
+
+    def transpose(self, *axes):
+        if not axes:
+            axes = tuple(reversed(range(self.ndim)))
+        if sorted(axes) != list(range(self.ndim)):
+            raise ValueError('axes do not match tensor: {}'.format(axes))
+        legs = [self.legs[axis] for axis in axes]
+        blocks = {
+            tuple(key[axis] for axis in axes): block.transpose(*axes)
+            for key, block in self.blocks.items()
+        }
+        return BlockSparseTensor(legs, blocks, self.charge, self.dtype)
+
+    def reshape(self, *newshape):
+        if len(newshape) == 1 and isinstance(newshape[0], (tuple, list)):
+            newshape = tuple(newshape[0])
+        if newshape == self.shape:
+            return self
+        raise ValueError('block-sparse tensors cannot be reshaped without fusing legs: {} -> {}'.format(self.shape, newshape))
+
+    def read(self, inds):
+        # elements outside the stored blocks are zero
+        flat, shape = entries.flatten(inds, self.shape)
+        multi_inds = np.unravel_index(flat, self.shape)
+        locators = [blocks_utils.locator(leg) for leg in self.legs]
+        result = np.zeros(flat.shape, dtype=self.dtype)
+        for n in range(flat.size):
+            key, position = zip(*(locate(axis_inds[n]) for locate, axis_inds in zip(locators, multi_inds)))
+            if key in self.blocks:
+                result[n] = self.blocks[key][position]
+        return result.reshape(shape)
+
+    def write(self, inds, vals, accumulate=False):
+        inds, _ = entries.flatten(inds, self.shape)
+        vals = entries.values(vals, inds.size)
+        multi_inds = np.unravel_index(inds, self.shape)
+        locators = [blocks_utils.locator(leg) for leg in self.legs]
+        for n, val in enumerate(vals):
+            key, position = zip(*(locate(axis_inds[n]) for locate, axis_inds in zip(locators, multi_inds)))
+            if key not in self.blocks:
+                if self.charge is not None and blocks_utils.fuse(key, self.legs, self.modulus) != self.charge:
+                    raise ValueError('element {} is not allowed by charge {}'.format(inds[n], self.charge))
+                self.blocks[key] = np.zeros(tuple(leg.dimof(c) for leg, c in zip(self.legs, key)), dtype=self.dtype)
+            if accumulate:
+                self.blocks[key][position] += val
+            else:
+                self.blocks[key][position] = val
+        self._touch()
+
+    def norm(self):
+        return float(np.sqrt(sum(np.vdot(block, block).real for block in self.blocks.values())))
+
+    def __pos__(self):
+        return self.copy()
+
+    def __neg__(self):
+        return self._map(lambda block: -block)
+
+    def __abs__(self):
+        return self._map(np.abs)
+
+    def __mul__(self, other):
+        if isinstance(other, BlockSparseTensor):
+            self._check_same_legs(other)
+            # a product is nonzero only on blocks stored in both operands, which fuse to the
+            # charge of each; operands of different charges share no allowed block
+            charge = self.charge if self.charge is not None else other.charge
+            blocks = {
+                key: block * other.blocks[key]
+                for key, block in self.blocks.items() if key in other.blocks
+            } if self.charge is None or other.charge is None or self.charge == other.charge else {}
+            return BlockSparseTensor(self.legs, blocks, charge, np.result_type(self.dtype, other.dtype))
+        elif np.isscalar(other):
+            return self._map(lambda block: block * other)
+        else:
+            return NotImplemented
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        if np.isscalar(other):
+            return self._map(lambda block: block / other)
+        else:
+            return NotImplemented
+
+    def __add__(self, other):
+        return self._combine(other, 1)
+
+    def __sub__(self, other):
+        return self._combine(other, -1)
+
+    def _map(self, func):
+        blocks = {key: func(block) for key, block in self.blocks.items()}
+        dtype = np.result_type(*blocks.values()) if blocks else self.dtype
+        return BlockSparseTensor(self.legs, blocks, self.charge, dtype)
+
+    def _combine(self, other, sign):
+        if not isinstance(other, BlockSparseTensor):
+            return NotImplemented
+        self._check_same_legs(other)
+        if self.charge != other.charge:
+            raise ValueError('charges of operands do not match: {} != {}'.format(self.charge, other.charge))
+        blocks = {key: block.copy() for key, block in self.blocks.items()}
+        for key, block in other.blocks.items():
+            if key in blocks:
+                blocks[key] = blocks[key] + sign * block
+            else:
+                blocks[key] = sign * block
+        return BlockSparseTensor(self.legs, blocks, self.charge, np.result_type(self.dtype, other.dtype))
+
+    def _check_same_legs(self, other):
+        if self.legs != other.legs:
+            raise ValueError('legs of operands do not match: {} != {}'.format(self.legs, other.legs))
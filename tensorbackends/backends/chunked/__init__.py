@@ -0,0 +1,2 @@
+from .chunked_backend import ChunkedBackend
+from .chunked_tensor import ChunkedTensor
@@ -0,0 +1,333 @@
+"""
+This module implements the chunked backend.
+"""
+
+import functools, operator
+
+import numpy as np
+import numpy.linalg as la
+
+from ...interface import Backend
+from ...utils import einstr
+from .chunked_random import ChunkedRandom
+from .chunked_tensor import ChunkedTensor
+from .chunks_store import ChunkStore, Scheduler
+from . import chunks_utils
+
+
+class ChunkedBackend(Backend):
+    chunk_bytes = 2**24
+    _store = None
+    _scheduler = None
+
+    @property
+    def name(self):
+        return 'chunked'
+
+    @property
+    def nproc(self):
+        return 1
+
+    @property
+    def rank(self):
+        return 0
+
+    @property
+    def random(self):
+        return ChunkedRandom()
+
+    @property
+    def tensor(self):
+        return ChunkedTensor
+
+    @property
+    def store(self):
+        if ChunkedBackend._store is None:
+            ChunkedBackend._store = ChunkStore()
+        return ChunkedBackend._store
+
+    @property
+    def scheduler(self):
+        if ChunkedBackend._scheduler is None:
+            ChunkedBackend._scheduler = Scheduler()
+        return ChunkedBackend._scheduler
+
+    def configure(self, *, memory_limit=None, chunk_bytes=None, max_workers=None, processes=None, spill_dir=None):
+        if memory_limit is not None:
+            self.store.memory_limit = memory_limit
+            with self.store._lock:
+                self.store._evict()
+        if spill_dir is not None:
+            self.store.spill_dir = spill_dir
+        if chunk_bytes is not None:
+            ChunkedBackend.chunk_bytes = chunk_bytes
+        if max_workers is not None or processes is not None:
+            self.scheduler.shutdown()
+            ChunkedBackend._scheduler = Scheduler(
+                max_workers or self.scheduler.max_workers,
+                self.scheduler.processes if processes is None else processes,
+            )
+
+    def astensor(self, obj, dtype=None):
+        if isinstance(obj, self.tensor) and dtype is None:
+            return obj
+        elif isinstance(obj, self.tensor) and dtype is not None:
+            return obj.astype(dtype)
+        elif isinstance(obj, np.ndarray) and dtype is None:
+            return self.from_array(obj)
+        elif isinstance(obj, np.ndarray) and dtype is not None:
+            return self.from_array(obj.astype(dtype))
+        else:
+            return self.from_array(np.array(obj, dtype=dtype))
+
+    def from_array(self, array, chunks=None):
+        if chunks is None:
+            chunks = chunks_utils.normalize_chunks(array.shape, array.dtype.itemsize, self.chunk_bytes)
+        keys = {
+            coord: self.store.put(np.array(array[chunks_utils.block_slices(chunks, coord)]))
+            for coord in chunks_utils.grid(chunks)
+        }
+        return self.tensor(array.shape, chunks, keys, array.dtype)
+
+    def empty(self, shape, dtype=float):
+        return self._create(np.empty, shape, dtype)
+
+    def zeros(self, shape, dtype=float):
+        return self._create(np.zeros, shape, dtype)
+
+    def ones(self, shape, dtype=float):
+        return self._create(np.ones, shape, dtype)
+
+    def shape(self, a):
+        return a.shape
+
+    def ndim(self, a):
+        return a.ndim
+
+    def copy(self, a):
+        return a.copy()
+
+    def save(self, tsr, filename):
+        array = np.lib.format.open_memmap(filename, mode='w+', dtype=tsr.dtype, shape=tsr.shape)
+        for coord in tsr.keys:
+            array[chunks_utils.block_slices(tsr.chunks, coord)] = tsr.block(coord)
+        array.flush()
+        del array
+
+    def load(self, filename):
+        return self.from_array(np.load(filename, mmap_mode='r', allow_pickle=False))
+
+    def einsum(self, subscripts, *operands):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsum(subscripts, ndims)
+        return self._einsum(expr, operands)
+
+    def einsvd_reduced(self, subscripts, a, rank=None):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        expr = einstr.parse_einsvd(subscripts, a.ndim)
+        def svd_func(matrix):
+            u, s, vh = self.svd(matrix)
+            if rank is not None and s.shape[0] > rank:
+                u, s, vh = u[:,:rank], s[:rank], vh[:rank,:]
+            return u, s, vh
+        return self._einsvd(expr, a, svd_func)
+
+    def einsvd_rand(self, subscripts, a, rank, niter=1, oversamp=5):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        expr = einstr.parse_einsvd(subscripts, a.ndim)
+        def svd_func(matrix):
+            return self.rsvd(matrix, rank, niter, oversamp)
+        return self._einsvd(expr, a, svd_func)
+
+    def einsumsvd_reduced(self, subscripts, *operands, rank=None):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        def svd_func(matrix):
+            u, s, vh = self.svd(matrix)
+            if rank is not None and s.shape[0] > rank:
+                u, s, vh = u[:,:rank], s[:rank], vh[:rank,:]
+            return u, s, vh
+        return self._einsvd(einsvd_expr, a, svd_func)
+
+    def einsumsvd_rand(self, subscripts, *operands, rank, niter=1, oversamp=5):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        def svd_func(matrix):
+            return self.rsvd(matrix, rank, niter, oversamp)
+        return self._einsvd(einsvd_expr, a, svd_func)
+
+    def isclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        func = functools.partial(np.isclose, rtol=rtol, atol=atol)
+        if isinstance(a, self.tensor):
+            return a._map(func, self.astensor(b) if isinstance(b, np.ndarray) else b)
+        elif isinstance(b, self.tensor):
+            return b._map(functools.partial(chunks_utils.apply_reversed, func), a)
+        else:
+            return np.isclose(a, b, rtol=rtol, atol=atol)
+
+    def allclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        a = self.astensor(a) if isinstance(a, np.ndarray) else a
+        b = self.astensor(b) if isinstance(b, np.ndarray) else b
+        if isinstance(a, self.tensor) and isinstance(b, self.tensor) and a.shape != b.shape:
+            return np.allclose(a.numpy(), b.numpy(), rtol=rtol, atol=atol)
+        # blocks are compared one by one so that a mismatch stops early
+        if isinstance(a, self.tensor):
+            b = b.rechunk(a.chunks) if isinstance(b, self.tensor) else b
+            return all(
+                np.allclose(a.block(coord), b.block(coord) if isinstance(b, self.tensor) else b, rtol=rtol, atol=atol)
+                for coord in a.keys
+            )
+        elif isinstance(b, self.tensor):
+            return all(np.allclose(a, b.block(coord), rtol=rtol, atol=atol) for coord in b.keys)
+        else:
+            return np.allclose(a, b, rtol=rtol, atol=atol)
+
+    def inv(self, a):
+        return self.astensor(la.inv(a._in_core()))
+
+    def svd(self, a):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        if a.ndim != 2:
+            raise TypeError('the input tensor should be a matrix')
+        # the factorization itself runs in memory; contractions around it stay chunked
+        u, s, vh = la.svd(a._in_core(), full_matrices=False)
+        return self.astensor(u), self.astensor(s), self.astensor(vh)
+
+    def __getattr__(self, attr):
+        wrap = lambda val: self.astensor(val) if isinstance(val, np.ndarray) else val
+        unwrap = lambda val: val._in_core() if isinstance(val, ChunkedTensor) else val
+        try:
+            result = getattr(np, attr) if hasattr(np, attr) else getattr(la, attr)
+        except AttributeError as e:
+            raise AttributeError("failed to get '{}' from numpy or numpy.linalg".format(attr)) from e
+        if callable(result):
+            def wrapped_result(*args, **kwargs):
+                unwrapped_args = tuple(unwrap(v) for v in args)
+                unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+                retval = result(*unwrapped_args, **unwrapped_kwargs)
+                if isinstance(retval, tuple):
+                    wrapped_retval = tuple(wrap(v) for v in retval)
+                elif isinstance(retval, list):
+                    wrapped_retval = [wrap(v) for v in retval]
+                elif isinstance(retval, dict):
+                    wrapped_retval = {k: wrap(v) for k, v in retval.items()}
+                else:
+                    wrapped_retval = wrap(retval)
+                return wrapped_retval
+            wrapped_result.__module__ = type(self).__module__
+            wrapped_result.__name__ = attr
+            wrapped_result.__qualname__ = '{}.{}'.format(type(self).__qualname__, attr)
+            return wrapped_result
+        else:
+            return result
+
+    def _create(self, func, shape, dtype):
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        chunks = chunks_utils.normalize_chunks(shape, np.dtype(dtype).itemsize, self.chunk_bytes)
+        tasks = [
+            (coord, functools.partial(lambda coord: (tuple(c[i] for c, i in zip(chunks, coord)), dtype), coord))
+            for coord in chunks_utils.grid(chunks)
+        ]
+        return self.tensor(shape, chunks, self._compute(func, tasks), dtype)
+
+    def _compute(self, func, tasks):
+        coords = [coord for coord, _ in tasks]
+        keys = {}
+        for i, result in self.scheduler.map(func, (load() for _, load in tasks)):
+            keys[coords[i]] = self.store.put(result)
+        return keys
+
+    def _accumulate(self, func, tasks, ngroups):
+        # every coordinate takes ngroups tasks whose results are summed; a block goes to the store
+        # once all of its parts are in, and the tasks of a block are adjacent so that few partial
+        # sums are held at a time
+        coords = [coord for coord, _ in tasks]
+        partial, remaining, keys = {}, {}, {}
+        for i, result in self.scheduler.map(func, (load() for _, load in tasks)):
+            coord = coords[i]
+            partial[coord] = result if coord not in partial else partial[coord] + result
+            remaining[coord] = remaining.get(coord, ngroups) - 1
+            if remaining[coord] == 0:
+                keys[coord] = self.store.put(partial.pop(coord))
+        return keys
+
+    def _gather(self, func, tasks):
+        results = [None] * len(tasks)
+        for i, result in self.scheduler.map(func, (load() for _, load in tasks)):
+            results[i] = result
+        return results
+
+    def _einsum(self, expr, operands):
+        chunks_of_index, size_of_index = {}, {}
+        for term, operand in zip(expr.inputs, operands):
+            for idx, chunks, size in zip(term, operand.chunks, operand.shape):
+                chunks_of_index.setdefault(idx, chunks)
+                size_of_index.setdefault(idx, size)
+        operands = [
+            operand.rechunk(tuple(chunks_of_index[idx] for idx in term))
+            for term, operand in zip(expr.inputs, operands)
+        ]
+        output_indices = list(expr.outputs[0])
+        summed_indices = sorted(expr.input_indices - set(output_indices))
+        subscripts = '{}->{}'.format(','.join(t.indices_string for t in expr.inputs), expr.outputs[0].indices_string)
+        # one task per output block and group of summed blocks, so a task holds a single block of
+        # each operand; the partial products of an output block are added up as they arrive
+        def load(coord, summed):
+            coord_of_index = {**dict(zip(output_indices, coord)), **summed}
+            return subscripts, [tuple(
+                operand.block(tuple(coord_of_index[idx] for idx in term))
+                for term, operand in zip(expr.inputs, operands)
+            )]
+        output_chunks = tuple(chunks_of_index[idx] for idx in output_indices)
+        tasks = [
+            (coord, functools.partial(load, coord, summed))
+            for coord in chunks_utils.grid(output_chunks)
+            for summed in _summed_coords(summed_indices, chunks_of_index)
+        ]
+        if not output_indices:
+            return sum(self._gather(chunks_utils.einsum_blocks, tasks)).item()
+        shape = tuple(size_of_index[idx] for idx in output_indices)
+        dtype = np.result_type(*(operand.dtype for operand in operands))
+        ngroups = chunks_utils.prod(len(chunks_of_index[idx]) for idx in summed_indices)
+        result = self.tensor(shape, output_chunks, self._accumulate(chunks_utils.einsum_blocks, tasks, ngroups), dtype)
+        newshape = expr.outputs[0].newshape(result.shape)
+        return result.reshape(*newshape) if newshape != result.shape else result
+
+    def _einsvd(self, expr, a, svd_func):
+        newindex = (expr.output_indices - expr.input_indices).pop()
+        prod = lambda iterable: functools.reduce(operator.mul, iterable, 1)
+        axis_of_index = {index: axis for axis, index in enumerate(expr.inputs[0])}
+        u_axes_from_a = [axis_of_index[index] for index in expr.outputs[0] if index != newindex]
+        vh_axes_from_a = [axis_of_index[index] for index in expr.outputs[1] if index != newindex]
+        # form matrix of a
+        a_matrix_axes = [*u_axes_from_a, *vh_axes_from_a]
+        a_matrix_shape = (prod(a.shape[axis] for axis in u_axes_from_a), -1)
+        a_matrix = a.transpose(*a_matrix_axes).reshape(*a_matrix_shape)
+        u, s, vh = svd_func(a_matrix)
+        # form u
+        u = u.reshape(*(a.shape[axis] for axis in u_axes_from_a), s.shape[0])
+        u = self.moveaxis(u, -1, expr.outputs[0].find(newindex))
+        u = u.reshape(*expr.outputs[0].newshape(u.shape))
+        # form vh
+        vh = vh.reshape(s.shape[0], *(a.shape[axis] for axis in vh_axes_from_a))
+        vh = self.moveaxis(vh, 0, expr.outputs[1].find(newindex))
+        vh = vh.reshape(*expr.outputs[1].newshape(vh.shape))
+        return u, s, vh
+
+
+def _summed_coords(indices, chunks_of_index):
+    for coord in chunks_utils.grid(tuple(chunks_of_index[idx] for idx in indices)):
+        yield dict(zip(indices, coord))
@@ -0,0 +1,41 @@
+"""
+This module implements the random module for chunked backend.
+"""
+
+import numpy as np
+
+from ...interface import Random
+from .chunked_tensor import ChunkedTensor
+from . import chunks_utils
+
+
+class ChunkedRandom(Random):
+    def seed(self, seed):
+        np.random.seed(seed)
+
+    def random(self, size=None):
+        if size is None:
+            return np.random.random()
+        return self._generate(np.random.random, size)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        if size is None:
+            return np.random.uniform(low, high)
+        return self._generate(lambda shape: np.random.uniform(low, high, shape), size)
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        if size is None:
+            return np.random.normal(loc, scale)
+        return self._generate(lambda shape: np.random.normal(loc, scale, shape), size)
+
+    def _generate(self, func, size):
+        # chunks are drawn in order on the calling thread so that seeding stays reproducible
+        from . import ChunkedBackend
+        backend = ChunkedBackend()
+        shape = (size,) if isinstance(size, int) else tuple(size)
+        chunks = chunks_utils.normalize_chunks(shape, np.dtype(float).itemsize, backend.chunk_bytes)
+        keys = {
+            coord: backend.store.put(func(tuple(c[i] for c, i in zip(chunks, coord))))
+            for coord in chunks_utils.grid(chunks)
+        }
+        return ChunkedTensor(shape, chunks, keys, float)
@@ -0,0 +1,451 @@
+"""
+This module implements the chunked tensor.
+"""
+
+import functools, itertools, operator, weakref
+
+import numpy as np
+
+from ...interface import Tensor
+from ...utils import entries
+from . import chunks_utils
+
+
+class ChunkedTensor(Tensor):
+    # advanced indexing, broadcasting between tensors of different shapes and reshapes to or
+    # from scalars assemble the whole tensor in memory
+    def __init__(self, shape, chunks, keys, dtype):
+        self._shape = tuple(shape)
+        self.chunks = tuple(tuple(c) for c in chunks)
+        self.keys = keys
+        self._dtype = np.dtype(dtype)
+        self.store = self.backend.store
+        weakref.finalize(self, _release, self.store, self.keys)
+
+    @property
+    def backend(self):
+        from . import ChunkedBackend
+        return ChunkedBackend()
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def ndim(self):
+        return len(self._shape)
+
+    @property
+    def size(self):
+        return chunks_utils.prod(self._shape)
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def nchunks(self):
+        return len(self.keys)
+
+    def unwrap(self):
+        return self.numpy()
+
+    def numpy(self):
+        result = np.empty(self.shape, dtype=self.dtype)
+        for coord, key in self.keys.items():
+            result[chunks_utils.block_slices(self.chunks, coord)] = self.store.get(key)
+        return result
+
+    def block(self, coord):
+        return self.store.get(self.keys[coord])
+
+    def _in_core(self):
+        # operations without a chunked implementation run on the whole tensor in memory, which
+        # has to fit within the memory limit of the store
+        nbytes = self.size * self.dtype.itemsize
+        if self.store.memory_limit is not None and nbytes > self.store.memory_limit:
+            raise MemoryError('tensor of {} bytes exceeds the memory limit of the chunk store: {}'.format(nbytes, self.store.memory_limit))
+        return self.numpy()
+
+    def __repr__(self):
+        return 'ChunkedTensor(shape={}, chunks={}, dtype={})'.format(self.shape, self.chunks, self.dtype)
+
+    def __str__(self):
+        return str(self.numpy())
+
+    def __getitem__(self, key):
+        normalized_key = self._normalize_key(key)
+        if normalized_key is None:
+            value = self.numpy()[key]
+            return self.backend.astensor(value) if isinstance(value, np.ndarray) else value
+        key = normalized_key
+        per_axis = [list(chunks_utils.selection(c, k)) for c, k in zip(self.chunks, key)]
+        kept_axes = [axis for axis, k in enumerate(key) if isinstance(k, slice)]
+        shape = tuple(sum(n for _, _, n in per_axis[axis]) for axis in kept_axes)
+        chunks = tuple(tuple(n for _, _, n in per_axis[axis]) or (0,) for axis in kept_axes)
+        tasks = []
+        for choice in _product(per_axis):
+            src = tuple(i for i, _, _ in choice)
+            local = tuple(k for _, k, _ in choice)
+            coord = tuple(j for axis, j in zip(range(self.ndim), _positions(per_axis, choice)) if axis in kept_axes)
+            tasks.append((coord, functools.partial(lambda src, local: (self.block(src), local), src, local)))
+        if not kept_axes:
+            return self.backend._gather(chunks_utils.select_block, tasks)[0].item()
+        keys = self.backend._compute(chunks_utils.select_block, tasks)
+        return ChunkedTensor(shape, chunks, keys, self.dtype)
+
+    def __setitem__(self, key, value):
+        value = value.numpy() if isinstance(value, ChunkedTensor) else value
+        normalized_key = self._normalize_key(key)
+        if normalized_key is None:
+            array = self.numpy()
+            array[key] = value
+            self._assign(self.backend.astensor(array).rechunk(self.chunks))
+            return
+        key = normalized_key
+        per_axis = [list(chunks_utils.selection(c, k)) for c, k in zip(self.chunks, key)]
+        kept_axes = [axis for axis, k in enumerate(key) if isinstance(k, slice)]
+        target_shape = tuple(sum(n for _, _, n in per_axis[axis]) for axis in kept_axes)
+        value = np.broadcast_to(np.asarray(value, dtype=self.dtype), target_shape)
+        for choice in _product(per_axis):
+            src = tuple(i for i, _, _ in choice)
+            local = tuple(k for _, k, _ in choice)
+            positions = _positions(per_axis, choice)
+            value_key = tuple(
+                slice(*_span(per_axis[axis], positions[axis]))
+                for axis in kept_axes
+            )
+            block = self.block(src).copy()
+            block[local] = value[value_key]
+            self.store.replace(self.keys[src], block)
+        self._touch()
+
+    def copy(self):
+        return self._map(np.copy)
+
+    def astype(self, dtype):
+        return self._map(operator.methodcaller('astype', dtype))
+
+    def conj(self):
+        return self._map(np.conj)
+
+    def reshape(self, *newshape):
+        if len(newshape) == 1 and isinstance(newshape[0], (tuple, list)):
+            newshape = tuple(newshape[0])
+        if newshape.count(-1) > 1:
+            raise ValueError('at most one -1 can appear in a new shape')
+        newshape = tuple(s if s != -1 else self.size // -chunks_utils.prod(newshape) for s in newshape)
+        if self.size != chunks_utils.prod(newshape):
+            raise ValueError('cannot reshape tensor of size {} into shape {}'.format(self.size, newshape))
+        if newshape == self.shape:
+            return self
+        if not newshape or not self.shape:
+            return self.backend.astensor(self.numpy().reshape(newshape))
+        backend = self.backend
+        # stream the row-major data through slabs along the first axis
+        source = self.rechunk(chunks_utils.slab_chunks(self.shape, self.dtype.itemsize, backend.chunk_bytes))
+        source_bounds = chunks_utils.accumulate(n * chunks_utils.prod(self.shape[1:]) for n in source.chunks[0])
+        chunks = chunks_utils.slab_chunks(newshape, self.dtype.itemsize, backend.chunk_bytes)
+        row_size = chunks_utils.prod(newshape[1:])
+        tasks = []
+        offset = 0
+        for i, rows in enumerate(chunks[0]):
+            start, stop = offset, offset + rows * row_size
+            offset = stop
+            pieces = [
+                ((j,) + (0,) * (source.ndim - 1), max(start, lo) - lo, min(stop, hi) - lo)
+                for j, (lo, hi) in enumerate(zip(source_bounds, source_bounds[1:]))
+                if lo < stop and start < hi
+            ]
+            shape = (rows, *newshape[1:])
+            coord = (i,) + (0,) * (len(newshape) - 1)
+            tasks.append((coord, functools.partial(
+                lambda shape, pieces: (shape, self.dtype, [(source.block(j), lo, hi) for j, lo, hi in pieces]),
+                shape, pieces,
+            )))
+        keys = backend._compute(chunks_utils.assemble_flat, tasks)
+        return ChunkedTensor(newshape, chunks, keys, self.dtype)
+
+    def transpose(self, *axes):
+        if not axes:
+            axes = tuple(reversed(range(self.ndim)))
+        if len(axes) == 1 and isinstance(axes[0], (tuple, list)):
+            axes = tuple(axes[0])
+        if sorted(axes) != list(range(self.ndim)):
+            raise ValueError('axes do not match tensor: {}'.format(axes))
+        tasks = [
+            (tuple(coord[axis] for axis in axes), functools.partial(lambda coord: (self.block(coord), axes), coord))
+            for coord in self.keys
+        ]
+        keys = self.backend._compute(chunks_utils.transpose_block, tasks)
+        shape = tuple(self.shape[axis] for axis in axes)
+        chunks = tuple(self.chunks[axis] for axis in axes)
+        return ChunkedTensor(shape, chunks, keys, self.dtype)
+
+    def rechunk(self, chunks):
+        chunks = tuple(tuple(c) for c in chunks)
+        if chunks == self.chunks:
+            return self
+        offsets = [chunks_utils.accumulate(c) for c in chunks]
+        tasks = []
+        for coord in chunks_utils.grid(chunks):
+            ranges = [(o[i], o[i+1]) for o, i in zip(offsets, coord)]
+            per_axis = [list(chunks_utils.overlaps(old, lo, hi)) for old, (lo, hi) in zip(self.chunks, ranges)]
+            pieces = [
+                (tuple(dest for _, _, dest in choice), tuple(i for i, _, _ in choice), tuple(src for _, src, _ in choice))
+                for choice in _product(per_axis)
+            ]
+            shape = tuple(hi - lo for lo, hi in ranges)
+            tasks.append((coord, functools.partial(
+                lambda shape, pieces: (shape, self.dtype, [(dest, self.block(src), local) for dest, src, local in pieces]),
+                shape, pieces,
+            )))
+        keys = self.backend._compute(chunks_utils.assemble, tasks)
+        return ChunkedTensor(self.shape, chunks, keys, self.dtype)
+
+    def read(self, inds):
+        flat, shape = entries.flatten(inds, self.shape)
+        result = np.empty(flat.shape, dtype=self.dtype)
+        for coord, mask, local in self._locate(flat):
+            result[mask] = self.block(coord)[local]
+        return result.reshape(shape)
+
+    def write(self, inds, vals, accumulate=False):
+        inds, _ = entries.flatten(inds, self.shape)
+        vals = entries.values(vals, inds.size, self.dtype)
+        unique = accumulate and entries.issorted(inds)
+        for coord, mask, local in self._locate(inds):
+            block = self.block(coord).copy()
+            entries.assign(block, local, vals[mask], accumulate, unique)
+            self.store.replace(self.keys[coord], block)
+        self._touch()
+
+    def _locate(self, inds):
+        # the chunks holding the flat indices, with the entries in each and their local indices
+        multi_inds = np.unravel_index(inds, self.shape)
+        offsets = [np.asarray(chunks_utils.accumulate(c)) for c in self.chunks]
+        block_inds = [np.searchsorted(o, i, side='right') - 1 for o, i in zip(offsets, multi_inds)]
+        coords = np.stack(block_inds, axis=-1) if block_inds else np.zeros((len(inds), 0), dtype=int)
+        for coord in set(map(tuple, coords.tolist())):
+            mask = np.all(coords == coord, axis=-1)
+            yield coord, mask, tuple(i[mask] - o[c] for i, o, c in zip(multi_inds, offsets, coord))
+
+    def sum(self, axis=None):
+        return self._reduce(np.sum, np.add, axis)
+
+    def max(self, axis=None):
+        return self._reduce(np.max, np.maximum, axis)
+
+    def min(self, axis=None):
+        return self._reduce(np.min, np.minimum, axis)
+
+    def all(self, axis=None):
+        return self._reduce(np.all, np.logical_and, axis)
+
+    def any(self, axis=None):
+        return self._reduce(np.any, np.logical_or, axis)
+
+    def norm(self):
+        return float(np.sqrt(self._reduce(chunks_utils.squared_norm, np.add, None)))
+
+    def __matmul__(self, other):
+        other = self.backend.astensor(other)
+        subscripts = {
+            (2, 2): 'ij,jk->ik', (2, 1): 'ij,j->i', (1, 2): 'j,jk->k', (1, 1): 'i,i->',
+        }.get((self.ndim, other.ndim))
+        if subscripts is None:
+            raise ValueError('matmul is only supported for vectors and matrices')
+        return self.backend.einsum(subscripts, self, other)
+
+    def __rmatmul__(self, other):
+        return self.backend.astensor(other).__matmul__(self)
+
+    def __imatmul__(self, other):
+        return self._assign(self.__matmul__(other))
+
+    def __getattr__(self, attr):
+        if attr.startswith('__') or attr in ('_shape', 'chunks', 'keys', '_dtype', 'store'):
+            raise AttributeError(attr)
+        wrap = lambda val: self.backend.astensor(val) if isinstance(val, np.ndarray) else val
+        unwrap = lambda val: val._in_core() if isinstance(val, ChunkedTensor) else val
+        try:
+            result = getattr(self._in_core(), attr)
+        except AttributeError as e:
+            raise AttributeError("failed to get '{}' from numpy.ndarray".format(attr)) from e
+        if callable(result):
+            def wrapped_result(*args, **kwargs):
+                unwrapped_args = tuple(unwrap(v) for v in args)
+                unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+                retval = result(*unwrapped_args, **unwrapped_kwargs)
+                if isinstance(retval, tuple):
+                    wrapped_retval = tuple(wrap(v) for v in retval)
+                elif isinstance(retval, list):
+                    wrapped_retval = [wrap(v) for v in retval]
+                elif isinstance(retval, dict):
+                    wrapped_retval = {k: wrap(v) for k, v in retval.items()}
+                else:
+                    wrapped_retval = wrap(retval)
+                return wrapped_retval
+            wrapped_result.__module__ = type(self).__module__
+            wrapped_result.__name__ = attr
+            wrapped_result.__qualname__ = '{}.{}'.format(type(self).__qualname__, attr)
+            return wrapped_result
+        else:
+            return wrap(result)
+
+    def _normalize_key(self, key):
+        # returns one int or positive-step slice per axis, or None for keys that are not basic
+        key = key if isinstance(key, tuple) else (key,)
+        if sum(k is Ellipsis for k in key) > 1:
+            return None
+        if any(k is Ellipsis for k in key):
+            i = next(i for i, k in enumerate(key) if k is Ellipsis)
+            key = key[:i] + (slice(None),) * (self.ndim - len(key) + 1) + key[i+1:]
+        key = key + (slice(None),) * (self.ndim - len(key))
+        if len(key) != self.ndim:
+            return None
+        normalized = []
+        for k, n in zip(key, self.shape):
+            if isinstance(k, (int, np.integer)):
+                k = int(k) + n if k < 0 else int(k)
+                if not 0 <= k < n:
+                    raise IndexError('index {} is out of bounds for axis with size {}'.format(k, n))
+            elif not isinstance(k, slice) or (k.step is not None and k.step <= 0):
+                return None
+            normalized.append(k)
+        return tuple(normalized)
+
+    def _map(self, func, *others):
+        others = [
+            other.rechunk(self.chunks) if isinstance(other, ChunkedTensor) else other
+            for other in others
+        ]
+        tasks = [
+            (coord, functools.partial(
+                lambda coord: (func, self.block(coord), *(other.block(coord) if isinstance(other, ChunkedTensor) else other for other in others)),
+                coord,
+            ))
+            for coord in self.keys
+        ]
+        keys = self.backend._compute(chunks_utils.apply, tasks)
+        dummies = [np.ones(1, dtype=other.dtype) if isinstance(other, ChunkedTensor) else other for other in others]
+        dtype = np.asarray(func(np.ones(1, dtype=self.dtype), *dummies)).dtype
+        return ChunkedTensor(self.shape, self.chunks, keys, dtype)
+
+    def _reduce(self, func, combine, axis):
+        backend = self.backend
+        if axis is None:
+            tasks = [(coord, functools.partial(lambda coord: (func, self.block(coord)), coord)) for coord in self.keys]
+            value = functools.reduce(combine, backend._gather(chunks_utils.apply, tasks))
+            return value.item() if isinstance(value, np.ndarray) else value
+        axis = axis + self.ndim if axis < 0 else axis
+        chunks = self.chunks[:axis] + self.chunks[axis+1:]
+        tasks = []
+        for coord in chunks_utils.grid(chunks):
+            sources = [coord[:axis] + (i,) + coord[axis:] for i in range(len(self.chunks[axis]))]
+            tasks.append((coord, functools.partial(
+                lambda sources: (func, combine, axis, [self.block(src) for src in sources]), sources
+            )))
+        keys = backend._compute(chunks_utils.reduce_blocks, tasks)
+        shape = self.shape[:axis] + self.shape[axis+1:]
+        dtype = np.asarray(func(np.zeros((1,), dtype=self.dtype), axis=0)).dtype
+        return ChunkedTensor(shape, chunks, keys, dtype)
+
+    def _assign(self, other):
+        # takes over the chunks of a freshly computed tensor
+        old_keys = list(self.keys.values())
+        self._shape, self.chunks, self._dtype = other.shape, other.chunks, other.dtype
+        self.keys.clear()
+        self.keys.update(other.keys)
+        other.keys.clear()
+        self.store.delete_many(old_keys)
+        self._touch()
+        return self
+
+
+def _release(store, keys):
+    store.delete_many(list(keys.values()))
+
+def _product(per_axis):
+    return itertools.product(*per_axis)
+
+def _positions(per_axis, choice):
+    return tuple(options.index(item) for options, item in zip(per_axis, choice))
+
+def _span(options, position):
+    start = sum(n for _, _, n in options[:position])
+    return start, start + options[position][2]
+
+
+def add_unary_operators(*operator_names):
+    def add_unary_operator(operator_name):
+        func = getattr(operator, operator_name)
+        def method(self):
+            return self._map(func)
+        method.__module__ = ChunkedTensor.__module__
+        method.__qualname__ = '{}.{}'.format(ChunkedTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(ChunkedTensor, operator_name, method)
+    for op_name in operator_names:
+        add_unary_operator(op_name)
+
+
+def add_binary_operators(*operator_names):
+    def add_binary_operator(operator_name):
+        if operator_name.startswith('__r'):
+            func = functools.partial(chunks_utils.apply_reversed, getattr(operator, '__{}'.format(operator_name[3:])))
+        else:
+            func = getattr(operator, operator_name.replace('__i', '__', 1))
+        def method(self, other):
+            if isinstance(other, np.ndarray):
+                other = self.backend.astensor(other)
+            if isinstance(other, ChunkedTensor) and other.shape != self.shape:
+                result = self.backend.astensor(func(self.numpy(), other.numpy()))
+            else:
+                result = self._map(func, other)
+            if operator_name.startswith('__i'):
+                return self._assign(result)
+            return result
+        method.__module__ = ChunkedTensor.__module__
+        method.__qualname__ = '{}.{}'.format(ChunkedTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(ChunkedTensor, operator_name, method)
+    for op_name in operator_names:
+        add_binary_operator(op_name)
+
+
+add_unary_operators(
+    '__pos__',
+    '__neg__',
+    '__abs__',
+)
+
+add_binary_operators(
+    '__add__',
+    '__sub__',
+    '__mul__',
+    '__truediv__',
+    '__floordiv__',
+    '__pow__',
+
+    '__radd__',
+    '__rsub__',
+    '__rmul__',
+    '__rtruediv__',
+    '__rfloordiv__',
+    '__rpow__',
+
+    '__iadd__',
+    '__isub__',
+    '__imul__',
+    '__itruediv__',
+    '__ifloordiv__',
+    '__ipow__',
+
+    '__lt__',
+    '__le__',
+    '__eq__',
+    '__ne__',
+    '__gt__',
+    '__ge__',
+)
@@ -0,0 +1,125 @@
+"""
+This module implements the chunk store and the local task scheduler of the chunked backend.
+"""
+
+import collections, concurrent.futures, itertools, os, shutil, tempfile, threading
+
+import numpy as np
+
+
+class ChunkStore:
+    def __init__(self, memory_limit=2**30, spill_dir=None):
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self._memory = collections.OrderedDict()
+        self._spilled = {}
+        self._nbytes = 0
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+        self._tempdir = None
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    @property
+    def nspilled(self):
+        return len(self._spilled)
+
+    def put(self, array):
+        with self._lock:
+            key = next(self._counter)
+            self._memory[key] = array
+            self._nbytes += array.nbytes
+            self._evict()
+            return key
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            path = self._spilled.pop(key)
+            array = np.load(path, allow_pickle=False)
+            os.remove(path)
+            self._memory[key] = array
+            self._nbytes += array.nbytes
+            self._evict(keep=key)
+            return array
+
+    def replace(self, key, array):
+        with self._lock:
+            self.delete(key)
+            self._memory[key] = array
+            self._nbytes += array.nbytes
+            self._evict(keep=key)
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._nbytes -= self._memory.pop(key).nbytes
+            elif key in self._spilled:
+                os.remove(self._spilled.pop(key))
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def _evict(self, keep=None):
+        while self.memory_limit is not None and self._nbytes > self.memory_limit and len(self._memory) > 1:
+            key = next(iter(self._memory))
+            if key == keep:
+                self._memory.move_to_end(key)
+                key = next(iter(self._memory))
+            array = self._memory.pop(key)
+            path = os.path.join(self._directory(), '{}.npy'.format(key))
+            with open(path, 'w+b') as file:
+                np.save(file, array, allow_pickle=False)
+            self._spilled[key] = path
+            self._nbytes -= array.nbytes
+
+    def _directory(self):
+        if self.spill_dir is not None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            return self.spill_dir
+        if self._tempdir is None:
+            self._tempdir = tempfile.mkdtemp(prefix='tensorbackends-chunks-')
+        return self._tempdir
+
+    def __del__(self):
+        if self._tempdir is not None:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+
+
+class Scheduler:
+    def __init__(self, max_workers=None, processes=False):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.processes = processes
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            if self.processes:
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def map(self, func, arguments):
+        # at most two tasks per worker are loaded at any time to bound memory usage
+        window = 2 * self.max_workers
+        pending = {}
+        for i, args in enumerate(arguments):
+            if len(pending) >= window:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+            pending[self.executor.submit(func, *args)] = i
+        for future in concurrent.futures.as_completed(list(pending)):
+            yield pending.pop(future), future.result()
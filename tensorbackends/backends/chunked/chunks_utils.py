@@ -0,0 +1,98 @@
+import itertools, functools, operator
+
+import numpy as np
+
+
+def prod(iterable):
+    return functools.reduce(operator.mul, iterable, 1)
+
+def accumulate(iterable):
+    result = [0]
+    for n in iterable:
+        result.append(result[-1] + n)
+    return result
+
+def normalize_chunks(shape, itemsize, chunk_bytes):
+    sizes = list(shape)
+    while prod(sizes) * itemsize > chunk_bytes and any(s > 1 for s in sizes):
+        axis = max(range(len(sizes)), key=lambda i: sizes[i])
+        sizes[axis] = (sizes[axis] + 1) // 2
+    return tuple(split_axis(n, s) for n, s in zip(shape, sizes))
+
+def slab_chunks(shape, itemsize, chunk_bytes):
+    if not shape:
+        return ()
+    row_bytes = prod(shape[1:]) * itemsize
+    rows = max(1, min(shape[0], chunk_bytes // max(row_bytes, 1)))
+    return (split_axis(shape[0], rows), *((n,) for n in shape[1:]))
+
+def split_axis(n, size):
+    if n == 0:
+        return (0,)
+    return tuple(min(size, n - start) for start in range(0, n, size))
+
+def grid(chunks):
+    return itertools.product(*(range(len(c)) for c in chunks))
+
+def block_slices(chunks, coord):
+    offsets = [accumulate(c) for c in chunks]
+    return tuple(slice(o[i], o[i+1]) for o, i in zip(offsets, coord))
+
+def overlaps(old_chunks, start, stop):
+    # yields (block index, local slice, destination slice) of an axis range
+    offset = 0
+    for i, n in enumerate(old_chunks):
+        lo, hi = max(start, offset), min(stop, offset + n)
+        if lo < hi:
+            yield i, slice(lo - offset, hi - offset), slice(lo - start, hi - start)
+        offset += n
+
+def selection(chunks, key):
+    # yields (block index, local key, output length) of an axis for an int or a positive-step slice
+    if isinstance(key, slice):
+        start, stop, step = key.indices(sum(chunks))
+    offset = 0
+    for i, n in enumerate(chunks):
+        if isinstance(key, slice):
+            first = start if start >= offset else start + -(-(offset - start) // step) * step
+            last = min(stop, offset + n)
+            if first < last:
+                yield i, slice(first - offset, last - offset, step), len(range(first, last, step))
+        elif offset <= key < offset + n:
+            yield i, key - offset, None
+        offset += n
+
+
+def einsum_blocks(subscripts, groups):
+    result = None
+    for arrays in groups:
+        value = np.einsum(subscripts, *arrays, optimize='greedy')
+        result = value if result is None else result + value
+    return np.asarray(result)
+
+def assemble(shape, dtype, pieces):
+    result = np.empty(shape, dtype=dtype)
+    for dest, array, src in pieces:
+        result[dest] = array[src]
+    return result
+
+def assemble_flat(shape, dtype, pieces):
+    return np.concatenate([array.reshape(-1)[start:stop] for array, start, stop in pieces]).astype(dtype, copy=False).reshape(shape)
+
+def apply(func, *args):
+    return np.asarray(func(*args))
+
+def apply_reversed(func, a, b):
+    return np.asarray(func(b, a))
+
+def transpose_block(array, axes):
+    return np.ascontiguousarray(array.transpose(*axes))
+
+def select_block(array, key):
+    return np.array(array[key])
+
+def squared_norm(array, axis=None):
+    return np.sum(np.abs(array)**2, axis=axis)
+
+def reduce_blocks(func, combine, axis, arrays):
+    return functools.reduce(combine, (func(array, axis=axis) for array in arrays))
@@ -2,11 +2,13 @@
 This module implements the ctf backend.
 """
 
+import numbers
+
 import ctf
 import numpy as np
 
 from ...interface import Backend
-from ...utils import einstr
+from ...utils import einstr, elementwise
 from .ctf_random import CTFRandom
 from .ctf_tensor import CTFTensor
 
@@ -24,6 +26,10 @@ class CTFBackend(Backend):
     def rank(self):
         return ctf.comm().rank()
 
+    @property
+    def distributed(self):
+        return True
+
     @property
     def random(self):
         return CTFRandom()
@@ -99,11 +105,21 @@ class CTFBackend(Backend):
         a = self._einsum(einsum_expr, operands)
         return self._einsvd_rand(einsvd_expr, a, rank, niter, oversamp)
 
+    def evaluate(self, expression, **operands):
+        tensors = {name: v.tsr for name, v in operands.items() if isinstance(v, self.tensor)}
+        if not tensors or len({tsr.shape for tsr in tensors.values()}) != 1 \
+                or not all(isinstance(v, (self.tensor, numbers.Number)) for v in operands.values()):
+            return super().evaluate(expression, **operands)
+        program = elementwise.parse(expression)
+        scalars = {name: v for name, v in operands.items() if name not in tensors}
+        result = elementwise.evaluate_distributed(program, next(iter(tensors.values())), tensors, scalars, self.nproc, self.rank)
+        return self.tensor(result) if isinstance(result, ctf.tensor) else result
+
     def isclose(self, a, b, *, rtol=1e-9, atol=0.0):
-        return abs(a - b) <= atol + rtol * abs(b)
+        return self.evaluate('abs(a - b) <= atol + rtol * abs(b)', a=a, b=b, rtol=rtol, atol=atol)
 
     def allclose(self, a, b, *, rtol=1e-9, atol=0.0):
-        return self.all(self.isclose(a, b, rtol=rtol, atol=atol))
+        return bool(self.evaluate('all(abs(a - b) <= atol + rtol * abs(b))', a=a, b=b, rtol=rtol, atol=atol))
 
     def inv(self, a):
         u, s, v = self.einsvd('ij->ia,ja', a)
@@ -167,21 +183,44 @@ class CTFBackend(Backend):
         return self.tensor(u), self.tensor(ctf.real(s)), self.tensor(vh)
 
     def _einsvd_rand(self, expr, a, rank, niter, oversamp):
+        # the sketches are contracted with a in its own layout, so only tensors of the size of
+        # the sketches are ever redistributed
         newindex = (expr.output_indices - expr.input_indices).pop()
-        axis_of_index = {index: axis for axis, index in enumerate(expr.inputs[0])}
-        u_axes_from_a = [axis_of_index[index] for index in expr.outputs[0] if index != newindex]
-        vh_axes_from_a = [axis_of_index[index] for index in expr.outputs[1] if index != newindex]
-        # form matrix of a
-        a_matrix_axes = [*u_axes_from_a, *vh_axes_from_a]
-        a_matrix_shape = (np.prod([a.shape[axis] for axis in u_axes_from_a]), -1)
-        a_matrix = a.transpose(*a_matrix_axes).reshape(*a_matrix_shape)
-        u, s, vh = self.rsvd(a_matrix, rank, niter, oversamp)
-        # form u
-        u = u.reshape(*(a.shape[axis] for axis in u_axes_from_a), s.shape[0])
-        u = self.moveaxis(u, -1, expr.outputs[0].find(newindex))
-        u = u.reshape(*expr.outputs[0].newshape(u.shape))
-        # form vh
-        vh = vh.reshape(s.shape[0], *(a.shape[axis] for axis in vh_axes_from_a))
-        vh = self.moveaxis(vh, 0, expr.outputs[1].find(newindex))
-        vh = vh.reshape(*expr.outputs[1].newshape(vh.shape))
-        return u, s, vh
+        sketch_index = expr.nindices
+        shape_of_index = dict(zip(expr.inputs[0], a.shape))
+        u_term = [idx for idx in expr.outputs[0] if idx != newindex]
+        vh_term = [idx for idx in expr.outputs[1] if idx != newindex]
+        u_shape = tuple(shape_of_index[idx] for idx in u_term)
+        vh_shape = tuple(shape_of_index[idx] for idx in vh_term)
+        a_string = expr.inputs[0].indices_string
+        u_string = ''.join(einstr.chars[idx] for idx in u_term)
+        vh_string = ''.join(einstr.chars[idx] for idx in vh_term)
+        r, k = einstr.chars[sketch_index], einstr.chars[newindex]
+        a_tsr = a.tsr
+        iscomplex = np.issubdtype(a.dtype, np.complexfloating)
+        a_conj = ctf.conj(a_tsr) if iscomplex else a_tsr
+        nsketch = min(rank + oversamp, int(np.prod(u_shape)), int(np.prod(vh_shape)))
+        # find subspace
+        q = self.random.uniform(low=-1.0, high=1.0, size=(*vh_shape, nsketch)).tsr.astype(a.dtype)
+        for i in range(niter):
+            y = ctf.einsum('{},{}->{}'.format(a_string, vh_string+r, u_string+r), a_tsr, q)
+            q = ctf.einsum('{},{}->{}'.format(a_string, u_string+r, vh_string+r), a_conj, y)
+            q = self._orthonormalize(q)
+        y = ctf.einsum('{},{}->{}'.format(a_string, vh_string+r, u_string+r), a_tsr, q)
+        q = self._orthonormalize(y)
+        # svd in subspace
+        q_conj = ctf.conj(q) if iscomplex else q
+        a_sub = ctf.einsum('{},{}->{}'.format(u_string+r, a_string, r+vh_string), q_conj, a_tsr)
+        u_sub, s, vh = a_sub.i(r+vh_string).svd(r+k, expr.outputs[1].indices_string, rank=rank)
+        u = ctf.einsum('{},{}->{}'.format(u_string+r, r+k, expr.outputs[0].indices_string), q, u_sub)
+        u_newshape = expr.outputs[0].newshape(u.shape)
+        vh_newshape = expr.outputs[1].newshape(vh.shape)
+        if u_newshape != u.shape: u = u.reshape(*u_newshape)
+        if vh_newshape != vh.shape: vh = vh.reshape(*vh_newshape)
+        return self.tensor(u), self.tensor(ctf.real(s)), self.tensor(vh)
+
+    def _orthonormalize(self, q):
+        # tall-skinny qr of a sketch whose last axis spans the subspace
+        shape = q.shape
+        q, _ = ctf.qr(q.reshape(int(np.prod(shape[:-1])), shape[-1]))
+        return q.reshape(*shape[:-1], q.shape[-1])
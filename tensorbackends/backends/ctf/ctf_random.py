@@ -3,27 +3,69 @@ This module implements the random module for ctf backend.
 """
 
 import ctf
+import numpy as np
 
 from ...interface import Random
+from ...utils import streams
 from .ctf_tensor import CTFTensor
 
 
 class CTFRandom(Random):
+    # values come from counter-based streams indexed by the row-major position of an element,
+    # so they only depend on the seed and are generated locally on every rank
+    _seed = None
+    _counter = 0
+    _order = None
+    tensor = CTFTensor
+
     def seed(self, seed):
         ctf.random.seed(seed)
+        self._seed = seed
+        self._counter = 0
 
-    def random(self, size=None):
-        if size is None:
-            return ctf.random.random(1)[0]
-        else:
-            return CTFTensor(ctf.random.random(size))
+    def random(self, size=None, dtype=float):
+        return self._draw('uniform', size, dtype)
+
+    def uniform(self, low=0.0, high=1.0, size=None, dtype=float):
+        return self._draw('uniform', size, dtype, low=low, high=high)
 
-    def uniform(self, low=0.0, high=1.0, size=None):
+    def normal(self, loc=0.0, scale=1.0, size=None, dtype=float):
+        return self._draw('normal', size, dtype, loc=loc, scale=scale)
+
+    def _draw(self, distribution, size, dtype, **params):
+        key = self._next_key()
         if size is None:
-            tsr = ctf.empty(1)
-            tsr.fill_random(low, high)
-            return tsr[0]
+            return streams.draw(distribution, key, np.zeros(1, dtype=np.uint64), dtype, **params)[0]
+        shape = (size,) if isinstance(size, int) else tuple(size)
+        tsr = ctf.tensor(shape, dtype=dtype)
+        inds, _ = tsr.read_local()
+        positions = inds if self._global_order() == 'C' else np.ravel_multi_index(np.unravel_index(inds, shape, order='F'), shape)
+        tsr.write(inds, streams.draw(distribution, key, positions, dtype, **params))
+        return self.tensor(tsr)
+
+    def _next_key(self):
+        if self._seed is None:
+            self._seed = self._shared_seed()
+        self._counter += 1
+        return streams.key(self._seed, self._counter)
+
+    def _shared_seed(self):
+        # all ranks have to agree on the seed, so the one of rank 0 is shared once
+        tsr = ctf.zeros(1, dtype=np.int64)
+        if ctf.comm().rank() == 0:
+            tsr.write([0], [streams.entropy() >> 1])
         else:
-            tsr = ctf.empty(size)
-            tsr.fill_random(low, high)
-            return CTFTensor(tsr)
+            tsr.write([], [])
+        return int(tsr.read_all()[0])
+
+    def _global_order(self):
+        # the global indices of read_local and write are not necessarily row-major; the order is
+        # found once by writing the entry at global index 1 of a 2x3 tensor
+        if CTFRandom._order is None:
+            tsr = ctf.zeros((2, 3))
+            if ctf.comm().rank() == 0:
+                tsr.write([1], [1.0])
+            else:
+                tsr.write([], [])
+            CTFRandom._order = 'C' if tsr.to_nparray()[0, 1] == 1 else 'F'
+        return CTFRandom._order
@@ -6,6 +6,7 @@ import ctf
 import numpy as np
 
 from ...interface import Tensor
+from ...utils import entries
 
 
 class CTFTensor(Tensor):
@@ -51,6 +52,7 @@ class CTFTensor(Tensor):
 
     def __setitem__(self, key, value):
         self.tsr[key] = value.unwrap() if isinstance(value, CTFTensor) else value
+        self._touch()
 
     def copy(self):
         return CTFTensor(self.tsr.copy())
@@ -58,8 +60,24 @@ class CTFTensor(Tensor):
     def astype(self, dtype):
         return CTFTensor(self.tsr.astype(dtype))
 
-    def write(self, inds, vals):
-        self.tsr.write(inds, vals)
+    def read(self, inds):
+        # collective: every rank reads the entries it asks for
+        flat, shape = entries.flatten(inds, self.shape)
+        return np.asarray(self.tsr.read(flat)).reshape(shape)
+
+    def read_local(self):
+        return self.tsr.read_local()
+
+    def write(self, inds, vals, accumulate=False):
+        # collective: every rank passes only its own entries; accumulating adds them to the
+        # current values as ctf computes b*A[inds] + a*vals
+        flat, _ = entries.flatten(inds, self.shape)
+        vals = entries.values(vals, flat.size, self.dtype)
+        if accumulate:
+            self.tsr.write(flat, vals, a=1, b=1)
+        else:
+            self.tsr.write(flat, vals)
+        self._touch()
 
     def __getattr__(self, attr):
         wrap = lambda val: CTFTensor(val) if isinstance(val, ctf.tensor) else val
@@ -105,9 +123,12 @@ def add_unary_operators(*operator_names):
 def add_binary_operators(*operator_names):
     def add_binary_operator(operator_name):
         def method(self, other):
-            return CTFTensor(getattr(self.tsr, operator_name)(
+            result = CTFTensor(getattr(self.tsr, operator_name)(
                 other.tsr if isinstance(other, CTFTensor) else other
             ))
+            if operator_name.startswith('__i'):
+                self._touch()
+            return result
         method.__module__ = CTFTensor.__module__
         method.__qualname__ = '{}.{}'.format(CTFTensor.__qualname__, operator_name)
         method.__name__ = operator_name
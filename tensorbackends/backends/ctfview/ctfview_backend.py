@@ -2,17 +2,22 @@
 This module implements the ctfview backend.
 """
 
+import collections, numbers
+
 import ctf
 import numpy as np
 
 from ...interface import Backend
-from ...utils import einstr
+from ...utils import einstr, elementwise
 from .ctfview_random import CTFViewRandom
 from .ctfview_tensor import CTFViewTensor
 from . import indices_utils
 
 
 class CTFViewBackend(Backend):
+    # how often einsum ran on views only, split or fused operands, materialized operands or fell back
+    einsum_paths = collections.Counter()
+
     @property
     def name(self):
         return 'ctfview'
@@ -25,6 +30,10 @@ class CTFViewBackend(Backend):
     def rank(self):
         return ctf.comm().rank()
 
+    @property
+    def distributed(self):
+        return True
+
     @property
     def random(self):
         return CTFViewRandom()
@@ -82,12 +91,7 @@ class CTFViewBackend(Backend):
         if not isinstance(a, self.tensor):
             raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
         expr = einstr.parse_einsvd(subscripts, a.ndim)
-        def svd_func(matrix):
-            u, s, vh = self.svd(matrix)
-            if rank is not None and s.shape[0] > rank:
-                u, s, vh = u[:,:rank], s[:rank], vh[:rank,:]
-            return u, s, vh
-        return self._einsvd(expr, a, svd_func)
+        return self._einsvd_reduced(expr, a, rank)
 
     def einsvd_rand(self, subscripts, a, rank, niter=1, oversamp=5):
         if not isinstance(a, self.tensor):
@@ -104,12 +108,7 @@ class CTFViewBackend(Backend):
         expr = einstr.parse_einsumsvd(subscripts, ndims)
         einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
         a = self._einsum(einsum_expr, operands)
-        def svd_func(matrix):
-            u, s, vh = self.svd(matrix)
-            if rank is not None and s.shape[0] > rank:
-                u, s, vh = u[:,:rank], s[:rank], vh[:rank,:]
-            return u, s, vh
-        return self._einsvd(einsvd_expr, a, svd_func)
+        return self._einsvd_reduced(einsvd_expr, a, rank)
 
     def einsumsvd_rand(self, subscripts, *operands, rank, niter=1, oversamp=5):
         if not all(isinstance(operand, self.tensor) for operand in operands):
@@ -122,13 +121,29 @@ class CTFViewBackend(Backend):
             return self.rsvd(matrix, rank, niter, oversamp)
         return self._einsvd(einsvd_expr, a, svd_func)
 
+    def evaluate(self, expression, **operands):
+        tensors = {name: v for name, v in operands.items() if isinstance(v, self.tensor)}
+        if not tensors or not all(isinstance(v, (self.tensor, numbers.Number)) for v in operands.values()):
+            return super().evaluate(expression, **operands)
+        # the other operands are moved into the physical layout of the first one
+        first = next(iter(tensors.values()))
+        first.match_physical()
+        physical = {}
+        for name, tsr in tensors.items():
+            tsr.match_physical()
+            physical[name] = indices_utils.align(tsr._indices, tsr._tsr, first._indices, first._tsr)
+            if physical[name] is None:
+                return super().evaluate(expression, **operands)
+        program = elementwise.parse(expression)
+        scalars = {name: v for name, v in operands.items() if name not in tensors}
+        result = elementwise.evaluate_distributed(program, first._tsr, physical, scalars, self.nproc, self.rank)
+        return self.tensor(result, first._indices) if isinstance(result, ctf.tensor) else result
+
     def isclose(self, a, b, *, rtol=1e-9, atol=0.0):
-        if isinstance(a, self.tensor): a.match_indices()
-        if isinstance(b, self.tensor): b.match_indices()
-        return abs(a - b) <= atol + rtol * abs(b)
+        return self.evaluate('abs(a - b) <= atol + rtol * abs(b)', a=a, b=b, rtol=rtol, atol=atol)
 
     def allclose(self, a, b, *, rtol=1e-9, atol=0.0):
-        return self.all(self.isclose(a, b, rtol=rtol, atol=atol))
+        return bool(self.evaluate('all(abs(a - b) <= atol + rtol * abs(b))', a=a, b=b, rtol=rtol, atol=atol))
 
     def inv(self, a):
         u, s, v = self.einsvd('ij->ia,ja', a)
@@ -151,6 +166,8 @@ class CTFViewBackend(Backend):
             raise AttributeError("failed to get '{}' from ctf".format(attr)) from e
         if callable(result):
             def wrapped_result(*args, **kwargs):
+                if attr in ('conj', 'real', 'imag', 'sum', 'all', 'any') and args and isinstance(args[0], CTFViewTensor):
+                    return getattr(args[0], attr)(*args[1:], **kwargs)
                 unwrapped_args = tuple(unwrap(v) for v in args)
                 unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
                 retval = result(*unwrapped_args, **unwrapped_kwargs)
@@ -171,6 +188,7 @@ class CTFViewBackend(Backend):
             return result
 
     def _einsum(self, expr, operands):
+        operands = self._conform(expr, operands)
         inputs_indices = [operand.indices for operand in operands]
         inputs_shapes = [operand.tsr.shape for operand in operands]
         expanded_expr = indices_utils.expand_einsum(expr, inputs_indices, inputs_shapes)
@@ -182,6 +200,7 @@ class CTFViewBackend(Backend):
             else:
                 return result
         else:
+            self.einsum_paths['fallback'] += 1
             result = ctf.einsum(expr.indices_string, *(operand.unwrap() for operand in operands))
             if isinstance(result, ctf.tensor):
                 newshape = expr.outputs[0].newshape(result.shape)
@@ -189,6 +208,63 @@ class CTFViewBackend(Backend):
             else:
                 return result
 
+    def _conform(self, expr, operands):
+        # only the operands whose index groups disagree with the other operands are touched:
+        # groups are split in place where the shapes refine each other and fused otherwise
+        inputs_group_shapes = [indices_utils.group_shapes(operand.indices, operand.tsr.shape) for operand in operands]
+        targets = indices_utils.conform(expr.inputs, inputs_group_shapes)
+        conformed = []
+        for operand, group_shapes, target in zip(operands, inputs_group_shapes, targets):
+            if group_shapes == target:
+                conformed.append(operand)
+                continue
+            indices, tsr = operand.indices, operand.tsr
+            positions = {g for g, (s, t) in enumerate(zip(group_shapes, target)) if len(s) > 1 and len(t) == 1}
+            if positions:
+                self.einsum_paths['fuse'] += 1
+                indices, tsr = indices_utils.fuse_groups(indices, tsr, positions)
+            if indices_utils.group_shapes(indices, tsr.shape) != target:
+                split = indices_utils.split_groups(indices, tsr, target)
+                if split is None:
+                    # e.g. size-one axes inside a group; a materialized operand splits more freely
+                    self.einsum_paths['materialize'] += 1
+                    tsr = operand.unwrap()
+                    indices = indices_utils.identity(tsr.ndim)
+                    split = indices_utils.split_groups(indices, tsr, target)
+                if split is None:
+                    conformed.append(self.tensor(tsr, indices))
+                    continue
+                self.einsum_paths['split'] += 1
+                indices, splits = split
+                operand = self.tensor(tsr, indices, splits=splits)
+                operand.match_splits()
+                conformed.append(operand)
+            else:
+                conformed.append(self.tensor(tsr, indices))
+        if all(a is b for a, b in zip(conformed, operands)):
+            self.einsum_paths['view'] += 1
+        return conformed
+
+    def _einsvd_reduced(self, expr, a, rank):
+        a.match_physical()
+        expanded_expr = indices_utils.expand_einsum(expr, [a.indices], [a.tsr.shape])
+        if expanded_expr is None:
+            def svd_func(matrix):
+                u, s, vh = self.svd(matrix)
+                if rank is not None and s.shape[0] > rank:
+                    u, s, vh = u[:,:rank], s[:rank], vh[:rank,:]
+                return u, s, vh
+            return self._einsvd(expr, a, svd_func)
+        # the index groups of the view become the matricization of the indexed svd
+        u, s, vh = a.tsr.i(expanded_expr.inputs[0].indices_string).svd(
+            expanded_expr.outputs[0].indices_string,
+            expanded_expr.outputs[1].indices_string,
+            rank=rank,
+        )
+        u = self.tensor(u).reshape(*expanded_expr.outputs[0].newshape(u.shape))
+        vh = self.tensor(vh).reshape(*expanded_expr.outputs[1].newshape(vh.shape))
+        return u, self.tensor(ctf.real(s)), vh
+
     def _einsvd(self, expr, a, svd_func):
         newindex = (expr.output_indices - expr.input_indices).pop()
         axis_of_index = {index: axis for axis, index in enumerate(expr.inputs[0])}
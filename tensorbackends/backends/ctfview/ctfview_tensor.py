@@ -2,17 +2,42 @@
 This module implements the ctfview tensor.
 """
 
+import numbers
+
 import ctf
 import numpy as np
 
 from ...interface import Tensor
+from ...utils import entries
 from . import indices_utils
 
 
 class CTFViewTensor(Tensor):
-    def __init__(self, tsr, indices=None):
-        self.tsr = tsr
-        self.indices = indices_utils.identity(tsr.ndim) if indices is None else indices
+    def __init__(self, tsr, indices=None, selection=None, splits=None):
+        self._tsr = tsr
+        self._indices = indices_utils.identity(tsr.ndim) if indices is None else indices
+        self.selection = selection
+        self.splits = splits
+
+    @property
+    def tsr(self):
+        self.match_physical()
+        return self._tsr
+
+    @tsr.setter
+    def tsr(self, tsr):
+        self.match_physical()
+        self._tsr = tsr
+
+    @property
+    def indices(self):
+        self.match_physical()
+        return self._indices
+
+    @indices.setter
+    def indices(self, indices):
+        self.match_physical()
+        self._indices = indices
 
     @property
     def backend(self):
@@ -21,25 +46,27 @@ class CTFViewTensor(Tensor):
 
     @property
     def shape(self):
-        return indices_utils.shape(self.indices, self.tsr)
+        return indices_utils.shape(self._indices, self._tsr, self.selection, self.splits)
 
     @property
     def ndim(self):
-        return len(self.indices)
+        return len(self._indices)
 
     @property
     def size(self):
-        return self.tsr.size
+        return indices_utils.prod(self.shape)
 
     @property
     def dtype(self):
-        return np.dtype(self.tsr.dtype)
+        return np.dtype(self._tsr.dtype)
 
     def unwrap(self):
         self.match_indices()
         return self.tsr
 
     def numpy(self):
+        if self.selection is not None:
+            return indices_utils.read_selection(self._indices, self.selection, self._tsr)
         return self.unwrap().to_nparray()
 
     def __repr__(self):
@@ -51,6 +78,12 @@ class CTFViewTensor(Tensor):
         return str(self.tsr)
 
     def __getitem__(self, key):
+        self.match_splits()
+        selected = indices_utils.select(self._indices, self.selection, self._tsr, key)
+        if selected is not None and not selected[0]:
+            return indices_utils.read_selection(*selected, self._tsr).item()
+        elif selected is not None:
+            return CTFViewTensor(self._tsr, *selected)
         self.match_indices()
         value = self.tsr[key]
         return CTFViewTensor(value) if isinstance(value, ctf.tensor) else value
@@ -58,6 +91,7 @@ class CTFViewTensor(Tensor):
     def __setitem__(self, key, value):
         self.match_indices()
         self.tsr[key] = value.unwrap() if isinstance(value, CTFViewTensor) else value
+        self._touch()
 
     def copy(self):
         return CTFViewTensor(self.tsr.copy(), self.indices)
@@ -71,39 +105,58 @@ class CTFViewTensor(Tensor):
         newshape = tuple(s if s != -1 else self.size // -indices_utils.prod(newshape) for s in newshape)
         if self.size != indices_utils.prod(newshape):
             raise ValueError('cannot reshape tensor of size {} into shape {}'.format(self.size, newshape))
-        axes = indices_utils.flatten(self.indices)
-        oldshape = tuple(self.tsr.shape[axis] for axis in axes)
-        need_true_reshape = False
-        groups = []
-        start, end = 0, None
-        for s in newshape:
-            if start >= len(oldshape) and s == 1:
-                groups.append(tuple())
-            else: # start < len(oldshape)
-                fused_size = oldshape[start]
-                end = start + 1
-                while fused_size < s or end < len(oldshape) and oldshape[end] == 1:
-                    fused_size *= oldshape[end]
-                    end += 1
-                if fused_size > s:
-                    need_true_reshape = True
-                    break
-                groups.append(tuple(axes[start:end]))
-                start = end
-        if need_true_reshape:
-            self.match_axes()
-            return CTFViewTensor(self.tsr.reshape(*newshape))
-        else:
-            return CTFViewTensor(self.tsr, tuple(groups))
+        self.match_selection()
+        axes = indices_utils.flatten(self._indices)
+        vshape = indices_utils.virtual_shape(self._tsr, self.splits)
+        groups = indices_utils.fuse(axes, tuple(vshape[axis] for axis in axes), newshape)
+        if groups is not None:
+            indices, splits = indices_utils.simplify(groups, self.splits)
+            return CTFViewTensor(self._tsr, indices, splits=splits)
+        split = indices_utils.split(self._indices, self._tsr, self.splits, newshape)
+        if split is not None:
+            indices, splits = split
+            return CTFViewTensor(self._tsr, indices, splits=splits)
+        self.match_axes()
+        return CTFViewTensor(self.tsr.reshape(*newshape))
 
     def transpose(self, *axes):
         if len(axes) != self.ndim:
             raise ValueError('axes number do not match ndim: {} != {}'.format(len(axes), self.ndim))
-        return CTFViewTensor(self.tsr, indices_utils.permute(self.indices, axes))
+        return CTFViewTensor(self._tsr, indices_utils.permute(self._indices, axes), self.selection, self.splits)
 
-    def write(self, inds, vals):
+    def read(self, inds):
         self.match_indices()
-        self.tsr.write(inds, vals)
+        flat, shape = entries.flatten(inds, self.shape)
+        return np.asarray(self.tsr.read(flat)).reshape(shape)
+
+    def read_local(self):
+        self.match_indices()
+        return self.tsr.read_local()
+
+    def write(self, inds, vals, accumulate=False):
+        self.match_indices()
+        flat, _ = entries.flatten(inds, self.shape)
+        vals = entries.values(vals, flat.size, self.dtype)
+        if accumulate:
+            self.tsr.write(flat, vals, a=1, b=1)
+        else:
+            self.tsr.write(flat, vals)
+        self._touch()
+
+    def match_physical(self):
+        self.match_selection()
+        self.match_splits()
+
+    def match_splits(self):
+        # splits only refine physical axes in place, so no transpose is needed
+        if self.splits is not None:
+            self._tsr = self._tsr.reshape(*indices_utils.virtual_shape(self._tsr, self.splits))
+            self.splits = None
+
+    def match_selection(self):
+        if self.selection is not None:
+            self._indices, self._tsr = indices_utils.apply_selection(self._indices, self.selection, self._tsr)
+            self.selection = None
 
     def match_indices(self):
         self.indices, self.tsr = indices_utils.apply(self.indices, self.tsr)
@@ -111,7 +164,38 @@ class CTFViewTensor(Tensor):
     def match_axes(self):
         self.indices, self.tsr = indices_utils.apply_transpose(self.indices, self.tsr)
 
+    def _elementwise(self, operator_name, other):
+        # runs on the physical tensors, moving at most one operand into the layout of the other
+        inplace = operator_name.startswith('__i')
+        self.match_physical()
+        if isinstance(other, numbers.Number):
+            indices, a, b = self._indices, self._tsr, other
+        elif isinstance(other, CTFViewTensor):
+            other.match_physical()
+            moved_other = indices_utils.align(other._indices, other._tsr, self._indices, self._tsr)
+            moved_self = None
+            if moved_other is None and not inplace:
+                moved_self = indices_utils.align(self._indices, self._tsr, other._indices, other._tsr)
+            if moved_other is not None:
+                indices, a, b = self._indices, self._tsr, moved_other
+            elif moved_self is not None:
+                indices, a, b = other._indices, moved_self, other._tsr
+            else:
+                return None
+        else:
+            return None
+        if inplace and not indices_utils.is_identity(self._indices, self._tsr):
+            # other views may share the physical tensor, so it is replaced rather than updated
+            self._tsr = getattr(a, '__' + operator_name[3:])(b)
+            return self
+        elif inplace:
+            getattr(a, operator_name)(b)
+            return self
+        return CTFViewTensor(getattr(a, operator_name)(b), indices)
+
     def __getattr__(self, attr):
+        if attr in ('_tsr', '_indices', 'selection', 'splits'):
+            raise AttributeError(attr)
         wrap = lambda val: CTFViewTensor(val) if isinstance(val, ctf.tensor) else val
         unwrap = lambda val: val.unwrap() if isinstance(val, CTFViewTensor) else val
         self.match_indices()
@@ -144,8 +228,8 @@ class CTFViewTensor(Tensor):
 def add_unary_operators(*operator_names):
     def add_unary_operator(operator_name):
         def method(self):
-            self.match_indices()
-            return CTFViewTensor(getattr(self.tsr, operator_name)())
+            self.match_physical()
+            return CTFViewTensor(getattr(self._tsr, operator_name)(), self._indices)
         method.__module__ = CTFViewTensor.__module__
         method.__qualname__ = '{}.{}'.format(CTFViewTensor.__qualname__, operator_name)
         method.__name__ = operator_name
@@ -154,15 +238,73 @@ def add_unary_operators(*operator_names):
         add_unary_operator(op_name)
 
 
+def add_layout_free_methods(*method_names):
+    def add_layout_free_method(method_name):
+        # elementwise maps and full reductions do not depend on the layout, so the view is kept
+        def method(self, *args, **kwargs):
+            self.match_physical()
+            result = getattr(self._tsr, method_name)(*args, **kwargs)
+            if isinstance(result, ctf.tensor) and result.shape == self._tsr.shape:
+                return CTFViewTensor(result, self._indices)
+            return CTFViewTensor(result) if isinstance(result, ctf.tensor) else result
+        method.__module__ = CTFViewTensor.__module__
+        method.__qualname__ = '{}.{}'.format(CTFViewTensor.__qualname__, method_name)
+        method.__name__ = method_name
+        setattr(CTFViewTensor, method_name, method)
+    for method_name in method_names:
+        add_layout_free_method(method_name)
+
+
+def add_reduction_methods(*method_names):
+    def add_reduction_method(method_name):
+        # logical axes are reduced over the physical axes of their groups
+        def method(self, axis=None, keepdims=False, **kwargs):
+            if keepdims:
+                kwargs['keepdims'] = keepdims
+            if kwargs.get('out') is not None:
+                return CTFViewTensor.__getattr__(self, method_name)(axis=axis, **kwargs)
+            kwargs.pop('keepdims', None)
+            self.match_physical()
+            axes = indices_utils.normalize_axes(axis, self.ndim) if axis is not None else tuple(range(self.ndim))
+            physical, indices = indices_utils.reduce(self._indices, self._tsr, axes, keepdims)
+            if len(axes) == self.ndim:
+                result = getattr(self._tsr, method_name)(**kwargs)
+                if isinstance(result, ctf.tensor) and result.ndim == 0:
+                    result = result.item()
+                return CTFViewTensor(ctf.astensor(result), indices) if keepdims else result
+            if not physical:
+                if keepdims:
+                    kwargs['keepdims'] = keepdims
+                return CTFViewTensor.__getattr__(self, method_name)(axis=axis, **kwargs)
+            result = getattr(self._tsr, method_name)(axis=physical, **kwargs)
+            return CTFViewTensor(result, indices)
+        method.__module__ = CTFViewTensor.__module__
+        method.__qualname__ = '{}.{}'.format(CTFViewTensor.__qualname__, method_name)
+        method.__name__ = method_name
+        setattr(CTFViewTensor, method_name, method)
+    for method_name in method_names:
+        add_reduction_method(method_name)
+
+
 def add_binary_operators(*operator_names):
     def add_binary_operator(operator_name):
         def method(self, other):
+            result = None
+            if operator_name not in ('__matmul__', '__rmatmul__', '__imatmul__'):
+                result = self._elementwise(operator_name, other)
+            if result is not None:
+                if operator_name.startswith('__i'):
+                    self._touch()
+                return result
             self.match_indices()
             if isinstance(other, CTFViewTensor):
                 other.match_indices()
-                return CTFViewTensor(getattr(self.tsr, operator_name)(other.tsr))
+                result = CTFViewTensor(getattr(self.tsr, operator_name)(other.tsr))
             else:
-                return CTFViewTensor(getattr(self.tsr, operator_name)(other))
+                result = CTFViewTensor(getattr(self.tsr, operator_name)(other))
+            if operator_name.startswith('__i'):
+                self._touch()
+            return result
         method.__module__ = CTFViewTensor.__module__
         method.__qualname__ = '{}.{}'.format(CTFViewTensor.__qualname__, operator_name)
         method.__name__ = operator_name
@@ -209,3 +351,18 @@ add_binary_operators(
     '__gt__',
     '__ge__',
 )
+
+add_layout_free_methods(
+    'conj',
+    'real',
+    'imag',
+    'norm1',
+    'norm2',
+    'norm_infty',
+)
+
+add_reduction_methods(
+    'sum',
+    'all',
+    'any',
+)
@@ -1,4 +1,6 @@
-import itertools, functools, operator
+import itertools, functools, numbers, operator
+
+import numpy as np
 
 from ...utils import einstr
 
@@ -6,8 +8,15 @@ from ...utils import einstr
 def identity(ndim):
     return tuple((i,) for i in range(ndim))
 
-def shape(indices, tsr):
-    return tuple(prod(tsr.shape[i] for i in group) for group in indices)
+def shape(indices, tsr, selection=None, splits=None):
+    if selection is not None:
+        sizes = tuple(len(r) if isinstance(r, range) else 1 for r in selection)
+    else:
+        sizes = virtual_shape(tsr, splits)
+    return tuple(prod(sizes[i] for i in group) for group in indices)
+
+def virtual_shape(tsr, splits):
+    return tsr.shape if splits is None else tuple(itertools.chain(*splits))
 
 def permute(indices, permutation):
     return tuple(indices[i] for i in permutation)
@@ -34,6 +43,280 @@ def apply(indices, tsr):
         tsr = tsr.reshape(*newshape)
     return identity(tsr.ndim), tsr
 
+def select(indices, selection, tsr, key):
+    # records a basic index on the physical axes, or returns None if it needs the logical layout
+    if not isinstance(key, tuple):
+        key = (key,)
+    if len(key) > len(indices) or not all(isinstance(k, slice) or is_integer(k) for k in key):
+        return None
+    key = key + (slice(None),) * (len(indices) - len(key))
+    selection = list(selection if selection is not None else (range(n) for n in tsr.shape))
+    newindices = []
+    for group, k in zip(indices, key):
+        sizes = tuple(len(selection[axis]) for axis in group)
+        n = prod(sizes)
+        if isinstance(k, slice) and k.indices(n) == (0, n, 1):
+            newindices.append(group)
+        elif isinstance(k, slice):
+            if len(group) != 1:
+                return None
+            r = selection[group[0]][k]
+            if r.step < 0:
+                return None
+            selection[group[0]] = r
+            newindices.append(group)
+        else:
+            if not -n <= k < n:
+                raise IndexError('index {} is out of bounds for axis with size {}'.format(k, n))
+            for axis, i in zip(group, np.unravel_index(int(k) % n, sizes) if group else ()):
+                selection[axis] = selection[axis][int(i)]
+    return tuple(newindices), tuple(selection)
+
+def apply_selection(indices, selection, tsr):
+    if selection is None:
+        return indices, tsr
+    if selection != tuple(range(n) for n in tsr.shape):
+        tsr = tsr[tuple(slice(r.start, r.stop, r.step) if isinstance(r, range) else r for r in selection)]
+    kept = {axis: i for i, axis in enumerate(a for a, r in enumerate(selection) if isinstance(r, range))}
+    return tuple(tuple(kept[axis] for axis in group) for group in indices), tsr
+
+def read_selection(indices, selection, tsr):
+    # reads just the selected elements and arranges them in the logical layout locally
+    axes = [np.asarray(r) if isinstance(r, range) else np.asarray([r]) for r in selection]
+    inds = np.ravel_multi_index(np.ix_(*axes), tsr.shape).reshape(-1)
+    values = np.asarray(tsr.read(inds)).reshape(tuple(len(r) for r in selection if isinstance(r, range)))
+    kept = {axis: i for i, axis in enumerate(a for a, r in enumerate(selection) if isinstance(r, range))}
+    newindices = tuple(tuple(kept[axis] for axis in group) for group in indices)
+    values = values.transpose(*flatten(newindices))
+    return values.reshape(shape(indices, tsr, selection))
+
+def fuse(axes, oldshape, newshape):
+    # groups consecutive axes into the new shape, or returns None if an axis has to be split
+    groups = []
+    start, end = 0, None
+    for s in newshape:
+        if start >= len(oldshape) and s == 1:
+            groups.append(tuple())
+        else: # start < len(oldshape)
+            fused_size = oldshape[start]
+            end = start + 1
+            while fused_size < s or end < len(oldshape) and oldshape[end] == 1:
+                fused_size *= oldshape[end]
+                end += 1
+            if fused_size > s:
+                return None
+            groups.append(tuple(axes[start:end]))
+            start = end
+    return tuple(groups)
+
+def refine(oldshape, newshape):
+    # factors each old dimension so that every new dimension is a run of consecutive factors
+    if 0 in oldshape or 0 in newshape:
+        return None
+    factors, groups = [[] for _ in oldshape], [[] for _ in newshape]
+    i, j = 0, 0
+    rest_old = oldshape[0] if oldshape else 1
+    rest_new = newshape[0] if newshape else 1
+    def take(n):
+        factors[i].append(n)
+        groups[j].append((i, len(factors[i]) - 1))
+    while i < len(oldshape) and j < len(newshape):
+        if rest_new == 1:
+            j += 1
+            rest_new = newshape[j] if j < len(newshape) else 1
+        elif rest_old == 1 and oldshape[i] == 1:
+            take(1)
+            i += 1
+            rest_old = oldshape[i] if i < len(oldshape) else 1
+        elif rest_old % rest_new == 0:
+            take(rest_new)
+            rest_old //= rest_new
+            j += 1
+            rest_new = newshape[j] if j < len(newshape) else 1
+            if rest_old == 1:
+                i += 1
+                rest_old = oldshape[i] if i < len(oldshape) else 1
+        elif rest_new % rest_old == 0:
+            take(rest_old)
+            rest_new //= rest_old
+            i += 1
+            rest_old = oldshape[i] if i < len(oldshape) else 1
+        else:
+            return None
+    if i < len(oldshape):
+        if any(n != 1 for n in oldshape[i:]) or not any(groups):
+            return None
+        last = max(k for k, group in enumerate(groups) if group)
+        for i in range(i, len(oldshape)):
+            factors[i].append(1)
+            groups[last].append((i, 0))
+    return factors, groups
+
+def split(indices, tsr, splits, newshape):
+    # expresses the new shape on a finer factorization of the physical axes
+    axes = flatten(indices)
+    vshape = virtual_shape(tsr, splits)
+    refined = refine(tuple(vshape[axis] for axis in axes), newshape)
+    if refined is None:
+        return None
+    factors, groups = refined
+    factors_of_axis = {axis: factors[t] for t, axis in enumerate(axes)}
+    splits = splits if splits is not None else tuple((n,) for n in tsr.shape)
+    newsplits, newaxis, v = [], {}, 0
+    for sizes in splits:
+        newsizes = []
+        for _ in sizes:
+            for k, n in enumerate(factors_of_axis[v]):
+                newaxis[v, k] = len(newaxis)
+                newsizes.append(n)
+            v += 1
+        newsplits.append(tuple(newsizes))
+    newindices = tuple(tuple(newaxis[axes[t], k] for t, k in group) for group in groups)
+    return simplify(newindices, tuple(newsplits))
+
+def simplify(indices, splits):
+    # merges the factors of a physical axis again when they stay together in one group
+    if splits is None:
+        return indices, None
+    starts = accumulate(len(sizes) for sizes in splits)
+    group_of = {axis: (g, k) for g, group in enumerate(indices) for k, axis in enumerate(group)}
+    newsplits, mapping = [], {}
+    for sizes, start, end in zip(splits, starts, starts[1:]):
+        g, k = group_of[start]
+        offset = sum(len(newsizes) for newsizes in newsplits)
+        if len(sizes) > 1 and indices[g][k:k+len(sizes)] == tuple(range(start, end)):
+            newsplits.append((prod(sizes),))
+            mapping.update((axis, offset) for axis in range(start, end))
+        else:
+            newsplits.append(tuple(sizes))
+            mapping.update((axis, offset + i) for i, axis in enumerate(range(start, end)))
+    newindices = tuple(tuple(unique(mapping[axis] for axis in group)) for group in indices)
+    if all(len(sizes) == 1 for sizes in newsplits):
+        return newindices, None
+    return newindices, tuple(newsplits)
+
+def unique(iterable):
+    result = []
+    for item in iterable:
+        if not result or result[-1] != item:
+            result.append(item)
+    return result
+
+def group_shapes(indices, shape):
+    return tuple(tuple(shape[axis] for axis in group) for group in indices)
+
+def common_refinement(shapes):
+    # the coarsest factorization that refines every given shape of an index, or None
+    if any(0 in s for s in shapes):
+        return None
+    cuts = set()
+    for s in shapes:
+        n = 1
+        for size in s:
+            n *= size
+            cuts.add(n)
+    result, last = [], 1
+    for cut in sorted(cuts):
+        if cut % last != 0:
+            return None
+        if cut != last:
+            result.append(cut // last)
+        last = cut
+    return tuple(result)
+
+def conform(terms, inputs_group_shapes):
+    # picks for every group a target shape shared by all operands: the common refinement of
+    # the groups of an index if there is one, and a single fused axis otherwise
+    shapes_of_index = {}
+    for term, group_shapes in zip(terms, inputs_group_shapes):
+        for idx, s in zip(term, group_shapes):
+            shapes_of_index.setdefault(idx, set()).add(s)
+    target_of_index = {}
+    for idx, shapes in shapes_of_index.items():
+        if len(shapes) == 1:
+            target_of_index[idx] = next(iter(shapes))
+        else:
+            refined = common_refinement(shapes)
+            target_of_index[idx] = refined if refined is not None else (prod(next(iter(shapes))),)
+    return [tuple(target_of_index[idx] for idx in term) for term in terms]
+
+def fuse_groups(indices, tsr, positions):
+    # lays out each of the given groups as one physical axis and keeps the other axes as they are
+    group_of = {axis: g for g, group in enumerate(indices) for axis in group}
+    runs, run_of_group = [], {}
+    for axis in range(tsr.ndim):
+        g = group_of.get(axis)
+        if g in positions:
+            if g not in run_of_group:
+                run_of_group[g] = len(runs)
+                runs.append(indices[g])
+        else:
+            runs.append((axis,))
+    axes = flatten(runs)
+    if axes != tuple(range(tsr.ndim)):
+        tsr = tsr.transpose(*axes)
+    steps = accumulate(len(run) for run in runs)
+    newshape = tuple(prod(tsr.shape[start:end]) for start, end in zip(steps, steps[1:]))
+    if newshape != tsr.shape:
+        tsr = tsr.reshape(*newshape)
+    newaxis = {run[0]: i for i, run in enumerate(runs) if len(run) == 1}
+    newindices = tuple(
+        (run_of_group[g],) if g in run_of_group else tuple(newaxis[axis] for axis in group)
+        for g, group in enumerate(indices)
+    )
+    return newindices, tsr
+
+def split_groups(indices, tsr, targets):
+    # splits physical axes in place so that every group gets its target shape, or returns None
+    flat_target = tuple(itertools.chain(*targets))
+    result = split(indices, tsr, None, flat_target)
+    if result is None:
+        return None
+    newindices, splits = result
+    steps = accumulate(len(target) for target in targets)
+    newindices = tuple(flatten(newindices[start:end]) for start, end in zip(steps, steps[1:]))
+    if group_shapes(newindices, virtual_shape(tsr, splits)) != tuple(targets):
+        return None
+    return newindices, splits
+
+def normalize_axes(axis, ndim):
+    axes = (axis,) if is_integer(axis) else tuple(axis)
+    for a in axes:
+        if not -ndim <= a < ndim:
+            raise ValueError('axis {} is out of bounds for tensor of dimension {}'.format(a, ndim))
+    return tuple(sorted(set(a % ndim for a in axes)))
+
+def reduce(indices, tsr, axes, keepdims=False):
+    # the physical axes behind the reduced logical axes and the groups left over them
+    physical = tuple(sorted(flatten(indices[a] for a in axes)))
+    kept = {axis: i for i, axis in enumerate(a for a in range(tsr.ndim) if a not in physical)}
+    newindices = tuple(
+        () if a in axes else tuple(kept[axis] for axis in group)
+        for a, group in enumerate(indices) if keepdims or a not in axes
+    )
+    return physical, newindices
+
+def is_identity(indices, tsr):
+    return indices == identity(tsr.ndim)
+
+def align(src_indices, src_tsr, dst_indices, dst_tsr):
+    # lays out src like the physical tensor of dst with one transpose, or returns None
+    if len(src_indices) != len(dst_indices):
+        return None
+    position = {}
+    for group, src_group, dst_group in zip(range(len(dst_indices)), src_indices, dst_indices):
+        if tuple(src_tsr.shape[axis] for axis in src_group) != tuple(dst_tsr.shape[axis] for axis in dst_group):
+            return None
+        for j, axis in enumerate(dst_group):
+            position[axis] = src_group[j]
+    if len(position) != dst_tsr.ndim or src_tsr.ndim != dst_tsr.ndim:
+        return None
+    axes = tuple(position[axis] for axis in range(dst_tsr.ndim))
+    return src_tsr if axes == tuple(range(src_tsr.ndim)) else src_tsr.transpose(*axes)
+
+def is_integer(value):
+    return isinstance(value, numbers.Integral) and not isinstance(value, bool)
+
 def expand_einsum(expr, inputs_indices, inputs_shapes):
     index_mappping = {}
     shape_of_index = {}
@@ -70,6 +353,8 @@ def expand_einsum(expr, inputs_indices, inputs_shapes):
         def add_term_indices(idx_start, idx_end, fusing=False):
             nonlocal offset
             for j in range(idx_start, idx_end):
+                if term.indices[j] not in index_mappping:
+                    index_mappping[term.indices[j]] = fresh(1)
                 mapped_index = index_mappping[term.indices[j]]
                 new_term_indices.extend(mapped_index)
                 if not fusing:
@@ -91,8 +376,8 @@ def expand_einsum(expr, inputs_indices, inputs_shapes):
         new_input_term = expand_input_term(term, indices, shape)
         if new_input_term is None: return None
         newinputs.append(new_input_term)
+    newoutputs = [expand_output_term(term) for term in expr.outputs]
     if nindices > len(einstr.chars): return None
-    newoutputs = [expand_output_term(expr.outputs[0])]
     return einstr.Expression(newinputs, newoutputs, source=expr.source)
 
 def prod(iterable):
@@ -0,0 +1,2 @@
+from .lazy_backend import LazyBackend
+from .lazy_tensor import LazyTensor
@@ -0,0 +1,108 @@
+import numbers
+
+from ...utils import einstr
+
+
+SCALAR_OPERATORS = ('__mul__', '__rmul__', '__truediv__')
+
+
+def evaluate(root):
+    # evaluates the nodes reachable from root in post order without recursion
+    plans = {}
+    stack = [(root, False)]
+    while stack:
+        node, ready = stack.pop()
+        if node.value is not None:
+            continue
+        if ready:
+            plan, dependencies = plans.pop(node)
+            node.materialize(plan(*(dep.value for dep in dependencies)))
+            continue
+        plan, dependencies = make_plan(node)
+        plans[node] = (plan, dependencies)
+        stack.append((node, True))
+        stack.extend((dep, False) for dep in dependencies if dep.value is None)
+    return root.value
+
+
+def make_plan(node):
+    if node.op == 'einsum':
+        plan = plan_einsum(node, inline=True)
+        if plan is None:
+            plan = plan_einsum(node, inline=False)
+        return plan
+    dependencies = [arg for arg in node.args if is_node(arg)]
+    def plan(*values):
+        values = iter(values)
+        args = [next(values) if is_node(arg) else arg for arg in node.args]
+        return node.compute(*args)
+    return plan, dependencies
+
+
+def plan_einsum(node, inline):
+    leaves, terms = [], []
+    scale = node.params['scale']
+    nindices = node.params['expr'].nindices
+
+    def fresh():
+        nonlocal nindices
+        nindices += 1
+        return nindices - 1
+
+    def expand(child, term):
+        nonlocal scale
+        while child.value is None:
+            if child.op == 'binary' and child.params['name'] in SCALAR_OPERATORS and is_scalar(child.args[1]):
+                factor = child.args[1]
+                scale = scale / factor if child.params['name'] == '__truediv__' else scale * factor
+                child = child.args[0]
+            elif child.op == 'unary' and child.params['name'] == '__neg__':
+                scale = -scale
+                child = child.args[0]
+            elif child.op == 'unary' and child.params['name'] == '__pos__':
+                child = child.args[0]
+            elif child.op == 'transpose':
+                newterm = [None] * len(term)
+                for k, axis in enumerate(child.params['axes']):
+                    newterm[axis] = term[k]
+                term = newterm
+                child = child.args[0]
+            elif (inline and child.op == 'einsum' and len(child.parents) <= 1
+                    and not child.params['expr'].outputs[0].fusing and len(set(term)) == len(term)):
+                child_expr = child.params['expr']
+                mapping = dict(zip(child_expr.outputs[0], term))
+                scale = scale * child.params['scale']
+                for grandchild, child_term in zip(child.args, child_expr.inputs):
+                    expand(grandchild, [mapping[idx] if idx in mapping else mapping.setdefault(idx, fresh()) for idx in child_term])
+                return
+            else:
+                break
+        leaves.append(child)
+        terms.append(term)
+
+    for child, term in zip(node.args, node.params['expr'].inputs):
+        expand(child, list(term))
+    output = node.params['expr'].outputs[0]
+    renumber = {}
+    for idx in [*(idx for term in terms for idx in term), *output]:
+        renumber.setdefault(idx, len(renumber))
+    if len(renumber) > len(einstr.chars):
+        return None
+    expr = einstr.Expression(
+        [einstr.InputTerm([renumber[idx] for idx in term], '') for term in terms],
+        [einstr.OutputTerm([renumber[idx] for idx in output], output.fusing, '')],
+    )
+    subscripts = str(expr)
+    backend = node.backend.base
+    def plan(*values):
+        result = backend.einsum(subscripts, *values)
+        return result * scale if scale != 1 else result
+    return plan, leaves
+
+
+def is_node(value):
+    from .lazy_tensor import LazyTensor
+    return isinstance(value, LazyTensor)
+
+def is_scalar(value):
+    return isinstance(value, numbers.Number)
@@ -0,0 +1,169 @@
+"""
+This module implements the lazy backend.
+"""
+
+import numpy as np
+
+from ...interface import Backend
+from ...utils import einstr
+from .lazy_random import LazyRandom
+from .lazy_tensor import LazyTensor, wrap, unwrap
+
+
+class LazyBackend(Backend):
+    _instances = {}
+    def __new__(cls, base='numpy'):
+        from .. import get
+        base = get(base)
+        if isinstance(base, LazyBackend):
+            raise ValueError('lazy backend cannot wrap another lazy backend: {}'.format(base.name))
+        if base.name not in cls._instances:
+            instance = object.__new__(cls)
+            instance.base = base
+            cls._instances[base.name] = instance
+        return cls._instances[base.name]
+
+    @property
+    def name(self):
+        return 'lazy-{}'.format(self.base.name)
+
+    @property
+    def nproc(self):
+        return self.base.nproc
+
+    @property
+    def rank(self):
+        return self.base.rank
+
+    @property
+    def distributed(self):
+        return self.base.distributed
+
+    @property
+    def random(self):
+        return LazyRandom(self)
+
+    @property
+    def tensor(self):
+        return LazyTensor
+
+    def astensor(self, obj, dtype=None):
+        if isinstance(obj, self.tensor) and dtype is None:
+            return obj
+        elif isinstance(obj, self.tensor) and dtype is not None:
+            return obj.astype(dtype)
+        else:
+            return LazyTensor.leaf(self, self.base.astensor(obj, dtype))
+
+    def empty(self, shape, dtype=float):
+        return LazyTensor.leaf(self, self.base.empty(shape, dtype=dtype))
+
+    def zeros(self, shape, dtype=float):
+        return LazyTensor.leaf(self, self.base.zeros(shape, dtype=dtype))
+
+    def ones(self, shape, dtype=float):
+        return LazyTensor.leaf(self, self.base.ones(shape, dtype=dtype))
+
+    def shape(self, a):
+        return a.shape
+
+    def ndim(self, a):
+        return a.ndim
+
+    def copy(self, a):
+        return a.copy()
+
+    def save(self, tsr, filename):
+        self.base.save(unwrap(tsr), filename)
+
+    def load(self, filename):
+        return LazyTensor.leaf(self, self.base.load(filename))
+
+    def evaluate(self, *tensors, **operands):
+        if tensors and isinstance(tensors[0], str):
+            # elementwise expressions run fused on the base backend
+            operands = {name: unwrap(v) for name, v in operands.items()}
+            return wrap(self, self.base.evaluate(*tensors, **operands))
+        for tsr in tensors:
+            tsr.evaluate()
+        return tensors[0] if len(tensors) == 1 else tensors
+
+    def einsum(self, subscripts, *operands):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsum(subscripts, ndims)
+        return self._einsum(expr, operands)
+
+    def einsvd_reduced(self, subscripts, a, rank=None):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        return wrap(self, self.base.einsvd_reduced(subscripts, unwrap(a), rank=rank))
+
+    def einsvd_rand(self, subscripts, a, rank, niter=1, oversamp=5):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        return wrap(self, self.base.einsvd_rand(subscripts, unwrap(a), rank=rank, niter=niter, oversamp=oversamp))
+
+    def einsumsvd_reduced(self, subscripts, *operands, rank=None):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        return self.einsvd_reduced(str(einsvd_expr), a, rank=rank)
+
+    def einsumsvd_rand(self, subscripts, *operands, rank, niter=1, oversamp=5):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        return self.einsvd_rand(str(einsvd_expr), a, rank=rank, niter=niter, oversamp=oversamp)
+
+    def isclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        return wrap(self, self.base.isclose(unwrap(a), unwrap(b), rtol=rtol, atol=atol))
+
+    def allclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        return self.base.allclose(unwrap(a), unwrap(b), rtol=rtol, atol=atol)
+
+    def inv(self, a):
+        return wrap(self, self.base.inv(unwrap(a)))
+
+    def svd(self, a):
+        return wrap(self, self.base.svd(unwrap(a)))
+
+    def __getattr__(self, attr):
+        if attr == 'base':
+            raise AttributeError(attr)
+        try:
+            result = getattr(self.base, attr)
+        except AttributeError as e:
+            raise AttributeError("failed to get '{}' from {} backend".format(attr, self.base.name)) from e
+        if callable(result):
+            def wrapped_result(*args, **kwargs):
+                unwrapped_args = tuple(unwrap(v) for v in args)
+                unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+                return wrap(self, result(*unwrapped_args, **unwrapped_kwargs))
+            wrapped_result.__module__ = type(self).__module__
+            wrapped_result.__name__ = attr
+            wrapped_result.__qualname__ = '{}.{}'.format(type(self).__qualname__, attr)
+            return wrapped_result
+        else:
+            return result
+
+    def _einsum(self, expr, operands):
+        sizes = {}
+        for term, operand in zip(expr.inputs, operands):
+            for idx, dim in zip(term, operand.shape):
+                if sizes.setdefault(idx, dim) != dim:
+                    raise ValueError('dimension mismatch for index "{}": {} and {}'.format(einstr.chars[idx], sizes[idx], dim))
+        output = expr.outputs[0]
+        shape = output.newshape(tuple(sizes[idx] for idx in output))
+        dtype = np.result_type(*(operand.dtype for operand in operands))
+        node = LazyTensor(self, 'einsum', operands, {'expr': expr, 'scale': 1}, shape, dtype)
+        if not shape:
+            return node.evaluate().value
+        return node
@@ -0,0 +1,44 @@
+"""
+This module implements the random module for lazy backend.
+"""
+
+from ...interface import Random
+from .lazy_tensor import wrap, unwrap
+
+
+class LazyRandom(Random):
+    _instances = {}
+    def __new__(cls, backend):
+        if backend.name not in cls._instances:
+            instance = object.__new__(cls)
+            instance.backend = backend
+            cls._instances[backend.name] = instance
+        return cls._instances[backend.name]
+
+    def seed(self, seed):
+        self.backend.base.random.seed(seed)
+
+    def random(self, size=None):
+        return wrap(self.backend, self.backend.base.random.random(size))
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return wrap(self.backend, self.backend.base.random.uniform(low, high, size))
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        return wrap(self.backend, self.backend.base.random.normal(loc, scale, size))
+
+    def __getattr__(self, attr):
+        if attr == 'backend':
+            raise AttributeError(attr)
+        result = getattr(self.backend.base.random, attr)
+        if callable(result):
+            def wrapped_result(*args, **kwargs):
+                unwrapped_args = tuple(unwrap(v) for v in args)
+                unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+                return wrap(self.backend, result(*unwrapped_args, **unwrapped_kwargs))
+            wrapped_result.__module__ = type(self).__module__
+            wrapped_result.__name__ = attr
+            wrapped_result.__qualname__ = '{}.{}'.format(type(self).__qualname__, attr)
+            return wrapped_result
+        else:
+            return result
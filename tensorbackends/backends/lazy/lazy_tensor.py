@@ -0,0 +1,359 @@
+"""
+This module implements the lazy tensor.
+"""
+
+import weakref
+
+import numpy as np
+
+from ...interface import Tensor
+from . import graph_utils
+
+
+class LazyTensor(Tensor):
+    __hash__ = object.__hash__
+
+    def __init__(self, backend, op, args, params, shape, dtype, value=None):
+        self._backend = backend
+        self.op = op
+        self.args = tuple(args)
+        self.params = params
+        self._shape = tuple(shape)
+        self._dtype = np.dtype(dtype)
+        self.value = value
+        self.parents = {}
+        for arg in self.args:
+            if isinstance(arg, LazyTensor):
+                arg._add_parent(self)
+
+    @staticmethod
+    def leaf(backend, value):
+        return LazyTensor(backend, 'leaf', (), {}, value.shape, value.dtype, value=value)
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def ndim(self):
+        return len(self._shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self._shape, dtype=int))
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    def evaluate(self):
+        graph_utils.evaluate(self)
+        return self
+
+    def materialize(self, value):
+        for arg in self.args:
+            if isinstance(arg, LazyTensor):
+                arg.parents.pop(id(self), None)
+        self.op, self.args, self.params = 'leaf', (), {}
+        self.value = value
+        # a scalar einsum of the base backend may give a python number
+        self._shape = tuple(value.shape) if hasattr(value, 'shape') else ()
+        self._dtype = np.dtype(value.dtype) if hasattr(value, 'dtype') else np.result_type(value)
+
+    def unwrap(self):
+        return self.evaluate().value.unwrap()
+
+    def numpy(self):
+        return self.evaluate().value.numpy()
+
+    def __repr__(self):
+        if self.value is None:
+            return 'LazyTensor(op={}, shape={}, dtype={})'.format(self.op, self._shape, self._dtype)
+        return repr(self.value)
+
+    def __str__(self):
+        return str(self.evaluate().value)
+
+    def __getitem__(self, key):
+        return wrap(self._backend, self.evaluate().value[key])
+
+    def __setitem__(self, key, value):
+        self._flush_parents()
+        self.evaluate().value[key] = unwrap(value)
+        self._touch()
+
+    def copy(self):
+        return LazyTensor.leaf(self._backend, self.evaluate().value.copy())
+
+    def astype(self, dtype):
+        return LazyTensor.leaf(self._backend, self.evaluate().value.astype(dtype))
+
+    def read(self, inds):
+        return self.evaluate().value.read(inds)
+
+    def read_local(self):
+        return self.evaluate().value.read_local()
+
+    def write(self, inds, vals, accumulate=False):
+        self._flush_parents()
+        self.evaluate().value.write(inds, unwrap(vals), accumulate=accumulate)
+        self._touch()
+
+    def conj(self):
+        return self._unary('conj')
+
+    def transpose(self, *axes):
+        if not axes:
+            axes = tuple(reversed(range(self.ndim)))
+        elif len(axes) == 1 and isinstance(axes[0], (tuple, list)):
+            axes = tuple(axes[0])
+        if sorted(a % self.ndim for a in axes) != list(range(self.ndim)):
+            raise ValueError('axes do not match tensor: {}'.format(axes))
+        axes = tuple(a % self.ndim for a in axes)
+        if axes == tuple(range(self.ndim)):
+            return self
+        shape = tuple(self._shape[a] for a in axes)
+        return LazyTensor(self._backend, 'transpose', (self,), {'axes': axes}, shape, self._dtype)
+
+    def reshape(self, *shape):
+        if len(shape) == 1 and isinstance(shape[0], (tuple, list)):
+            shape = tuple(shape[0])
+        newshape = np.empty(self._shape, dtype=[]).reshape(*shape).shape
+        if newshape == self._shape:
+            return self
+        return LazyTensor(self._backend, 'reshape', (self,), {'shape': newshape}, newshape, self._dtype)
+
+    def compute(self, *args):
+        if self.op == 'unary':
+            return getattr(args[0], self.params['name'])()
+        elif self.op == 'binary':
+            return getattr(args[0], self.params['name'])(args[1])
+        elif self.op == 'transpose':
+            return args[0].transpose(*self.params['axes'])
+        elif self.op == 'reshape':
+            return args[0].reshape(*self.params['shape'])
+        else:
+            raise ValueError('cannot compute operation: {}'.format(self.op))
+
+    def __getattr__(self, attr):
+        if attr in ('_backend', 'op', 'args', 'params', '_shape', '_dtype', 'value', 'parents'):
+            raise AttributeError(attr)
+        try:
+            result = getattr(self.evaluate().value, attr)
+        except AttributeError as e:
+            raise AttributeError("failed to get '{}' from {}".format(attr, type(self.value).__qualname__)) from e
+        if callable(result):
+            def wrapped_result(*args, **kwargs):
+                unwrapped_args = tuple(unwrap(v) for v in args)
+                unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+                return wrap(self._backend, result(*unwrapped_args, **unwrapped_kwargs))
+            wrapped_result.__module__ = type(self).__module__
+            wrapped_result.__name__ = attr
+            wrapped_result.__qualname__ = '{}.{}'.format(type(self).__qualname__, attr)
+            return wrapped_result
+        else:
+            return wrap(self._backend, result)
+
+    def _add_parent(self, parent):
+        # parents are weakly referenced by id since __eq__ is an elementwise operator
+        key, parents = id(parent), self.parents
+        def remove(ref):
+            if parents.get(key) is ref:
+                del parents[key]
+        parents[key] = weakref.ref(parent, remove)
+
+    def _flush_parents(self):
+        # pending nodes must observe the value before an in-place update
+        for ref in list(self.parents.values()):
+            parent = ref()
+            if parent is not None:
+                parent.evaluate()
+
+    def _clone(self):
+        if self.value is not None:
+            return LazyTensor.leaf(self._backend, self.value)
+        return LazyTensor(self._backend, self.op, self.args, self.params, self._shape, self._dtype)
+
+    def _become(self, other):
+        for arg in self.args:
+            if isinstance(arg, LazyTensor):
+                arg.parents.pop(id(self), None)
+        self.op, self.args, self.params = other.op, other.args, other.params
+        self._shape, self._dtype, self.value = other._shape, other._dtype, other.value
+        for arg in self.args:
+            if isinstance(arg, LazyTensor):
+                arg._add_parent(self)
+
+    def _unary(self, name):
+        if self.op == 'einsum' and self.value is None and name == '__neg__':
+            return self._scaled(-1)
+        if name == '__abs__':
+            dtype = np.abs(np.ones((), dtype=self._dtype)).dtype
+        else:
+            dtype = self._dtype
+        return LazyTensor(self._backend, 'unary', (self,), {'name': name}, self._shape, dtype)
+
+    def _binary(self, name, other):
+        if name.startswith('__i'):
+            name = '__' + name[3:]
+        if isinstance(other, self._backend.base.tensor):
+            other = LazyTensor.leaf(self._backend, other)
+        if graph_utils.is_scalar(other) and self.value is None and name in graph_utils.SCALAR_OPERATORS:
+            factor = 1 / other if name == '__truediv__' else other
+            if self.op == 'einsum':
+                return self._scaled(factor)
+            if self.op == 'binary' and self.params['name'] in ('__mul__', '__rmul__') and graph_utils.is_scalar(self.args[1]):
+                return self.args[0]._binary('__mul__', self.args[1] * factor)
+        if name in ('__matmul__', '__rmatmul__') and isinstance(other, LazyTensor):
+            a, b = (self, other) if name == '__matmul__' else (other, self)
+            subscripts = MATMUL_SUBSCRIPTS.get((a.ndim, b.ndim))
+            if subscripts is not None:
+                return self._backend.einsum(subscripts, a, b)
+        if isinstance(other, LazyTensor):
+            other_shape, other_dummy = other.shape, np.ones((), dtype=other.dtype)
+        elif isinstance(other, np.ndarray):
+            other_shape, other_dummy = other.shape, np.ones((), dtype=other.dtype)
+        else:
+            other_shape, other_dummy = np.shape(other), other
+        self_dummy = np.ones((), dtype=self._dtype)
+        try:
+            with np.errstate(all='ignore'):
+                dtype = np.asarray(getattr(self_dummy, name)(other_dummy)).dtype
+            if name in ('__matmul__', '__rmatmul__'):
+                a_shape, b_shape = (self._shape, other_shape) if name == '__matmul__' else (other_shape, self._shape)
+                shape = matmul_shape(a_shape, b_shape)
+            else:
+                shape = np.broadcast_shapes(self._shape, other_shape)
+        except Exception as e:
+            raise ValueError('operands could not be combined by {}: {} and {}'.format(name, self._shape, other_shape)) from e
+        return LazyTensor(self._backend, 'binary', (self, other), {'name': name}, shape, dtype)
+
+    def _scaled(self, factor):
+        params = {'expr': self.params['expr'], 'scale': self.params['scale'] * factor}
+        dtype = np.result_type(self._dtype, factor)
+        return LazyTensor(self._backend, 'einsum', self.args, params, self._shape, dtype)
+
+
+MATMUL_SUBSCRIPTS = {
+    (2, 2): 'ij,jk->ik',
+    (2, 1): 'ij,j->i',
+    (1, 2): 'j,jk->k',
+}
+
+
+def matmul_shape(a_shape, b_shape):
+    a, b = tuple(a_shape), tuple(b_shape)
+    if not a or not b or (a[-1] != b[-2] if len(b) > 1 else a[-1] != b[0]):
+        raise ValueError('matmul shape mismatch: {} and {}'.format(a_shape, b_shape))
+    rows = a[-2:-1] if len(a) > 1 else ()
+    cols = b[-1:] if len(b) > 1 else ()
+    return (*np.broadcast_shapes(a[:-2], b[:-2]), *rows, *cols)
+
+
+def wrap(backend, value):
+    if isinstance(value, backend.base.tensor):
+        return LazyTensor.leaf(backend, value)
+    elif isinstance(value, tuple):
+        return tuple(wrap(backend, v) for v in value)
+    elif isinstance(value, list):
+        return [wrap(backend, v) for v in value]
+    elif isinstance(value, dict):
+        return {k: wrap(backend, v) for k, v in value.items()}
+    else:
+        return value
+
+def unwrap(value):
+    if isinstance(value, LazyTensor):
+        return value.evaluate().value
+    elif isinstance(value, tuple):
+        return tuple(unwrap(v) for v in value)
+    elif isinstance(value, list):
+        return [unwrap(v) for v in value]
+    else:
+        return value
+
+
+def add_unary_operators(*operator_names):
+    def add_unary_operator(operator_name):
+        def method(self):
+            return self._unary(operator_name)
+        method.__module__ = LazyTensor.__module__
+        method.__qualname__ = '{}.{}'.format(LazyTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(LazyTensor, operator_name, method)
+    for op_name in operator_names:
+        add_unary_operator(op_name)
+
+
+def add_binary_operators(*operator_names):
+    def add_binary_operator(operator_name):
+        def method(self, other):
+            return self._binary(operator_name, other)
+        method.__module__ = LazyTensor.__module__
+        method.__qualname__ = '{}.{}'.format(LazyTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(LazyTensor, operator_name, method)
+    for op_name in operator_names:
+        add_binary_operator(op_name)
+
+
+def add_inplace_operators(*operator_names):
+    def add_inplace_operator(operator_name):
+        def method(self, other):
+            # the node is redefined on top of a copy of its old definition
+            self._flush_parents()
+            self._become(self._clone()._binary(operator_name, other))
+            self._touch()
+            return self
+        method.__module__ = LazyTensor.__module__
+        method.__qualname__ = '{}.{}'.format(LazyTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(LazyTensor, operator_name, method)
+    for op_name in operator_names:
+        add_inplace_operator(op_name)
+
+
+add_unary_operators(
+    '__pos__',
+    '__neg__',
+    '__abs__',
+)
+
+add_binary_operators(
+    '__add__',
+    '__sub__',
+    '__mul__',
+    '__matmul__',
+    '__truediv__',
+    '__floordiv__',
+    '__pow__',
+
+    '__radd__',
+    '__rsub__',
+    '__rmul__',
+    '__rmatmul__',
+    '__rtruediv__',
+    '__rfloordiv__',
+    '__rpow__',
+
+    '__lt__',
+    '__le__',
+    '__eq__',
+    '__ne__',
+    '__gt__',
+    '__ge__',
+)
+
+add_inplace_operators(
+    '__iadd__',
+    '__isub__',
+    '__imul__',
+    '__imatmul__',
+    '__itruediv__',
+    '__ifloordiv__',
+    '__ipow__',
+)
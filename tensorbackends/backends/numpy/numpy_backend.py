@@ -2,13 +2,13 @@
 This module implements the numpy backend.
 """
 
-import functools, operator
+import functools, numbers, operator
 
 import numpy as np
 import numpy.linalg as la
 
 from ...interface import Backend
-from ...utils import einstr
+from ...utils import einstr, elementwise
 from .numpy_random import NumPyRandom
 from .numpy_tensor import NumPyTensor
 
@@ -122,6 +122,14 @@ class NumPyBackend(Backend):
             return self.rsvd(matrix, rank, niter, oversamp)
         return self._einsvd(einsvd_expr, a, svd_func)
 
+    def evaluate(self, expression, **operands):
+        if not all(isinstance(v, (self.tensor, np.ndarray, numbers.Number)) for v in operands.values()):
+            return super().evaluate(expression, **operands)
+        program = elementwise.parse(expression)
+        arrays = {name: v.tsr if isinstance(v, self.tensor) else v for name, v in operands.items()}
+        result = elementwise.evaluate_arrays(program, arrays)
+        return self.tensor(result) if isinstance(result, np.ndarray) and result.ndim > 0 else result
+
     def isclose(self, a, b, *, rtol=1e-9, atol=0.0):
         a = a.tsr if isinstance(a, NumPyTensor) else a
         b = b.tsr if isinstance(b, NumPyTensor) else b
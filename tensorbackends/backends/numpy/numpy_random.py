@@ -2,6 +2,8 @@
 This module implements the random module for numpy backend.
 """
 
+import concurrent.futures, os
+
 import numpy as np
 
 from ...interface import Random
@@ -9,20 +11,78 @@ from .numpy_tensor import NumPyTensor
 
 
 class NumPyRandom(Random):
+    # large tensors are filled in fixed-size blocks, each from its own stream spawned from the
+    # seed sequence, so the values do not depend on the number of threads
+    block_size = 2**18
+    nthreads = os.cpu_count() or 1
+    tensor = NumPyTensor
+
+    _seed_sequence = None
+    _generator = None
+
     def seed(self, seed):
+        self._reset(seed)
+        # functions of np.random without a Generator counterpart use the global state, which
+        # is only ever seeded here
         np.random.seed(seed)
 
-    def random(self, size):
-        return NumPyTensor(np.random.random(size))
+    @property
+    def generator(self):
+        if self._generator is None:
+            self._reset(None)
+        return self._generator
+
+    def _reset(self, seed):
+        self._seed_sequence = np.random.SeedSequence(seed)
+        self._generator = np.random.Generator(np.random.PCG64(self._seed_sequence))
+
+    def random(self, size=None, dtype=float):
+        return self.uniform(0.0, 1.0, size, dtype)
+
+    def uniform(self, low=0.0, high=1.0, size=None, dtype=float):
+        def fill(generator, values):
+            generator.random(dtype=values.dtype, out=values)
+            values *= high - low
+            values += low
+        return self._generate(fill, size, dtype)
+
+    def normal(self, loc=0.0, scale=1.0, size=None, dtype=float):
+        iscomplex = np.dtype(dtype).kind == 'c'
+        def fill(generator, values):
+            generator.standard_normal(dtype=values.dtype, out=values)
+            # complex values split the variance evenly between the real and the imaginary part
+            values *= scale / np.sqrt(2) if iscomplex else scale
+            if iscomplex:
+                values[0::2] += np.real(loc)
+                values[1::2] += np.imag(loc)
+            else:
+                values += loc
+        return self._generate(fill, size, dtype)
 
-    def uniform(self, low=0.0, high=1.0, size=None):
-        return NumPyTensor(np.random.uniform(low, high, size))
+    def _generate(self, fill, size, dtype):
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64, np.complex64, np.complex128):
+            raise TypeError('unsupported dtype for random values: {}'.format(dtype))
+        generator = self.generator
+        shape = () if size is None else (size,) if isinstance(size, int) else tuple(size)
+        out = np.empty(shape, dtype=dtype)
+        # complex values are filled through a real view with interleaved parts
+        values = out.reshape(-1).view(np.finfo(dtype).dtype)
+        if values.size <= self.block_size:
+            fill(generator, values)
+        else:
+            starts = range(0, values.size, self.block_size)
+            generators = [np.random.Generator(np.random.PCG64(s)) for s in self._seed_sequence.spawn(len(starts))]
+            blocks = [values[start:start+self.block_size] for start in starts]
+            with concurrent.futures.ThreadPoolExecutor(self.nthreads) as pool:
+                list(pool.map(fill, generators, blocks))
+        return out[()] if size is None else self.tensor(out)
 
     def __getattr__(self, attr):
-        wrap = lambda val: NumPyTensor(val) if isinstance(val, np.ndarray) else val
-        unwrap = lambda val: val.unwrap() if isinstance(val, NumPyTensor) else val
+        wrap = lambda val: self.tensor(val) if isinstance(val, np.ndarray) else val
+        unwrap = lambda val: val.unwrap() if isinstance(val, self.tensor) else val
         try:
-            result = getattr(np.random, attr)
+            result = getattr(self.generator, attr) if hasattr(self.generator, attr) else getattr(np.random, attr)
             if callable(result):
                 def wrapped_result(*args, **kwargs):
                     unwrapped_args = tuple(unwrap(v) for v in args)
@@ -2,9 +2,18 @@
 This module implements the numpy tensor.
 """
 
+import numbers
+
 import numpy as np
 
 from ...interface import Tensor
+from ...utils import entries
+
+
+# functions and methods that modify their first argument or the array in place
+INPLACE_FUNCTIONS = {np.copyto, np.put, np.place, np.putmask, np.fill_diagonal, np.put_along_axis}
+
+INPLACE_METHODS = {'fill', 'put', 'sort', 'partition', 'resize', 'setfield'}
 
 
 class NumPyTensor(Tensor):
@@ -35,8 +44,56 @@ class NumPyTensor(Tensor):
     def unwrap(self):
         return self.tsr
 
-    def numpy(self):
-        return self.tsr.copy()
+    def numpy(self, copy=True):
+        return self.tsr.copy() if copy else self.tsr
+
+    def __array__(self, dtype=None, copy=None):
+        if copy:
+            return np.array(self.tsr, dtype=dtype)
+        if dtype is None or np.dtype(dtype) == self.tsr.dtype:
+            return self.tsr
+        if copy is False:
+            raise ValueError('cannot convert {} to {} without a copy'.format(self.tsr.dtype, np.dtype(dtype)))
+        return self.tsr.astype(dtype)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        # operands are unwrapped and array results wrapped, so no data is copied; tensors given
+        # as out are updated in place and returned as they are
+        out = kwargs.get('out', ())
+        if not all(handled(v) for v in (*inputs, *out)):
+            return NotImplemented
+        if out:
+            kwargs['out'] = tuple(unwrap(v) for v in out)
+        result = getattr(ufunc, method)(*(unwrap(v) for v in inputs), **kwargs)
+        for v in (*out, *(inputs[:1] if method == 'at' else ())):
+            if isinstance(v, NumPyTensor):
+                v._touch()
+        if out:
+            return out[0] if len(out) == 1 else out
+        return wrap(result)
+
+    def __array_function__(self, func, types, args, kwargs):
+        # tensors modified in place, as the first argument of an in-place function or as out, are
+        # touched so that cached results depending on them are invalidated; arrays taken out with
+        # __array__ or numpy(copy=False) are not tracked
+        if not all(issubclass(t, (NumPyTensor, np.ndarray)) for t in types):
+            return NotImplemented
+        result = func(*unwrap(args), **unwrap(kwargs))
+        out = kwargs.get('out')
+        for v in (*(args[:1] if func in INPLACE_FUNCTIONS else ()), *(out if isinstance(out, tuple) else (out,))):
+            if isinstance(v, NumPyTensor):
+                v._touch()
+        return out if isinstance(out, NumPyTensor) else wrap(result)
+
+    def __dlpack__(self, *args, **kwargs):
+        return self.tsr.__dlpack__(*args, **kwargs)
+
+    def __dlpack_device__(self):
+        return self.tsr.__dlpack_device__()
+
+    def __buffer__(self, flags):
+        # the buffer protocol for python classes is available since python 3.12
+        return memoryview(self.tsr)
 
     def __repr__(self):
         return repr(self.tsr)
@@ -50,6 +107,7 @@ class NumPyTensor(Tensor):
 
     def __setitem__(self, key, value):
         self.tsr[key] = value.unwrap() if isinstance(value, NumPyTensor) else value
+        self._touch()
 
     def copy(self):
         return NumPyTensor(np.copy(self.tsr))
@@ -57,8 +115,14 @@ class NumPyTensor(Tensor):
     def astype(self, dtype):
         return NumPyTensor(self.tsr.astype(dtype))
 
-    def write(self, inds, vals):
-        self.tsr.put(inds, vals)
+    def read(self, inds):
+        flat, shape = entries.flatten(inds, self.shape)
+        return entries.read_array(self.tsr, flat, shape)
+
+    def write(self, inds, vals, accumulate=False):
+        flat, _ = entries.flatten(inds, self.shape)
+        entries.write_array(self.tsr, flat, entries.values(vals, flat.size, self.dtype), accumulate)
+        self._touch()
 
     def __getattr__(self, attr):
         wrap = lambda val: NumPyTensor(val) if isinstance(val, np.ndarray) else val
@@ -72,6 +136,8 @@ class NumPyTensor(Tensor):
                 unwrapped_args = tuple(unwrap(v) for v in args)
                 unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
                 retval = result(*unwrapped_args, **unwrapped_kwargs)
+                if attr in INPLACE_METHODS:
+                    self._touch()
                 if isinstance(retval, tuple):
                     wrapped_retval = tuple(wrap(v) for v in retval)
                 elif isinstance(retval, list):
@@ -89,6 +155,32 @@ class NumPyTensor(Tensor):
             return result
 
 
+def handled(value):
+    return isinstance(value, (NumPyTensor, np.ndarray, numbers.Number)) or not hasattr(type(value), '__array_ufunc__')
+
+def unwrap(value):
+    if isinstance(value, NumPyTensor):
+        return value.tsr
+    elif isinstance(value, list):
+        return [unwrap(v) for v in value]
+    elif isinstance(value, tuple):
+        return tuple(unwrap(v) for v in value)
+    elif isinstance(value, dict):
+        return {k: unwrap(v) for k, v in value.items()}
+    else:
+        return value
+
+def wrap(value):
+    if isinstance(value, np.ndarray):
+        return NumPyTensor(value)
+    elif isinstance(value, list):
+        return [wrap(v) for v in value]
+    elif isinstance(value, tuple):
+        return tuple(wrap(v) for v in value)
+    else:
+        return value
+
+
 def add_unary_operators(*operator_names):
     def add_unary_operator(operator_name):
         def method(self):
@@ -104,9 +196,12 @@ def add_unary_operators(*operator_names):
 def add_binary_operators(*operator_names):
     def add_binary_operator(operator_name):
         def method(self, other):
-            return NumPyTensor(getattr(self.tsr, operator_name)(
+            result = NumPyTensor(getattr(self.tsr, operator_name)(
                 other.tsr if isinstance(other, NumPyTensor) else other
             ))
+            if operator_name.startswith('__i'):
+                self._touch()
+            return result
         method.__module__ = NumPyTensor.__module__
         method.__qualname__ = '{}.{}'.format(NumPyTensor.__qualname__, operator_name)
         method.__name__ = operator_name
@@ -0,0 +1,2 @@
+from .numpymp_backend import NumPyMPBackend
+from .numpymp_tensor import NumPyMPTensor
@@ -0,0 +1,368 @@
+"""
+This module implements the numpy-mp backend.
+"""
+
+import functools, numbers, operator, os
+
+import numpy as np
+import numpy.linalg as la
+
+from ...interface import Backend
+from ...utils import einstr, elementwise
+from .numpymp_random import NumPyMPRandom
+from .numpymp_tensor import NumPyMPTensor
+from . import shm_utils
+
+
+class NumPyMPBackend(Backend):
+    # tensors of at least parallel_bytes live in shared memory, and operations on them are split
+    # along one index over the worker pool; smaller ones stay private to the calling process
+    parallel_bytes = 2**22
+    parallel_flops = 2**26
+    _nproc = os.cpu_count() or 1
+    _threads = 1
+    _pool = None
+
+    @property
+    def name(self):
+        return 'numpy-mp'
+
+    @property
+    def nproc(self):
+        return NumPyMPBackend._nproc
+
+    @property
+    def rank(self):
+        return shm_utils.rank
+
+    @property
+    def random(self):
+        return NumPyMPRandom()
+
+    @property
+    def tensor(self):
+        return NumPyMPTensor
+
+    @property
+    def pool(self):
+        if NumPyMPBackend._pool is None:
+            NumPyMPBackend._pool = shm_utils.Pool(self.nproc, self._threads)
+        return NumPyMPBackend._pool
+
+    def configure(self, *, nproc=None, threads=None, parallel_bytes=None, parallel_flops=None):
+        if parallel_bytes is not None:
+            NumPyMPBackend.parallel_bytes = parallel_bytes
+        if parallel_flops is not None:
+            NumPyMPBackend.parallel_flops = parallel_flops
+        if nproc is not None or threads is not None:
+            self.shutdown()
+            NumPyMPBackend._nproc = self.nproc if nproc is None else nproc
+            NumPyMPBackend._threads = self._threads if threads is None else threads
+
+    def shutdown(self):
+        if NumPyMPBackend._pool is not None:
+            NumPyMPBackend._pool.close()
+            NumPyMPBackend._pool = None
+
+    def astensor(self, obj, dtype=None):
+        if isinstance(obj, self.tensor) and dtype is None:
+            return obj
+        elif isinstance(obj, self.tensor) and dtype is not None:
+            return obj.astype(dtype)
+        elif isinstance(obj, np.ndarray) and dtype is None:
+            return self.tensor(self._place(obj))
+        elif isinstance(obj, np.ndarray) and dtype is not None:
+            return self.tensor(self._place(obj.astype(dtype)))
+        else:
+            return self.tensor(self._place(np.array(obj, dtype=dtype)))
+
+    def empty(self, shape, dtype=float):
+        out = self._allocate(shape, dtype)
+        return self.tensor(np.empty(shape, dtype=dtype) if out is None else out)
+
+    def zeros(self, shape, dtype=float):
+        # new shared memory segments are zero-filled
+        out = self._allocate(shape, dtype)
+        return self.tensor(np.zeros(shape, dtype=dtype) if out is None else out)
+
+    def ones(self, shape, dtype=float):
+        out = self._allocate(shape, dtype)
+        if out is None:
+            return self.tensor(np.ones(shape, dtype=dtype))
+        out.fill(1)
+        return self.tensor(out)
+
+    def shape(self, a):
+        return a.shape
+
+    def ndim(self, a):
+        return a.ndim
+
+    def copy(self, a):
+        out = self._allocate(a.shape, a.dtype)
+        if out is None:
+            return self.tensor(np.copy(a.tsr))
+        np.copyto(out, a.tsr)
+        return self.tensor(out)
+
+    def save(self, tsr, filename):
+        with open(filename, 'w+b') as file:
+            np.save(file, tsr.unwrap(), allow_pickle=False)
+
+    def load(self, filename):
+        return self.astensor(np.load(filename))
+
+    def einsum(self, subscripts, *operands):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsum(subscripts, ndims)
+        return self._einsum(expr, operands)
+
+    def einsvd_reduced(self, subscripts, a, rank=None):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        expr = einstr.parse_einsvd(subscripts, a.ndim)
+        def svd_func(matrix):
+            u, s, vh = self.svd(matrix)
+            if rank is not None and s.shape[0] > rank:
+                u, s, vh = u[:,:rank], s[:rank], vh[:rank,:]
+            return u, s, vh
+        return self._einsvd(expr, a, svd_func)
+
+    def einsvd_rand(self, subscripts, a, rank, niter=1, oversamp=5):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        expr = einstr.parse_einsvd(subscripts, a.ndim)
+        def svd_func(matrix):
+            return self.rsvd(matrix, rank, niter, oversamp)
+        return self._einsvd(expr, a, svd_func)
+
+    def einsumsvd_reduced(self, subscripts, *operands, rank=None):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        def svd_func(matrix):
+            u, s, vh = self.svd(matrix)
+            if rank is not None and s.shape[0] > rank:
+                u, s, vh = u[:,:rank], s[:rank], vh[:rank,:]
+            return u, s, vh
+        return self._einsvd(einsvd_expr, a, svd_func)
+
+    def einsumsvd_rand(self, subscripts, *operands, rank, niter=1, oversamp=5):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        def svd_func(matrix):
+            return self.rsvd(matrix, rank, niter, oversamp)
+        return self._einsvd(einsvd_expr, a, svd_func)
+
+    def evaluate(self, expression, **operands):
+        if not all(isinstance(v, (self.tensor, np.ndarray, numbers.Number)) for v in operands.values()):
+            return super().evaluate(expression, **operands)
+        return self._evaluate(elementwise.parse(expression), operands)
+
+    def sum(self, a, axis=None, keepdims=False):
+        return self._reduce('sum', a, axis, keepdims)
+
+    def prod(self, a, axis=None, keepdims=False):
+        return self._reduce('prod', a, axis, keepdims)
+
+    def max(self, a, axis=None, keepdims=False):
+        return self._reduce('max', a, axis, keepdims)
+
+    def min(self, a, axis=None, keepdims=False):
+        return self._reduce('min', a, axis, keepdims)
+
+    def all(self, a, axis=None, keepdims=False):
+        return self._reduce('all', a, axis, keepdims)
+
+    def any(self, a, axis=None, keepdims=False):
+        return self._reduce('any', a, axis, keepdims)
+
+    def isclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        a = a.tsr if isinstance(a, NumPyMPTensor) else a
+        b = b.tsr if isinstance(b, NumPyMPTensor) else b
+        y = np.isclose(a, b, rtol=rtol, atol=atol)
+        return NumPyMPTensor(y) if isinstance(y, np.ndarray) else y
+
+    def allclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        a = a.tsr if isinstance(a, NumPyMPTensor) else a
+        b = b.tsr if isinstance(b, NumPyMPTensor) else b
+        return np.allclose(a, b, rtol=rtol, atol=atol)
+
+    def inv(self, a):
+        return NumPyMPTensor(la.inv(a.tsr if isinstance(a, NumPyMPTensor) else a))
+
+    def svd(self, a):
+        u, s, vh = la.svd(a.tsr if isinstance(a, NumPyMPTensor) else a, full_matrices=False)
+        return NumPyMPTensor(u), NumPyMPTensor(s), NumPyMPTensor(vh)
+
+    def __getattr__(self, attr):
+        wrap = lambda val: NumPyMPTensor(val) if isinstance(val, np.ndarray) else val
+        unwrap = lambda val: val.unwrap() if isinstance(val, NumPyMPTensor) else val
+        try:
+            result = getattr(np, attr) if hasattr(np, attr) else getattr(la, attr)
+        except AttributeError as e:
+            raise AttributeError("failed to get '{}' from numpy or numpy.linalg".format(attr)) from e
+        if callable(result):
+            def wrapped_result(*args, **kwargs):
+                unwrapped_args = tuple(unwrap(v) for v in args)
+                unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+                retval = result(*unwrapped_args, **unwrapped_kwargs)
+                if isinstance(retval, tuple):
+                    wrapped_retval = tuple(wrap(v) for v in retval)
+                elif isinstance(retval, list):
+                    wrapped_retval = [wrap(v) for v in retval]
+                elif isinstance(retval, dict):
+                    wrapped_retval = {k: wrap(v) for k, v in retval.items()}
+                else:
+                    wrapped_retval = wrap(retval)
+                return wrapped_retval
+            wrapped_result.__module__ = type(self).__module__
+            wrapped_result.__name__ = attr
+            wrapped_result.__qualname__ = '{}.{}'.format(type(self).__qualname__, attr)
+            return wrapped_result
+        else:
+            return result
+
+    def _allocate(self, shape, dtype):
+        # a shared array if it is large enough to be worth splitting, else None
+        shape = (shape,) if isinstance(shape, numbers.Integral) else tuple(shape)
+        if int(np.prod(shape, dtype=int)) * np.dtype(dtype).itemsize < self.parallel_bytes:
+            return None
+        return shm_utils.allocate(shape, dtype)
+
+    def _place(self, array):
+        return shm_utils.share(array) if array.nbytes >= self.parallel_bytes else array
+
+    def _parallel(self, nbytes):
+        return self.nproc > 1 and nbytes >= self.parallel_bytes
+
+    def _einsum(self, expr, operands):
+        arrays = [operand.tsr for operand in operands]
+        subscripts = expr.indices_string
+        if self.nproc > 1 and expr.cost([a.shape for a in arrays]).flops >= self.parallel_flops:
+            result = self._parallel_einsum(expr, subscripts, arrays)
+        else:
+            result = np.einsum(subscripts, *arrays, optimize='greedy')
+        if isinstance(result, np.ndarray) and result.ndim != 0:
+            newshape = expr.outputs[0].newshape(result.shape)
+            result = result.reshape(*newshape)
+            return self.tensor(result)
+        elif isinstance(result, np.ndarray):
+            return result.item()
+        else:
+            return result
+
+    def _parallel_einsum(self, expr, subscripts, arrays):
+        # split an output index so that every worker writes its own slice of the result, else
+        # split a summed index and add up the partial results
+        sizes = expr.index_sizes([a.shape for a in arrays])
+        output = expr.outputs[0].indices
+        # an index can only be split where no operand broadcasts it
+        full = [idx for idx in sizes if all(n == sizes[idx] for term, a in zip(expr.inputs, arrays) for i, n in zip(term, a.shape) if i == idx)]
+        candidates = [idx for idx in output if idx in full and sizes[idx] > 1]
+        partial = not candidates
+        index = max(candidates or full, key=lambda idx: sizes[idx])
+        bounds = shm_utils.partition(sizes[index], self.nproc)
+        shared = [shm_utils.share(a) for a in arrays]
+        shape = tuple(sizes[idx] for idx in output)
+        out = shm_utils.allocate((len(bounds), *shape) if partial else shape, np.result_type(*arrays))
+        tasks = [
+            (subscripts, [shm_utils.describe(a) for a in shared], shm_utils.describe(out),
+             einstr.chars[index], start, stop, k if partial else None)
+            for k, (start, stop) in enumerate(bounds)
+        ]
+        self.pool.map(shm_utils.einsum_task, tasks)
+        return out.sum(axis=0) if partial else out
+
+    def _evaluate(self, program, operands, out=None):
+        arrays = {name: v.tsr if isinstance(v, self.tensor) else v for name, v in operands.items()}
+        tensors = [v for v in arrays.values() if isinstance(v, np.ndarray) and v.ndim > 0]
+        shape = np.broadcast_shapes(*(v.shape for v in tensors)) if tensors else ()
+        itemsize = max((v.dtype.itemsize for v in tensors), default=1)
+        if shape and self._parallel(int(np.prod(shape, dtype=int)) * itemsize):
+            result = self._parallel_evaluate(program, arrays, shape, out)
+        else:
+            result = elementwise.evaluate_arrays(program, arrays)
+        if out is not None:
+            if result is not out:
+                np.copyto(out, result, casting='same_kind')
+            return out
+        return self.tensor(result) if isinstance(result, np.ndarray) and result.ndim > 0 else result
+
+    def _parallel_evaluate(self, program, arrays, shape, out):
+        axis = shm_utils.split_axis(shape, self.nproc)
+        bounds = shm_utils.partition(shape[axis], self.nproc)
+        shared = {name: shm_utils.share(v) for name, v in arrays.items() if isinstance(v, np.ndarray) and v.ndim > 0}
+        operands = {name: shm_utils.describe(shared[name]) if name in shared else v for name, v in arrays.items()}
+        if program.reduction is not None:
+            tasks = [(program.source, operands, shape, None, axis, start, stop) for start, stop in bounds]
+            partials = self.pool.map(shm_utils.evaluate_task, tasks)
+            return elementwise.REDUCTIONS[program.reduction](np.array(partials))
+        empty = {name: np.broadcast_to(v, shape)[shm_utils.along(axis, 0, 0)] if name in shared else v for name, v in arrays.items()}
+        dtype = np.asarray(program.evaluate(elementwise.FUNCTIONS, elementwise.REDUCTIONS, empty)).dtype
+        if out is not None and not np.can_cast(dtype, out.dtype, 'same_kind'):
+            raise TypeError('cannot cast {} to {} in place'.format(dtype, out.dtype))
+        target = out if out is not None and shm_utils.isshared(out) else shm_utils.allocate(shape, dtype)
+        tasks = [(program.source, operands, shape, shm_utils.describe(target), axis, start, stop) for start, stop in bounds]
+        self.pool.map(shm_utils.evaluate_task, tasks)
+        return target
+
+    def _reduce(self, name, a, axis, keepdims):
+        array = a.tsr if isinstance(a, self.tensor) else np.asarray(a)
+        if array.ndim == 0 or not self._parallel(array.nbytes):
+            result = getattr(np, name)(array, axis=axis, keepdims=keepdims)
+            return self.tensor(result) if isinstance(result, np.ndarray) and result.ndim > 0 else result
+        axes = tuple(range(array.ndim)) if axis is None else (axis,) if isinstance(axis, numbers.Integral) else tuple(axis)
+        axes = tuple(ax + array.ndim if ax < 0 else ax for ax in axes)
+        kept = [ax for ax in range(array.ndim) if ax not in axes]
+        shared = shm_utils.share(array)
+        if not kept:
+            split = shm_utils.split_axis(array.shape, self.nproc)
+            tasks = [
+                (name, shm_utils.describe(shared), axes, False, None, split, start, stop, None)
+                for start, stop in shm_utils.partition(array.shape[split], self.nproc)
+            ]
+            result = getattr(np, name)(np.array(self.pool.map(shm_utils.reduce_task, tasks)))
+            return self.tensor(result.reshape((1,) * array.ndim)) if keepdims else result
+        # split a kept axis so that every worker writes its own slice of the result
+        split = kept[shm_utils.split_axis([array.shape[ax] for ax in kept], self.nproc)]
+        shape = tuple(1 if ax in axes else n for ax, n in enumerate(array.shape)) if keepdims else tuple(array.shape[ax] for ax in kept)
+        dtype = getattr(np, name)(np.zeros((1,) * array.ndim, dtype=array.dtype), axis=axes).dtype
+        out = shm_utils.allocate(shape, dtype)
+        out_axis = split if keepdims else kept.index(split)
+        tasks = [
+            (name, shm_utils.describe(shared), axes, keepdims, shm_utils.describe(out), split, start, stop, out_axis)
+            for start, stop in shm_utils.partition(array.shape[split], self.nproc)
+        ]
+        self.pool.map(shm_utils.reduce_task, tasks)
+        return self.tensor(out)
+
+    def _einsvd(self, expr, a, svd_func):
+        newindex = (expr.output_indices - expr.input_indices).pop()
+        prod = lambda iterable: functools.reduce(operator.mul, iterable, 1)
+        axis_of_index = {index: axis for axis, index in enumerate(expr.inputs[0])}
+        u_axes_from_a = [axis_of_index[index] for index in expr.outputs[0] if index != newindex]
+        vh_axes_from_a = [axis_of_index[index] for index in expr.outputs[1] if index != newindex]
+        # form matrix of a
+        a_matrix_axes = [*u_axes_from_a, *vh_axes_from_a]
+        a_matrix_shape = (prod(a.shape[axis] for axis in u_axes_from_a), -1)
+        a_matrix = a.transpose(*a_matrix_axes).reshape(*a_matrix_shape)
+        u, s, vh = svd_func(a_matrix)
+        # form u
+        u = u.reshape(*(a.shape[axis] for axis in u_axes_from_a), s.shape[0])
+        u = self.moveaxis(u, -1, expr.outputs[0].find(newindex))
+        u = u.reshape(*expr.outputs[0].newshape(u.shape))
+        # form vh
+        vh = vh.reshape(s.shape[0], *(a.shape[axis] for axis in vh_axes_from_a))
+        vh = self.moveaxis(vh, 0, expr.outputs[1].find(newindex))
+        vh = vh.reshape(*expr.outputs[1].newshape(vh.shape))
+        return u, s, vh
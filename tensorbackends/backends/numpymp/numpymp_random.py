@@ -0,0 +1,55 @@
+"""
+This module implements the random module for numpy-mp backend.
+"""
+
+import numpy as np
+
+from ..numpy.numpy_random import NumPyRandom
+from .numpymp_tensor import NumPyMPTensor
+from . import shm_utils
+
+
+class NumPyMPRandom(NumPyRandom):
+    # the seeding, the blocks and their streams are those of the numpy backend, so both give the
+    # same values for the same seed; the blocks are filled by the pool
+    _instance = None
+    _seed_sequence = None
+    _generator = None
+    tensor = NumPyMPTensor
+
+    def uniform(self, low=0.0, high=1.0, size=None, dtype=float):
+        return self._generate_shared(shm_utils.fill_uniform, (low, high), size, dtype)
+
+    def normal(self, loc=0.0, scale=1.0, size=None, dtype=float):
+        return self._generate_shared(shm_utils.fill_normal, (loc, scale, np.dtype(dtype).kind == 'c'), size, dtype)
+
+    def _generate_shared(self, fill, params, size, dtype):
+        from . import NumPyMPBackend
+        backend = NumPyMPBackend()
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64, np.complex64, np.complex128):
+            raise TypeError('unsupported dtype for random values: {}'.format(dtype))
+        generator = self.generator
+        shape = () if size is None else (size,) if isinstance(size, int) else tuple(size)
+        out = backend.empty(shape, dtype).unwrap()
+        # complex values are filled through a real view with interleaved parts
+        values = out.reshape(-1).view(np.finfo(dtype).dtype)
+        if values.size <= self.block_size:
+            fill(generator, values, *params)
+        else:
+            starts = range(0, values.size, self.block_size)
+            blocks = [
+                (start, min(start + self.block_size, values.size), seed_sequence)
+                for start, seed_sequence in zip(starts, self._seed_sequence.spawn(len(starts)))
+            ]
+            if backend.nproc == 1 or not shm_utils.isshared(values):
+                for start, stop, seed_sequence in blocks:
+                    fill(np.random.Generator(np.random.PCG64(seed_sequence)), values[start:stop], *params)
+            else:
+                descriptor = shm_utils.describe(values)
+                tasks = [
+                    (descriptor, blocks[start:stop], fill, params)
+                    for start, stop in shm_utils.partition(len(blocks), backend.nproc)
+                ]
+                backend.pool.map(shm_utils.random_task, tasks)
+        return out[()] if size is None else NumPyMPTensor(out)
@@ -0,0 +1,215 @@
+"""
+This module implements the numpy-mp tensor.
+"""
+
+import numpy as np
+
+from ...interface import Tensor
+from ...utils import elementwise, entries
+from . import shm_utils
+
+
+class NumPyMPTensor(Tensor):
+    def __init__(self, tsr):
+        self.tsr = tsr
+
+    @property
+    def backend(self):
+        from . import NumPyMPBackend
+        return NumPyMPBackend()
+
+    @property
+    def shape(self):
+        return self.tsr.shape
+
+    @property
+    def ndim(self):
+        return self.tsr.ndim
+
+    @property
+    def size(self):
+        return self.tsr.size
+
+    @property
+    def dtype(self):
+        return self.tsr.dtype
+
+    @property
+    def shared(self):
+        return shm_utils.isshared(self.tsr)
+
+    def unwrap(self):
+        return self.tsr
+
+    def numpy(self):
+        return np.array(self.tsr)
+
+    def __repr__(self):
+        return repr(self.tsr)
+
+    def __str__(self):
+        return str(self.tsr)
+
+    def __getitem__(self, key):
+        value = self.tsr[key]
+        return NumPyMPTensor(value) if isinstance(value, np.ndarray) else value
+
+    def __setitem__(self, key, value):
+        self.tsr[key] = value.unwrap() if isinstance(value, NumPyMPTensor) else value
+        self._touch()
+
+    def copy(self):
+        return self.backend.copy(self)
+
+    def astype(self, dtype):
+        return self.backend.astensor(self.tsr, dtype)
+
+    def read(self, inds):
+        flat, shape = entries.flatten(inds, self.shape)
+        return entries.read_array(self.tsr, flat, shape)
+
+    def write(self, inds, vals, accumulate=False):
+        flat, _ = entries.flatten(inds, self.shape)
+        entries.write_array(self.tsr, flat, entries.values(vals, flat.size, self.dtype), accumulate)
+        self._touch()
+
+    def __getattr__(self, attr):
+        wrap = lambda val: NumPyMPTensor(val) if isinstance(val, np.ndarray) else val
+        unwrap = lambda val: val.unwrap() if isinstance(val, NumPyMPTensor) else val
+        try:
+            result = getattr(self.tsr, attr)
+        except AttributeError as e:
+            raise AttributeError("failed to get '{}' from numpy.ndarray".format(attr)) from e
+        if callable(result):
+            def wrapped_result(*args, **kwargs):
+                unwrapped_args = tuple(unwrap(v) for v in args)
+                unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+                retval = result(*unwrapped_args, **unwrapped_kwargs)
+                if isinstance(retval, tuple):
+                    wrapped_retval = tuple(wrap(v) for v in retval)
+                elif isinstance(retval, list):
+                    wrapped_retval = [wrap(v) for v in retval]
+                elif isinstance(retval, dict):
+                    wrapped_retval = {k: wrap(v) for k, v in retval.items()}
+                else:
+                    wrapped_retval = wrap(retval)
+                return wrapped_retval
+            wrapped_result.__module__ = type(self).__module__
+            wrapped_result.__name__ = attr
+            wrapped_result.__qualname__ = '{}.{}'.format(type(self).__qualname__, attr)
+            return wrapped_result
+        else:
+            return result
+
+
+def add_elementwise_operators(**sources):
+    # operators are elementwise programs of x (self) and y (other), split over the pool when large
+    def add_elementwise_operator(operator_name, source):
+        program = elementwise.parse(source)
+        def method(self, *args):
+            operands = {'x': self}
+            if args:
+                operands['y'] = args[0]
+            return self.backend._evaluate(program, operands)
+        method.__module__ = NumPyMPTensor.__module__
+        method.__qualname__ = '{}.{}'.format(NumPyMPTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(NumPyMPTensor, operator_name, method)
+    for op_name, source in sources.items():
+        add_elementwise_operator(op_name, source)
+
+
+def add_inplace_operators(**sources):
+    def add_inplace_operator(operator_name, source):
+        program = elementwise.parse(source)
+        def method(self, other):
+            self.backend._evaluate(program, {'x': self, 'y': other}, out=self.tsr)
+            self._touch()
+            return self
+        method.__module__ = NumPyMPTensor.__module__
+        method.__qualname__ = '{}.{}'.format(NumPyMPTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(NumPyMPTensor, operator_name, method)
+    for op_name, source in sources.items():
+        add_inplace_operator(op_name, source)
+
+
+def add_matmul_operators(*operator_names):
+    def add_matmul_operator(operator_name):
+        def method(self, other):
+            reverse = operator_name == '__rmatmul__'
+            a, b = (other, self) if reverse else (self, other)
+            if isinstance(a, NumPyMPTensor) and isinstance(b, NumPyMPTensor) and a.ndim == b.ndim == 2:
+                return self.backend.einsum('ij,jk->ik', a, b)
+            a = a.tsr if isinstance(a, NumPyMPTensor) else a
+            b = b.tsr if isinstance(b, NumPyMPTensor) else b
+            return NumPyMPTensor(a @ b)
+        method.__module__ = NumPyMPTensor.__module__
+        method.__qualname__ = '{}.{}'.format(NumPyMPTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(NumPyMPTensor, operator_name, method)
+    for op_name in operator_names:
+        add_matmul_operator(op_name)
+
+
+def add_reduction_methods(*method_names):
+    def add_reduction_method(method_name):
+        def method(self, axis=None, keepdims=False):
+            return self.backend._reduce(method_name, self, axis, keepdims)
+        method.__module__ = NumPyMPTensor.__module__
+        method.__qualname__ = '{}.{}'.format(NumPyMPTensor.__qualname__, method_name)
+        method.__name__ = method_name
+        setattr(NumPyMPTensor, method_name, method)
+    for name in method_names:
+        add_reduction_method(name)
+
+
+add_elementwise_operators(
+    __pos__='+x',
+    __neg__='-x',
+    __abs__='abs(x)',
+
+    __add__='x + y',
+    __sub__='x - y',
+    __mul__='x * y',
+    __truediv__='x / y',
+    __floordiv__='x // y',
+    __pow__='x ** y',
+
+    __radd__='y + x',
+    __rsub__='y - x',
+    __rmul__='y * x',
+    __rtruediv__='y / x',
+    __rfloordiv__='y // x',
+    __rpow__='y ** x',
+
+    __lt__='x < y',
+    __le__='x <= y',
+    __eq__='x == y',
+    __ne__='x != y',
+    __gt__='x > y',
+    __ge__='x >= y',
+)
+
+add_inplace_operators(
+    __iadd__='x + y',
+    __isub__='x - y',
+    __imul__='x * y',
+    __itruediv__='x / y',
+    __ifloordiv__='x // y',
+    __ipow__='x ** y',
+)
+
+add_matmul_operators(
+    '__matmul__',
+    '__rmatmul__',
+)
+
+add_reduction_methods(
+    'sum',
+    'prod',
+    'max',
+    'min',
+    'all',
+    'any',
+)
@@ -0,0 +1,221 @@
+"""
+This module implements the shared memory blocks and the worker pool of the numpy-mp backend.
+"""
+
+import ctypes, multiprocessing, os, sys, weakref
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from ...utils import elementwise
+
+
+# the rank of this process among the nproc workers of the pool; the controlling process is not
+# a worker and reports rank 0 as well, so the two are told apart by controller
+rank = 0
+controller = True
+
+THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+
+class Block:
+    # a shared memory segment exposed through __array_interface__, so that every array built on
+    # it holds the block as its base and keeps the segment mapped
+    def __init__(self, shm, owner):
+        self.name = shm.name
+        self.nbytes = shm.size
+        pointer = ctypes.c_char.from_buffer(shm.buf)
+        self.address = ctypes.addressof(pointer)
+        del pointer
+        self.__array_interface__ = {
+            'shape': (shm.size,),
+            'typestr': '|u1',
+            'data': (self.address, False),
+            'version': 3,
+        }
+        weakref.finalize(self, _release, shm, owner)
+
+
+def _release(shm, owner):
+    shm.close()
+    if owner:
+        shm.unlink()
+
+
+def allocate(shape, dtype):
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape, dtype=int)) * dtype.itemsize
+    block = Block(shared_memory.SharedMemory(create=True, size=max(nbytes, 1)), owner=True)
+    return np.asarray(block)[:nbytes].view(dtype).reshape(shape)
+
+
+def attach(name):
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        # only the owner registers the segment, since the resource tracker would unlink it once
+        # any process that registered it exits
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+    return Block(shm, owner=False)
+
+
+def block_of(array):
+    base = array.base if isinstance(array, np.ndarray) else None
+    while isinstance(base, np.ndarray):
+        base = base.base
+    return base if isinstance(base, Block) else None
+
+
+def isshared(array):
+    return block_of(array) is not None
+
+
+def share(array):
+    if isshared(array):
+        return array
+    array = np.asarray(array)
+    result = allocate(array.shape, array.dtype)
+    result[...] = array
+    return result
+
+
+def describe(array):
+    # everything a worker needs to rebuild a view of a shared array
+    block = block_of(array)
+    offset = array.__array_interface__['data'][0] - block.address
+    return block.name, offset, array.shape, array.strides, array.dtype.str
+
+
+def view(descriptor, blocks):
+    name, offset, shape, strides, dtype = descriptor
+    if name not in blocks:
+        blocks[name] = attach(name)
+    return np.ndarray(shape, dtype, buffer=np.asarray(blocks[name]), offset=offset, strides=strides)
+
+
+def partition(n, nparts):
+    bounds = [n * k // nparts for k in range(nparts + 1)]
+    return [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def along(axis, start, stop):
+    return (slice(None),) * axis + (slice(start, stop),)
+
+
+def split_axis(shape, nproc):
+    # the first axis that gives every worker a part, else the longest
+    return next((axis for axis, n in enumerate(shape) if n >= nproc), max(range(len(shape)), key=shape.__getitem__))
+
+
+class Pool:
+    def __init__(self, nproc, threads=1):
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        counter = context.Value('i', 0)
+        # the workers split the work among themselves, so each one keeps its blas single-threaded
+        # unless told otherwise. The variables are read when numpy is first imported, and only
+        # reach the workers through the environment of the forkserver, which is started once;
+        # the workers also set the limit at runtime where threadpoolctl is available
+        saved = {name: os.environ.get(name) for name in THREAD_VARIABLES}
+        for name in THREAD_VARIABLES:
+            os.environ.setdefault(name, str(threads))
+        try:
+            self.pool = context.Pool(nproc, initializer=_initialize, initargs=(counter, threads))
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    del os.environ[name]
+                else:
+                    os.environ[name] = value
+        self.nproc = nproc
+
+    def map(self, func, tasks):
+        return self.pool.map(func, tasks, chunksize=1)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+def _initialize(counter, threads):
+    global rank, controller, limits
+    with counter.get_lock():
+        rank = counter.value
+        counter.value += 1
+    controller = False
+    try:
+        import threadpoolctl
+    except ImportError:
+        return
+    limits = threadpoolctl.threadpool_limits(threads)
+
+
+def einsum_task(task):
+    subscripts, descriptors, out_descriptor, index, start, stop, slot = task
+    blocks = {}
+    inputs, output = subscripts.split('->')
+    operands = [
+        view(descriptor, blocks)[tuple(slice(start, stop) if idx == index else slice(None) for idx in term)]
+        for descriptor, term in zip(descriptors, inputs.split(','))
+    ]
+    out = view(out_descriptor, blocks)
+    result = np.einsum(subscripts, *operands, optimize='greedy')
+    if slot is None:
+        out[tuple(slice(start, stop) if idx == index else slice(None) for idx in output)] = result
+    else:
+        out[slot] = result
+
+
+def evaluate_task(task):
+    source, operands, shape, out_descriptor, axis, start, stop = task
+    blocks = {}
+    program = elementwise.parse(source)
+    key = along(axis, start, stop)
+    arrays = {
+        name: np.broadcast_to(view(value, blocks), shape)[key] if isinstance(value, tuple) else value
+        for name, value in operands.items()
+    }
+    result = program.evaluate(elementwise.FUNCTIONS, elementwise.REDUCTIONS, arrays)
+    if out_descriptor is None:
+        return result
+    view(out_descriptor, blocks)[key] = result
+
+
+def reduce_task(task):
+    name, descriptor, axes, keepdims, out_descriptor, axis, start, stop, out_axis = task
+    blocks = {}
+    array = view(descriptor, blocks)
+    result = getattr(np, name)(array[along(axis, start, stop)], axis=axes, keepdims=keepdims)
+    if out_descriptor is None:
+        return result
+    view(out_descriptor, blocks)[along(out_axis, start, stop)] = result
+
+
+def random_task(task):
+    descriptor, blocks_to_fill, fill, params = task
+    blocks = {}
+    values = view(descriptor, blocks)
+    for start, stop, seed_sequence in blocks_to_fill:
+        fill(np.random.Generator(np.random.PCG64(seed_sequence)), values[start:stop], *params)
+
+
+def fill_uniform(generator, values, low, high):
+    generator.random(dtype=values.dtype, out=values)
+    values *= high - low
+    values += low
+
+
+def fill_normal(generator, values, loc, scale, iscomplex):
+    generator.standard_normal(dtype=values.dtype, out=values)
+    # complex values split the variance evenly between the real and the imaginary part
+    values *= scale / np.sqrt(2) if iscomplex else scale
+    if iscomplex:
+        values[0::2] += np.real(loc)
+        values[1::2] += np.imag(loc)
+    else:
+        values += loc
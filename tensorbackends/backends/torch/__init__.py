@@ -0,0 +1,2 @@
+from .torch_backend import TorchBackend
+from .torch_tensor import TorchTensor
@@ -0,0 +1,226 @@
+"""
+This module implements the torch backend.
+"""
+
+import functools, operator
+
+import numpy as np
+import torch
+
+from ...interface import Backend
+from ...utils import einstr
+from .torch_random import TorchRandom
+from .torch_tensor import TorchTensor, to_torch_dtype
+
+
+class TorchBackend(Backend):
+    @property
+    def name(self):
+        return 'torch'
+
+    @property
+    def nproc(self):
+        return 1
+
+    @property
+    def rank(self):
+        return 0
+
+    @property
+    def random(self):
+        return TorchRandom()
+
+    @property
+    def tensor(self):
+        return TorchTensor
+
+    def astensor(self, obj, dtype=None):
+        if isinstance(obj, self.tensor) and dtype is None:
+            return obj
+        elif isinstance(obj, self.tensor) and dtype is not None:
+            return obj.astype(dtype)
+        elif isinstance(obj, torch.Tensor):
+            return self.tensor(obj.to(to_torch_dtype(dtype)) if dtype is not None else obj)
+        elif isinstance(obj, np.ndarray) and dtype is None:
+            return self.tensor(torch.from_numpy(obj))
+        else:
+            return self.tensor(torch.from_numpy(np.array(obj, dtype=dtype)))
+
+    def empty(self, shape, dtype=float):
+        return self.tensor(torch.empty(shape, dtype=to_torch_dtype(dtype)))
+
+    def zeros(self, shape, dtype=float):
+        return self.tensor(torch.zeros(shape, dtype=to_torch_dtype(dtype)))
+
+    def ones(self, shape, dtype=float):
+        return self.tensor(torch.ones(shape, dtype=to_torch_dtype(dtype)))
+
+    def eye(self, n, m=None, dtype=float):
+        return self.tensor(torch.eye(n, n if m is None else m, dtype=to_torch_dtype(dtype)))
+
+    def shape(self, a):
+        return a.shape
+
+    def ndim(self, a):
+        return a.ndim
+
+    def copy(self, a):
+        return a.copy()
+
+    def save(self, tsr, filename):
+        with open(filename, 'w+b') as file:
+            np.save(file, tsr.numpy(), allow_pickle=False)
+
+    def load(self, filename):
+        return self.tensor(torch.from_numpy(np.load(filename)))
+
+    def einsum(self, subscripts, *operands):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsum(subscripts, ndims)
+        return self._einsum(expr, operands)
+
+    def einsvd_reduced(self, subscripts, a, rank=None):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        expr = einstr.parse_einsvd(subscripts, a.ndim)
+        def svd_func(matrix):
+            u, s, vh = self.svd(matrix)
+            if rank is not None and s.shape[0] > rank:
+                u, s, vh = u[:,:rank], s[:rank], vh[:rank,:]
+            return u, s, vh
+        return self._einsvd(expr, a, svd_func)
+
+    def einsvd_rand(self, subscripts, a, rank, niter=1, oversamp=5):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        expr = einstr.parse_einsvd(subscripts, a.ndim)
+        def svd_func(matrix):
+            return self.rsvd(matrix, rank, niter, oversamp)
+        return self._einsvd(expr, a, svd_func)
+
+    def einsumsvd_reduced(self, subscripts, *operands, rank=None):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        def svd_func(matrix):
+            u, s, vh = self.svd(matrix)
+            if rank is not None and s.shape[0] > rank:
+                u, s, vh = u[:,:rank], s[:rank], vh[:rank,:]
+            return u, s, vh
+        return self._einsvd(einsvd_expr, a, svd_func)
+
+    def einsumsvd_rand(self, subscripts, *operands, rank, niter=1, oversamp=5):
+        if not all(isinstance(operand, self.tensor) for operand in operands):
+            raise TypeError('all operands should be {}'.format(self.tensor.__qualname__))
+        ndims = [operand.ndim for operand in operands]
+        expr = einstr.parse_einsumsvd(subscripts, ndims)
+        einsum_expr, einsvd_expr = einstr.split_einsumsvd(expr)
+        a = self._einsum(einsum_expr, operands)
+        def svd_func(matrix):
+            return self.rsvd(matrix, rank, niter, oversamp)
+        return self._einsvd(einsvd_expr, a, svd_func)
+
+    def isclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        a, b = self._promote(a, b)
+        return self.tensor(torch.isclose(a, b, rtol=rtol, atol=atol))
+
+    def allclose(self, a, b, *, rtol=1e-9, atol=0.0):
+        a, b = self._promote(a, b)
+        return bool(torch.isclose(a, b, rtol=rtol, atol=atol).all())
+
+    def inv(self, a):
+        return self.tensor(torch.linalg.inv(a.unwrap()))
+
+    def svd(self, a):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        if a.ndim < 2:
+            raise TypeError('the input tensor should be a matrix or a batch of matrices')
+        u, s, vh = torch.linalg.svd(a.unwrap(), full_matrices=False)
+        return self.tensor(u), self.tensor(s), self.tensor(vh)
+
+    def qr(self, a):
+        if not isinstance(a, self.tensor):
+            raise TypeError('the input should be {}'.format(self.tensor.__qualname__))
+        if a.ndim < 2:
+            raise TypeError('the input tensor should be a matrix or a batch of matrices')
+        q, r = torch.linalg.qr(a.unwrap())
+        return self.tensor(q), self.tensor(r)
+
+    def tensordot(self, a, b, axes=2):
+        if not isinstance(axes, int):
+            axes = tuple([axis] if isinstance(axis, int) else list(axis) for axis in axes)
+        a, b = self._promote(a, b)
+        return self.tensor(torch.tensordot(a, b, dims=axes))
+
+    def __getattr__(self, attr):
+        wrap = lambda val: TorchTensor(val) if isinstance(val, torch.Tensor) else val
+        unwrap = lambda val: val.unwrap() if isinstance(val, TorchTensor) else val
+        try:
+            result = getattr(torch.linalg, attr) if hasattr(torch.linalg, attr) else getattr(torch, attr)
+        except AttributeError as e:
+            raise AttributeError("failed to get '{}' from torch or torch.linalg".format(attr)) from e
+        if callable(result):
+            def wrapped_result(*args, **kwargs):
+                unwrapped_args = tuple(unwrap(v) for v in args)
+                unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+                retval = result(*unwrapped_args, **unwrapped_kwargs)
+                if isinstance(retval, tuple):
+                    wrapped_retval = tuple(wrap(v) for v in retval)
+                elif isinstance(retval, list):
+                    wrapped_retval = [wrap(v) for v in retval]
+                elif isinstance(retval, dict):
+                    wrapped_retval = {k: wrap(v) for k, v in retval.items()}
+                else:
+                    wrapped_retval = wrap(retval)
+                return wrapped_retval
+            wrapped_result.__module__ = type(self).__module__
+            wrapped_result.__name__ = attr
+            wrapped_result.__qualname__ = '{}.{}'.format(type(self).__qualname__, attr)
+            return wrapped_result
+        else:
+            return result
+
+    def _promote(self, *values):
+        # torch does not mix dtypes in einsum and friends, so operands are cast up front
+        tensors = [v.unwrap() if isinstance(v, TorchTensor) else torch.as_tensor(v) for v in values]
+        dtype = functools.reduce(torch.promote_types, (t.dtype for t in tensors))
+        if not (dtype.is_floating_point or dtype.is_complex):
+            dtype = torch.float64
+        return tuple(t.to(dtype) for t in tensors)
+
+    def _einsum(self, expr, operands):
+        dtype = functools.reduce(torch.promote_types, (operand.tsr.dtype for operand in operands))
+        result = torch.einsum(expr.indices_string, *(operand.tsr.to(dtype) for operand in operands))
+        if result.dim() != 0:
+            newshape = expr.outputs[0].newshape(tuple(result.shape))
+            result = result.reshape(*newshape)
+            return self.tensor(result)
+        else:
+            return result.item()
+
+    def _einsvd(self, expr, a, svd_func):
+        newindex = (expr.output_indices - expr.input_indices).pop()
+        prod = lambda iterable: functools.reduce(operator.mul, iterable, 1)
+        axis_of_index = {index: axis for axis, index in enumerate(expr.inputs[0])}
+        u_axes_from_a = [axis_of_index[index] for index in expr.outputs[0] if index != newindex]
+        vh_axes_from_a = [axis_of_index[index] for index in expr.outputs[1] if index != newindex]
+        # form matrix of a
+        a_matrix_axes = [*u_axes_from_a, *vh_axes_from_a]
+        a_matrix_shape = (prod(a.shape[axis] for axis in u_axes_from_a), -1)
+        a_matrix = a.transpose(*a_matrix_axes).reshape(*a_matrix_shape)
+        u, s, vh = svd_func(a_matrix)
+        # form u
+        u = u.reshape(*(a.shape[axis] for axis in u_axes_from_a), s.shape[0])
+        u = self.moveaxis(u, -1, expr.outputs[0].find(newindex))
+        u = u.reshape(*expr.outputs[0].newshape(u.shape))
+        # form vh
+        vh = vh.reshape(s.shape[0], *(a.shape[axis] for axis in vh_axes_from_a))
+        vh = self.moveaxis(vh, 0, expr.outputs[1].find(newindex))
+        vh = vh.reshape(*expr.outputs[1].newshape(vh.shape))
+        return u, s, vh
@@ -0,0 +1,31 @@
+"""
+This module implements the random module for torch backend.
+"""
+
+import torch
+
+from ...interface import Random
+from .torch_tensor import TorchTensor
+
+
+class TorchRandom(Random):
+    def seed(self, seed):
+        torch.manual_seed(seed)
+
+    def random(self, size=None):
+        if size is None:
+            return torch.rand(1, dtype=torch.float64).item()
+        else:
+            return TorchTensor(torch.rand(size, dtype=torch.float64))
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        if size is None:
+            return torch.empty(1, dtype=torch.float64).uniform_(low, high).item()
+        else:
+            return TorchTensor(torch.empty(size, dtype=torch.float64).uniform_(low, high))
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        if size is None:
+            return torch.empty(1, dtype=torch.float64).normal_(loc, scale).item()
+        else:
+            return TorchTensor(torch.empty(size, dtype=torch.float64).normal_(loc, scale))
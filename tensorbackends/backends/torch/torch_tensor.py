@@ -0,0 +1,191 @@
+"""
+This module implements the torch tensor.
+"""
+
+import numpy as np
+import torch
+
+from ...interface import Tensor
+from ...utils import entries
+
+
+def to_torch_dtype(dtype):
+    if dtype is None or isinstance(dtype, torch.dtype):
+        return dtype
+    return torch.from_numpy(np.empty(0, dtype=dtype)).dtype
+
+def to_numpy_dtype(dtype):
+    return torch.empty(0, dtype=dtype).numpy().dtype
+
+
+class TorchTensor(Tensor):
+    def __init__(self, tsr):
+        self.tsr = tsr
+
+    @property
+    def backend(self):
+        from . import TorchBackend
+        return TorchBackend()
+
+    @property
+    def shape(self):
+        return tuple(self.tsr.shape)
+
+    @property
+    def ndim(self):
+        return self.tsr.dim()
+
+    @property
+    def size(self):
+        return self.tsr.numel()
+
+    @property
+    def dtype(self):
+        return to_numpy_dtype(self.tsr.dtype)
+
+    def unwrap(self):
+        return self.tsr
+
+    def numpy(self):
+        return self.tsr.detach().resolve_conj().resolve_neg().cpu().numpy().copy()
+
+    def __repr__(self):
+        return repr(self.tsr)
+
+    def __str__(self):
+        return str(self.tsr)
+
+    def __getitem__(self, key):
+        value = self.tsr[key]
+        return TorchTensor(value) if value.dim() != 0 else value.item()
+
+    def __setitem__(self, key, value):
+        self.tsr[key] = value.unwrap() if isinstance(value, TorchTensor) else value
+        self._touch()
+
+    def copy(self):
+        return TorchTensor(self.tsr.clone())
+
+    def astype(self, dtype):
+        return TorchTensor(self.tsr.to(to_torch_dtype(dtype)))
+
+    def transpose(self, *axes):
+        if not axes:
+            axes = tuple(reversed(range(self.ndim)))
+        if len(axes) == 1 and isinstance(axes[0], (tuple, list)):
+            axes = tuple(axes[0])
+        return TorchTensor(self.tsr.permute(*(int(axis) for axis in axes)))
+
+    def reshape(self, *newshape):
+        if len(newshape) == 1 and isinstance(newshape[0], (tuple, list)):
+            newshape = tuple(newshape[0])
+        return TorchTensor(self.tsr.reshape(*(int(s) for s in newshape)))
+
+    def read(self, inds):
+        flat, shape = entries.flatten(inds, self.shape)
+        values = torch.take(self.tsr, torch.as_tensor(flat, device=self.tsr.device))
+        return values.detach().resolve_conj().resolve_neg().cpu().numpy().reshape(shape)
+
+    def write(self, inds, vals, accumulate=False):
+        flat, _ = entries.flatten(inds, self.shape)
+        inds = torch.as_tensor(flat, device=self.tsr.device)
+        vals = torch.tensor(entries.values(vals, flat.size, self.dtype), dtype=self.tsr.dtype, device=self.tsr.device)
+        self.tsr.put_(inds, vals, accumulate=accumulate)
+        self._touch()
+
+    def __getattr__(self, attr):
+        wrap = lambda val: TorchTensor(val) if isinstance(val, torch.Tensor) else val
+        unwrap = lambda val: val.unwrap() if isinstance(val, TorchTensor) else val
+        try:
+            result = getattr(self.tsr, attr)
+        except AttributeError as e:
+            raise AttributeError("failed to get '{}' from torch.Tensor".format(attr)) from e
+        if callable(result):
+            def wrapped_result(*args, **kwargs):
+                unwrapped_args = tuple(unwrap(v) for v in args)
+                unwrapped_kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+                retval = result(*unwrapped_args, **unwrapped_kwargs)
+                if isinstance(retval, tuple):
+                    wrapped_retval = tuple(wrap(v) for v in retval)
+                elif isinstance(retval, list):
+                    wrapped_retval = [wrap(v) for v in retval]
+                elif isinstance(retval, dict):
+                    wrapped_retval = {k: wrap(v) for k, v in retval.items()}
+                else:
+                    wrapped_retval = wrap(retval)
+                return wrapped_retval
+            wrapped_result.__module__ = type(self).__module__
+            wrapped_result.__name__ = attr
+            wrapped_result.__qualname__ = '{}.{}'.format(type(self).__qualname__, attr)
+            return wrapped_result
+        else:
+            return wrap(result)
+
+
+def add_unary_operators(*operator_names):
+    def add_unary_operator(operator_name):
+        def method(self):
+            return TorchTensor(getattr(self.tsr, operator_name)())
+        method.__module__ = TorchTensor.__module__
+        method.__qualname__ = '{}.{}'.format(TorchTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(TorchTensor, operator_name, method)
+    for op_name in operator_names:
+        add_unary_operator(op_name)
+
+
+def add_binary_operators(*operator_names):
+    def add_binary_operator(operator_name):
+        def method(self, other):
+            result = TorchTensor(getattr(self.tsr, operator_name)(
+                other.tsr if isinstance(other, TorchTensor) else other
+            ))
+            if operator_name.startswith('__i'):
+                self._touch()
+            return result
+        method.__module__ = TorchTensor.__module__
+        method.__qualname__ = '{}.{}'.format(TorchTensor.__qualname__, operator_name)
+        method.__name__ = operator_name
+        setattr(TorchTensor, operator_name, method)
+    for op_name in operator_names:
+        add_binary_operator(op_name)
+
+
+add_unary_operators(
+    '__pos__',
+    '__neg__',
+    '__abs__',
+)
+
+add_binary_operators(
+    '__add__',
+    '__sub__',
+    '__mul__',
+    '__matmul__',
+    '__truediv__',
+    '__floordiv__',
+    '__pow__',
+
+    '__radd__',
+    '__rsub__',
+    '__rmul__',
+    '__rmatmul__',
+    '__rtruediv__',
+    '__rfloordiv__',
+    '__rpow__',
+
+    '__iadd__',
+    '__isub__',
+    '__imul__',
+    '__imatmul__',
+    '__itruediv__',
+    '__ifloordiv__',
+    '__ipow__',
+
+    '__lt__',
+    '__le__',
+    '__eq__',
+    '__ne__',
+    '__gt__',
+    '__ge__',
+)
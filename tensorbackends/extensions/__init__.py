@@ -1,4 +1,7 @@
+from .conj_einsum import conj_einsum, conjugated
+from .convert import convert
 from .einqr import einqr
 from .einsumsvd_implicit_rand import einsumsvd_implicit_rand
 from .moveaxis import moveaxis
 from .rsvd import rsvd
+from .network import TensorNetwork
@@ -0,0 +1,41 @@
+import functools
+
+import numpy as np
+
+from ..utils import einstr
+
+
+def conj_einsum(backend, einsum, subscripts, *operands, conj):
+    # conj(a) conj(b) c == conj(a b conj(c)), so the conjugation is moved to whichever side
+    # holds fewer complex elements: the flagged operands, or the other operands and the output
+    if len(conj) != len(operands):
+        raise ValueError('number of conj flags does not match operands: {}'.format(len(conj)))
+    complex_operands = [isinstance(operand, backend.tensor) and iscomplex(operand.dtype) for operand in operands]
+    flags = [bool(flag) and c for flag, c in zip(conj, complex_operands)]
+    if not any(flags):
+        return einsum(backend, subscripts, *operands)
+    expr = einstr.parse_einsum(subscripts, [operand.ndim for operand in operands])
+    sizes = expr.index_sizes([tuple(operand.shape) for operand in operands])
+    output_size = einstr.prod(sizes[idx] for idx in expr.outputs[0])
+    size = lambda operand: einstr.prod(operand.shape)
+    flagged = sum(size(operand) for flag, operand in zip(flags, operands) if flag)
+    others = [not flag and c for flag, c in zip(flags, complex_operands)]
+    if flagged <= sum(size(operand) for other, operand in zip(others, operands) if other) + output_size:
+        return einsum(backend, subscripts, *(operand.conj() if flag else operand for flag, operand in zip(flags, operands)))
+    operands = [operand.conj() if other else operand for other, operand in zip(others, operands)]
+    result = einsum(backend, subscripts, *operands)
+    return result.conj() if isinstance(result, backend.tensor) else result.conjugate()
+
+
+def conjugated(einsum):
+    # adds the conj keyword to the einsum of a backend: one flag per operand
+    @functools.wraps(einsum)
+    def method(self, subscripts, *operands, conj=None):
+        if conj is None:
+            return einsum(self, subscripts, *operands)
+        return conj_einsum(self, einsum, subscripts, *operands, conj=conj)
+    return method
+
+
+def iscomplex(dtype):
+    return np.dtype(dtype).kind == 'c'
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+CHUNK_SIZE = 2**20
+
+MAXDIMS = 64
+
+TYPECODES = np.typecodes['All']
+
+
+def convert(backend, tensor, target, root=0, chunk_size=CHUNK_SIZE):
+    # tensors of distributed backends are never replicated on every rank: their entries move
+    # rank by rank between distributed backends, or stream in chunks to or from root; with
+    # root=None, the non-distributed side is a replica on every rank. Objects that are not
+    # tensors are taken as data of the calling backend; when scattering from root, the other
+    # ranks may pass None instead
+    from .. import backends
+    from ..interface import Tensor
+    target = backends.get(target)
+    if tensor is None:
+        if not target.distributed or root is None or target.rank == root:
+            raise ValueError('tensor is None outside the non-root ranks of a scatter: {}'.format(target.name))
+        return scatter(target, None, root, chunk_size)
+    if not isinstance(tensor, Tensor):
+        tensor = backend.astensor(tensor)
+    source = tensor.backend
+    if source is target:
+        return tensor
+    if not source.distributed and not target.distributed:
+        return target.astensor(tensor.numpy())
+    shape, dtype = tuple(tensor.shape), np.dtype(tensor.dtype)
+    size = int(np.prod(shape, dtype=np.int64))
+    if source.distributed and target.distributed:
+        inds, vals = tensor.read_local()
+        return target.from_local(shape, inds, vals, dtype=dtype)
+    if source.distributed and root is None:
+        return target.astensor(tensor.numpy())
+    if source.distributed:
+        # gather: only root asks for entries, but every rank takes part in each read
+        isroot = source.rank == root
+        values = np.empty(size if isroot else 0, dtype=dtype)
+        for inds in ranges(0, size if isroot else 0, -(-size // chunk_size), chunk_size):
+            values[inds] = tensor.read(inds)
+        return target.astensor(values.reshape(shape)) if isroot else None
+    if root is not None:
+        return scatter(target, tensor, root, chunk_size)
+    # every rank writes its own share of the replicas
+    start, stop = size * target.rank // target.nproc, size * (target.rank + 1) // target.nproc
+    per_rank = -(-size // target.nproc)
+    ncalls = -(-per_rank // chunk_size)
+    result = target.zeros(shape, dtype=dtype)
+    for inds in ranges(start, stop, ncalls, chunk_size):
+        result.write(inds, tensor.read(inds))
+    return result
+
+
+def scatter(target, tensor, root, chunk_size):
+    # only root holds the tensor; the other ranks learn its shape and dtype from root and write
+    # no entries, but take part in each write
+    isroot = target.rank == root
+    shape, dtype = broadcast(target, (tuple(tensor.shape), np.dtype(tensor.dtype)) if isroot else None, root)
+    size = int(np.prod(shape, dtype=np.int64))
+    result = target.zeros(shape, dtype=dtype)
+    for inds in ranges(0, size if isroot else 0, -(-size // chunk_size), chunk_size):
+        result.write(inds, tensor.read(inds) if isroot else np.empty(0, dtype=dtype))
+    return result
+
+
+def broadcast(target, meta, root):
+    # the shape and dtype of root, sent through a tensor of the target backend as
+    # [ndim, typecode, *shape]
+    if target.nproc == 1:
+        return meta
+    message = target.zeros(MAXDIMS + 2, dtype=np.int64)
+    if target.rank == root:
+        shape, dtype = meta
+        if len(shape) > MAXDIMS:
+            raise ValueError('too many dimensions to scatter: {}'.format(len(shape)))
+        message.write(np.arange(len(shape) + 2), [len(shape), TYPECODES.index(dtype.char), *shape])
+    else:
+        message.write(np.arange(0), np.empty(0, dtype=np.int64))
+    message = message.read(np.arange(MAXDIMS + 2))
+    ndim = int(message[0])
+    return tuple(int(n) for n in message[2:ndim+2]), np.dtype(TYPECODES[int(message[1])])
+
+
+def ranges(start, stop, ncalls, chunk_size):
+    # the same number of chunks on every rank, empty once the entries of a rank run out
+    for k in range(ncalls):
+        yield np.arange(min(start + k * chunk_size, stop), min(start + (k + 1) * chunk_size, stop))
@@ -14,7 +14,6 @@ def einsumsvd_implicit_rand(backend, subscripts, *operands, rank, niter):
     r = min(rank, m, n) # + oversamp if oversampling, but then need to extract
 
     ops_A = operands
-    ops_A_conj = [tsr.conj() for tsr in ops_A]
     shape_X = []
     need_transpose_X = False
     permutation_X = []
@@ -58,17 +57,17 @@ def einsumsvd_implicit_rand(backend, subscripts, *operands, rank, niter):
     op_X = backend.random.uniform(low=-1.0, high=1.0, size=shape_X)
     # FIXME: start by QR of op_X if rank is not too large
     for iter in range(niter):
-        op_YT = apply_A(backend,expr_A,ops_A_conj,term_X,op_X,term_YT)
+        op_YT = apply_A(backend,expr_A,ops_A,term_X,op_X,term_YT,conj=True)
         op_X = apply_A(backend,expr_A,ops_A,term_YT,op_YT,term_X)
         mat_X, _ = backend.qr(op_X.reshape(np.prod(op_X.shape)//r, r))
         op_X = mat_X.reshape(*op_X.shape)
-    op_YT = apply_A(backend,expr_A,ops_A_conj,term_X,op_X,term_YT)
+    op_YT = apply_A(backend,expr_A,ops_A,term_X,op_X,term_YT,conj=True)
     mat_VT, _ = backend.qr(op_YT.reshape(np.prod(op_YT.shape)//r, r))
     op_YT = mat_VT.reshape(*op_YT.shape)
 
     op_X = apply_A(backend,expr_A,ops_A,term_YT,op_YT,term_X)
     mat_U, S, mat_XVT = backend.svd(op_X.reshape(np.prod(op_X.shape)//r, r))
-    op_YT = backend.tensordot(op_YT.conj(), mat_XVT, axes=((-1),(-1)))
+    op_YT = backend.einsum('...a,ba->...b', op_YT, mat_XVT, conj=(True, False))
     op_X = mat_U.reshape(*op_X.shape)
     U = op_X
 
@@ -87,9 +86,11 @@ def einsumsvd_implicit_rand(backend, subscripts, *operands, rank, niter):
     return U, S, VT
 
 
-def apply_A(backend, expr_A, ops_A, expr_X, op_X, expr_Y):
+def apply_A(backend, expr_A, ops_A, expr_X, op_X, expr_Y, conj=False):
+    # with conj, the operands of A are conjugated; the conjugation lands on op_X and the result
+    # rather than on copies of the operands
     exp = einstr.Expression([*expr_A.inputs, expr_X], [expr_Y])
-    return backend.einsum(str(exp), *ops_A, op_X)
+    return backend.einsum(str(exp), *ops_A, op_X, conj=[conj]*len(ops_A)+[False])
 
 
 def get_shape(expr, op_inputs, output):
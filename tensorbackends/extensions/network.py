@@ -0,0 +1,140 @@
+import collections
+
+from ..utils import einstr
+
+
+class TensorNetwork:
+    def __init__(self, backend):
+        self.backend = backend
+        self._terms = collections.OrderedDict()
+        self._tensors = {}
+        # intermediates by the set of tensors contracted and their remaining indices; a cached
+        # intermediate stays valid until one of its tensors is replaced or removed
+        self._cache = {}
+        self._trees = {}
+        self.stats = collections.Counter()
+
+    @property
+    def names(self):
+        return list(self._terms)
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, name):
+        return name in self._terms
+
+    def __getitem__(self, name):
+        return self._tensors[name]
+
+    def indices(self, name):
+        return self._terms[name]
+
+    def add(self, name, indices, tensor):
+        if name in self._terms:
+            raise ValueError('tensor already in the network: {}'.format(name))
+        self._set(name, indices, tensor)
+
+    def replace(self, name, tensor, indices=None):
+        if name not in self._terms:
+            raise KeyError(name)
+        self._set(name, self._terms[name] if indices is None else indices, tensor)
+        self._invalidate(name)
+
+    def remove(self, name):
+        del self._terms[name]
+        del self._tensors[name]
+        self._invalidate(name)
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._trees.clear()
+
+    def open_indices(self, names=None):
+        # indices of the subnetwork that are not contracted within it
+        names = self._select(names)
+        counts = collections.Counter(idx for name in names for idx in self._terms[name])
+        connected = set(idx for name in self._terms if name not in names for idx in self._terms[name])
+        return ''.join(dict.fromkeys(
+            idx for name in names for idx in self._terms[name] if counts[idx] == 1 or idx in connected
+        ))
+
+    def contract(self, names=None, output=None):
+        names = self._select(names)
+        output = self.open_indices(names) if output is None else output
+        tree = self.tree(names, output)
+        result, indices = self._evaluate(tree, names, output)
+        if indices != output:
+            result = self.backend.einsum('{}->{}'.format(indices, output), result)
+        return result
+
+    def environment(self, name, output=None):
+        # the rest of the network, with the indices of the tensor first
+        others = [other for other in self._terms if other != name]
+        if output is None:
+            rest = self.open_indices(others)
+            output = ''.join(idx for idx in self._terms[name] if idx in rest)
+            output += ''.join(idx for idx in rest if idx not in output)
+        return self.contract(others, output)
+
+    def tree(self, names=None, output=None):
+        # the contraction tree as nested pairs of names, planned once per index sizes
+        names = self._select(names)
+        output = self.open_indices(names) if output is None else output
+        shapes = [tuple(self._tensors[name].shape) for name in names]
+        key = (tuple(names), output, tuple(shapes))
+        if key not in self._trees:
+            expr = einstr.parse('{}->{}'.format(','.join(self._terms[name] for name in names), output))
+            trees = list(names)
+            for positions in expr.optimal_path(shapes):
+                subtrees = [trees[k] for k in positions]
+                trees = [tree for k, tree in enumerate(trees) if k not in positions]
+                trees.append(subtrees[0] if len(subtrees) == 1 else tuple(subtrees))
+            self._trees[key] = trees[0]
+        return self._trees[key]
+
+    def _set(self, name, indices, tensor):
+        if not isinstance(tensor, self.backend.tensor):
+            raise TypeError('the input should be {}'.format(self.backend.tensor.__qualname__))
+        if not isinstance(indices, str) or not all(idx in einstr.chars for idx in indices):
+            raise ValueError('indices should be a string of letters: {}'.format(indices))
+        if len(indices) != tensor.ndim:
+            raise ValueError('indices "{}" do not match ndim: {}'.format(indices, tensor.ndim))
+        self._terms[name] = indices
+        self._tensors[name] = tensor
+
+    def _invalidate(self, name):
+        for key in [key for key in self._cache if name in key[0]]:
+            del self._cache[key]
+
+    def _select(self, names):
+        if names is None:
+            return list(self._terms)
+        names = set(names)
+        missing = names - set(self._terms)
+        if missing:
+            raise KeyError(', '.join(sorted(map(str, missing))))
+        return [name for name in self._terms if name in names]
+
+    def _leaves(self, tree):
+        if isinstance(tree, tuple):
+            return [leaf for subtree in tree for leaf in self._leaves(subtree)]
+        return [tree]
+
+    def _evaluate(self, tree, names, output):
+        # returns the value of a subtree and its indices: those still needed by the rest of the
+        # subnetwork or by the output
+        if not isinstance(tree, tuple):
+            return self._tensors[tree], self._terms[tree]
+        leaves = set(self._leaves(tree))
+        needed = set(output).union(*(self._terms[name] for name in names if name not in leaves))
+        indices = ''.join(dict.fromkeys(idx for name in names if name in leaves for idx in self._terms[name] if idx in needed))
+        key = (frozenset(leaves), indices)
+        if key in self._cache:
+            self.stats['hit'] += 1
+            return self._cache[key], indices
+        self.stats['miss'] += 1
+        (left, left_indices), (right, right_indices) = (self._evaluate(subtree, names, output) for subtree in tree)
+        result = self.backend.einsum('{},{}->{}'.format(left_indices, right_indices, indices), left, right)
+        self._cache[key] = result
+        return result, indices
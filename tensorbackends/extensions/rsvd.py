@@ -5,15 +5,14 @@ def rsvd(backend, a, rank, niter, oversamp):
     r = min(rank + oversamp, m, n)
     # find subspace
     q = backend.random.uniform(low=-1.0, high=1.0, size=(n, r)).astype(dtype)
-    a_H = a.H
-    a_H_a = a_H @ a
+    # a.H is applied as conj(a.T conj(y)), so a is never copied
     for i in range(niter):
-        q = a_H_a @ q
+        q = backend.einsum('ij,ik->jk', a, a @ q, conj=(True, False))
         q, _ = backend.qr(q)
     q = a @ q
     q, _ = backend.qr(q)
     # svd in subspace
-    a_sub = q.H @ a
+    a_sub = backend.einsum('ij,ik->jk', q, a, conj=(True, False))
     u_sub, s, vh = backend.svd(a_sub)
     u = q @ u_sub
     if rank < r:
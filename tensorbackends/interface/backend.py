@@ -4,6 +4,7 @@ This module defines the interface of a backend.
 
 from . import options
 from .. import extensions
+from ..utils import cache, einstr, elementwise, executor, profile
 
 
 class Backend:
@@ -13,6 +14,48 @@ class Backend:
             cls._instance = super().__new__(cls)
         return cls._instance
 
+    _einsum_cache = None
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'einsum' in cls.__dict__:
+            cls.einsum = extensions.conjugated(cache.cached_einsum(cls.__dict__['einsum']))
+        profile.instrument(cls)
+
+    @property
+    def einsum_cache(self):
+        return self._einsum_cache
+
+    def enable_einsum_cache(self, max_bytes=2**28):
+        self._einsum_cache = cache.EinsumCache(max_bytes)
+        return self._einsum_cache
+
+    def disable_einsum_cache(self):
+        self._einsum_cache = None
+
+    def profile(self):
+        return profile.Profile(self)
+
+    _executor = None
+    @property
+    def executor(self):
+        if self._executor is None:
+            # the operations of a distributed backend are collectives that every rank has to call
+            # in the same order, which dependency-driven scheduling does not guarantee
+            self._executor = executor.Executor(ordered=self.distributed and self.nproc > 1)
+        return self._executor
+
+    def submit(self, func, *args, **kwargs):
+        # func is a callable or the name of a backend method; futures among the arguments are
+        # waited for and replaced by their results
+        if isinstance(func, str):
+            func = getattr(self, func)
+        return self.executor.submit(func, *args, **kwargs)
+
+    def shutdown_executor(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait)
+            self._executor = None
+
     @property
     def name(self):
         raise NotImplementedError()
@@ -25,6 +68,11 @@ class Backend:
     def rank(self):
         raise NotImplementedError()
 
+    @property
+    def distributed(self):
+        # whether tensors are spread over the ranks rather than held by each process
+        return False
+
     @property
     def random(self):
         raise NotImplementedError()
@@ -60,12 +108,24 @@ class Backend:
     def load(self, filename):
         raise NotImplementedError()
 
+    def from_local(self, shape, inds, vals, dtype=float):
+        # every rank passes its own entries, so no rank holds the whole tensor
+        result = self.zeros(shape, dtype=dtype)
+        result.write(inds, vals)
+        return result
+
+    def convert(self, tensor, target, root=0):
+        return extensions.convert(self, tensor, target, root)
+
     def moveaxis(self, a, source, destination):
         return extensions.moveaxis(self, a, source, destination)
 
-    def einsum(self, subscripts, *operands):
+    def einsum(self, subscripts, *operands, conj=None):
         raise NotImplementedError()
 
+    def einsum_async(self, subscripts, *operands, conj=None):
+        return self.submit('einsum', subscripts, *operands, conj=conj)
+
     def einsvd(self, subscripts, a, option=options.ReducedSVD()):
         if isinstance(option, options.ReducedSVD):
             return self.einsvd_reduced(subscripts, a, option.rank)
@@ -74,6 +134,9 @@ class Backend:
         else:
             raise ValueError('{} is not a valid option for einsvd'.format(type(option).__qualname__))
 
+    def einsvd_async(self, subscripts, a, option=options.ReducedSVD()):
+        return self.submit('einsvd', subscripts, a, option)
+
     def einsvd_reduced(self, subscripts, a, rank=None):
         raise NotImplementedError()
 
@@ -83,6 +146,9 @@ class Backend:
     def einqr(self, subscripts, a):
         return extensions.einqr(self, subscripts, a)
 
+    def einqr_async(self, subscripts, a):
+        return self.submit('einqr', subscripts, a)
+
     def einsumsvd(self, subscripts, *operands, option=options.ReducedSVD()):
         if isinstance(option, options.ReducedSVD):
             return self.einsumsvd_reduced(subscripts, *operands, rank=option.rank)
@@ -93,6 +159,21 @@ class Backend:
         else:
             raise ValueError('{} is not a valid option for einsumsvd'.format(type(option).__qualname__))
 
+    def einsumsvd_async(self, subscripts, *operands, option=options.ReducedSVD()):
+        return self.submit('einsumsvd', subscripts, *operands, option=option)
+
+    def svd_cost(self, subscripts, shapes, option=options.ReducedSVD(), path=None):
+        # the estimated cost of einsvd or einsumsvd with option on operands of the given shapes
+        expr = einstr.parse(subscripts)
+        if isinstance(option, options.ReducedSVD):
+            return expr.svd_cost_reduced(shapes, option.rank, path)
+        elif isinstance(option, options.RandomizedSVD):
+            return expr.svd_cost_rand(shapes, option.rank, option.niter, option.oversamp, path)
+        elif isinstance(option, options.ImplicitRandomizedSVD):
+            return expr.svd_cost_implicit_rand(shapes, option.rank, option.niter)
+        else:
+            raise ValueError('{} is not a valid option for einsumsvd'.format(type(option).__qualname__))
+
     def einsumsvd_reduced(self, subscripts, *operands, rank=None):
         raise NotImplementedError()
 
@@ -102,6 +183,15 @@ class Backend:
     def einsumsvd_implicit_rand(self, subscripts, *operands, rank, niter=1):
         return extensions.einsumsvd_implicit_rand(self, subscripts, *operands, rank=rank, niter=niter)
 
+    def evaluate(self, expression, **operands):
+        program = elementwise.parse(expression)
+        functions = {name: abs if name == 'abs' else getattr(self, name) for name in program.functions}
+        reductions = {program.reduction: getattr(self, program.reduction)} if program.reduction is not None else {}
+        result = program.evaluate(functions, reductions, operands)
+        if program.reduction is not None and isinstance(result, self.tensor):
+            result = result.numpy().item()
+        return result
+
     def isclose(self, a, b, *, rtol=1e-9, atol=0.0):
         raise NotImplementedError()
 
@@ -116,3 +206,9 @@ class Backend:
 
     def rsvd(self, a, rank, niter=1, oversamp=5):
         return extensions.rsvd(self, a, rank, niter, oversamp)
+
+    def network(self):
+        return extensions.TensorNetwork(self)
+
+
+profile.instrument(Backend)
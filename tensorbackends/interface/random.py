@@ -20,3 +20,6 @@ class Random:
 
     def uniform(self, low=0.0, high=1.0, size=None):
         raise NotImplementedError()
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        raise NotImplementedError()
@@ -2,6 +2,9 @@
 This module defines the interface of a tensor.
 """
 
+import numpy as np
+
+
 class Tensor:
     @property
     def backend(self):
@@ -35,9 +38,24 @@ class Tensor:
     def astype(self, dtype):
         raise NotImplementedError()
 
-    def write(self, inds, vals):
+    def read(self, inds):
+        raise NotImplementedError()
+
+    def write(self, inds, vals, accumulate=False):
         raise NotImplementedError()
 
+    def read_local(self):
+        # the flat indices and values of the entries held by this rank
+        inds = np.arange(self.size)
+        return inds, self.read(inds)
+
+    @property
+    def version(self):
+        return self.__dict__.get('_version', 0)
+
+    def _touch(self):
+        self.__dict__['_version'] = self.version + 1
+
     @property
     def T(self):
         return self.transpose(1, 0)
@@ -0,0 +1,252 @@
+"""
+This module implements benchmark utilities.
+"""
+
+import argparse, functools, importlib.util, inspect, json, os, platform, statistics, sys, time, tracemalloc
+
+from ..version import VERSION
+
+
+# backends whose tensors are numpy arrays of the calling process, so that tracemalloc sees their
+# allocations; torch, ctf and the shared memory of numpy-mp allocate outside of it
+TRACED_BACKENDS = ('numpy', 'chunked', 'blocksparse', 'lazy')
+
+
+class Case:
+    # a benchmarked callable; flops or nbytes give the work of one call for the throughput
+    def __init__(self, func, flops=None, nbytes=None, setup=None):
+        self.func = func
+        self.flops = flops
+        self.nbytes = nbytes
+        self.setup = setup
+
+
+def benchmark_with_backend(required=['numpy'], optional=['ctf', 'ctfview', 'chunked', 'torch', 'lazy', 'numpy-mp'], sizes=[None]):
+    from .. import backends
+    def instantiate_benchmark_method(name, method, tb_name):
+        new_name = '{}_{}'.format(name, tb_name)
+        @functools.wraps(method)
+        def new_method(self, size):
+            tb = backends.get(tb_name)
+            return method(self, tb, size)
+        new_method.__name__ = new_name
+        new_method.benchmark = name
+        new_method.backend = tb_name
+        new_method.available = backends.isavailable(tb_name)
+        return new_name, new_method
+    def decorator(cls):
+        benchmark_methods = [
+            (name, method)
+            for name, method in inspect.getmembers(cls, inspect.isfunction)
+            if name.startswith('bench')
+        ]
+        for name, method in benchmark_methods:
+            delattr(cls, name)
+            for tb_name in [*required, *optional]:
+                new_name, new_method = instantiate_benchmark_method(name, method, tb_name)
+                setattr(cls, new_name, new_method)
+        cls.sizes = list(sizes)
+        return cls
+    return decorator
+
+
+def collect(path):
+    # benchmark classes from a module file or from the bench*.py files of a directory
+    if os.path.isdir(path):
+        filenames = sorted(os.path.join(path, name) for name in os.listdir(path) if name.startswith('bench') and name.endswith('.py'))
+    else:
+        filenames = [path]
+    classes = []
+    for filename in filenames:
+        module_name = os.path.splitext(os.path.basename(filename))[0]
+        spec = importlib.util.spec_from_file_location(module_name, filename)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        classes.extend(
+            cls for _, cls in inspect.getmembers(module, inspect.isclass)
+            if cls.__module__ == module_name and hasattr(cls, 'sizes')
+        )
+    return classes
+
+
+def force(result):
+    # lazy results are evaluated so that the work is inside the timed region
+    values = result if isinstance(result, (tuple, list)) else (result,)
+    for value in values:
+        if callable(getattr(type(value), 'evaluate', None)):
+            value.evaluate()
+    return result
+
+
+def measure(case, repeat=5, warmup=1, memory=True):
+    if not isinstance(case, Case):
+        case = Case(case)
+    call = lambda: force(case.func())
+    for _ in range(warmup):
+        if case.setup is not None:
+            case.setup()
+        call()
+    times = []
+    for _ in range(repeat):
+        if case.setup is not None:
+            case.setup()
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    result = {
+        'time': min(times),
+        'median': statistics.median(times),
+        'repeat': repeat,
+        'throughput': None,
+        'unit': None,
+        'peak_traced_bytes': None,
+    }
+    if case.flops is not None:
+        result['throughput'], result['unit'] = case.flops / result['time'], 'FLOP/s'
+    elif case.nbytes is not None:
+        result['throughput'], result['unit'] = case.nbytes / result['time'], 'B/s'
+    if memory:
+        # a separate untimed call, since tracing slows the allocations down; only allocations
+        # reported to tracemalloc (python and numpy) are seen, hence the name of the metric
+        if case.setup is not None:
+            case.setup()
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        call()
+        result['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1] - baseline
+        if not tracing:
+            tracemalloc.stop()
+    return result
+
+
+def run(classes, backends=None, pattern=None, sizes=None, repeat=5, memory=True, log=None):
+    results = []
+    for cls in classes:
+        instance = cls()
+        for name, method in inspect.getmembers(cls, inspect.isfunction):
+            if not hasattr(method, 'backend') or not method.available:
+                continue
+            if backends is not None and method.backend not in backends:
+                continue
+            key = '{}.{}'.format(cls.__name__, method.benchmark)
+            if pattern is not None and pattern not in key:
+                continue
+            for size in (cls.sizes if sizes is None else [s for s in cls.sizes if s in sizes]):
+                # a benchmark may return variants of a case by name, or None to skip a size;
+                # unsupported operations are reported rather than ending the run
+                try:
+                    cases = method(instance, size)
+                except Exception as e:
+                    cases = {None: e}
+                if cases is None:
+                    continue
+                for variant, case in (cases.items() if isinstance(cases, dict) else [(None, cases)]):
+                    name = key if variant is None else '{}[{}]'.format(key, variant)
+                    result = {'benchmark': name, 'backend': method.backend, 'size': size}
+                    try:
+                        if isinstance(case, Exception):
+                            raise case
+                        # the peak memory is only comparable between backends that tracemalloc sees
+                        traced = memory and method.backend in TRACED_BACKENDS
+                        result.update(measure(case, repeat=repeat, memory=traced))
+                    except Exception as e:
+                        result['error'] = '{}: {}'.format(type(e).__name__, e)
+                    results.append(result)
+                    if log is not None:
+                        log(format_result(result))
+    return results
+
+
+def metadata():
+    import numpy
+    return {
+        'tensorbackends': VERSION,
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump({'metadata': metadata(), 'results': results}, f, indent=1)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare(results, baseline, threshold=0.1):
+    # pairs results with the baseline by benchmark, backend and size; a regression is a slowdown
+    # of the best time beyond the threshold
+    key = lambda result: (result['benchmark'], result['backend'], json.dumps(result['size']))
+    previous = {key(result): result for result in baseline}
+    comparisons = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None or 'error' in result or 'error' in old:
+            continue
+        ratio = result['time'] / old['time'] if old['time'] > 0 else float('inf')
+        comparisons.append({
+            'benchmark': result['benchmark'],
+            'backend': result['backend'],
+            'size': result['size'],
+            'baseline': old['time'],
+            'time': result['time'],
+            'ratio': ratio,
+            'regression': ratio > 1 + threshold,
+        })
+    return comparisons
+
+
+def format_result(result):
+    if 'error' in result:
+        return '{:<52} {:<10} {:>10}   {}'.format(result['benchmark'], result['backend'], str(result['size']), result['error'])
+    throughput = '' if result['throughput'] is None else '{:.3g} {}'.format(result['throughput'], result['unit'])
+    peak = '' if result['peak_traced_bytes'] is None else '{:.3g} MB traced'.format(result['peak_traced_bytes'] / 2**20)
+    return '{:<52} {:<10} {:>10} {:>10.3f}ms {:>16} {:>17}'.format(
+        result['benchmark'], result['backend'], str(result['size']), result['time'] * 1e3, throughput, peak)
+
+
+def format_comparison(comparison):
+    return '{:<52} {:<10} {:>10} {:>10.3f}ms {:>10.3f}ms {:>7.2f}x{}'.format(
+        comparison['benchmark'], comparison['backend'], str(comparison['size']), comparison['baseline'] * 1e3,
+        comparison['time'] * 1e3, comparison['ratio'], '  REGRESSION' if comparison['regression'] else '')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run tensorbackends benchmarks.')
+    parser.add_argument('path', nargs='?', default='benchmarks', help='a benchmark file or directory')
+    parser.add_argument('--backends', nargs='+', help='only run these backends')
+    parser.add_argument('--filter', help='only run benchmarks whose name contains this string')
+    parser.add_argument('--sizes', type=json.loads, nargs='+', help='only run these sizes')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip the peak traced memory measurement')
+    parser.add_argument('--output', help='save the results as json')
+    parser.add_argument('--baseline', help='compare with the results saved in this json file')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown counted as a regression')
+    args = parser.parse_args(argv)
+    results = run(collect(args.path), args.backends, args.filter, args.sizes, args.repeat, args.memory, log=print)
+    if args.output is not None:
+        save(results, args.output)
+    if args.baseline is not None:
+        comparisons = compare(results, load(args.baseline), args.threshold)
+        print()
+        for comparison in comparisons:
+            print(format_comparison(comparison))
+        if any(comparison['regression'] for comparison in comparisons):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    # run from the imported module, so that the benchmark files see the same Case class
+    from tensorbackends.utils import benchmark
+    sys.exit(benchmark.main())
@@ -0,0 +1,119 @@
+"""
+This module implements the einsum cache.
+"""
+
+import collections, functools, threading, weakref
+
+import numpy as np
+
+from . import einstr
+
+
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=1024)
+def canonical(subscripts, ndims):
+    return str(einstr.parse_einsum(subscripts, ndims))
+
+
+def cached_einsum(func):
+    @functools.wraps(func)
+    def einsum(self, subscripts, *operands):
+        cache = self._einsum_cache
+        key = cache.key(subscripts, operands) if cache is not None else None
+        if key is None:
+            return func(self, subscripts, *operands)
+        result = cache.get(key)
+        if result is _MISSING:
+            result = func(self, subscripts, *operands)
+            cache.put(key, operands, copy(result))
+        return result
+    return einsum
+
+
+class EinsumCache:
+    # entries are private copies and every hit hands out a copy of its own, so results never
+    # share storage; mutations of operands through the tensor interface invalidate entries, but
+    # mutations of unwrapped tensors or views of operands are not tracked
+    def __init__(self, max_bytes=2**28):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._nbytes = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+            'entries': len(self._entries),
+            'nbytes': self._nbytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def key(self, subscripts, operands):
+        try:
+            expr = canonical(subscripts, tuple(operand.ndim for operand in operands))
+        except Exception:
+            return None
+        return expr, tuple((id(operand), operand.version) for operand in operands)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy(entry[1])
+
+    def put(self, key, operands, result):
+        nbytes = sizeof(result)
+        if nbytes > self.max_bytes:
+            return
+        discard = lambda ref: self._discard(key)
+        try:
+            refs = tuple(weakref.ref(operand, discard) for operand in operands)
+        except TypeError:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (refs, result, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._nbytes -= entry[2]
+
+
+def copy(value):
+    return value.copy() if hasattr(value, 'copy') else value
+
+def sizeof(value):
+    if hasattr(value, 'size') and hasattr(value, 'dtype'):
+        return int(value.size) * np.dtype(value.dtype).itemsize
+    return np.asarray(value).nbytes
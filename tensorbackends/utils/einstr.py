@@ -78,6 +78,27 @@ def split_einsumsvd(expr):
     return einsum_expr, einsvd_expr
 
 
+def prod(iterable):
+    return functools.reduce(operator.mul, iterable, 1)
+
+
+class Cost:
+    # estimated flops and sizes in number of elements; a multiply-add counts as two flops
+    def __init__(self, flops=0, intermediate=0, output=0):
+        self.flops = flops
+        self.intermediate = intermediate
+        self.output = output
+
+    def nbytes(self, itemsize=8):
+        return max(self.intermediate, self.output) * itemsize
+
+    def __str__(self):
+        return 'Cost(flops={},intermediate={},output={})'.format(self.flops, self.intermediate, self.output)
+
+    def __repr__(self):
+        return str(self)
+
+
 class Expression:
     def __init__(self, inputs, outputs, source=''):
         self.inputs = inputs
@@ -134,6 +155,164 @@ class Expression:
         newoutputs = [t.expand(ellipsis) for t in self.outputs]
         return Expression(newinputs, newoutputs, source=self.source)
 
+    def index_sizes(self, shapes):
+        if len(shapes) != len(self.inputs):
+            raise ValueError('number of shapes does not match subscripts "{}": {}'.format(self.source, len(shapes)))
+        sizes = {}
+        for term, shape in zip(self.inputs, shapes):
+            if len(shape) != len(term):
+                raise ValueError('indices "{}" do not match shape: {}'.format(str(term), tuple(shape)))
+            for idx, size in zip(term, shape):
+                if sizes.setdefault(idx, size) != size:
+                    if sizes[idx] != 1 and size != 1:
+                        raise ValueError('inconsistent sizes for index {}: {} and {}'.format(chars[idx], sizes[idx], size))
+                    sizes[idx] = max(sizes[idx], size)
+        return sizes
+
+    def greedy_path(self, shapes):
+        # pairwise contractions, each time the pair whose result grows the least
+        expr = self.match([len(shape) for shape in shapes])
+        sizes = expr.index_sizes(shapes)
+        terms = [frozenset(term) for term in expr.inputs]
+        output = frozenset(expr.output_indices)
+        if len(terms) == 1:
+            return [(0,)]
+        path = []
+        while len(terms) > 1:
+            def score(pair):
+                newterm, flops = _contract(terms, pair, output)
+                growth = prod(sizes[idx] for idx in newterm) - sum(prod(sizes[idx] for idx in terms[k]) for k in pair)
+                return growth, flops(sizes)
+            pair = min(itertools.combinations(range(len(terms)), 2), key=score)
+            newterm, _ = _contract(terms, pair, output)
+            terms = [term for k, term in enumerate(terms) if k not in pair] + [newterm]
+            path.append(pair)
+        return path
+
+    def optimal_path(self, shapes, limit=10):
+        # the pairwise contraction tree with the fewest flops by dynamic programming over subsets
+        # of operands; greedy beyond limit operands
+        expr = self.match([len(shape) for shape in shapes])
+        n = len(expr.inputs)
+        if n <= 2 or n > limit:
+            return expr.greedy_path(shapes)
+        sizes = expr.index_sizes(shapes)
+        terms = [frozenset(term) for term in expr.inputs]
+        output = frozenset(expr.output_indices)
+        full = (1 << n) - 1
+        union = [frozenset()] * (full + 1)
+        for mask in range(1, full + 1):
+            low = mask & -mask
+            union[mask] = union[mask ^ low] | terms[low.bit_length() - 1]
+        kept = [union[mask] & (union[full ^ mask] | output) for mask in range(full + 1)]
+        best = {1 << i: (0, i) for i in range(n)}
+        for mask in range(1, full + 1):
+            if mask & (mask - 1) == 0:
+                continue
+            low = mask & -mask
+            # submasks containing the lowest operand, so that every split is seen once
+            sub = (mask - 1) & mask
+            while sub:
+                if sub & low and sub != mask:
+                    other = mask ^ sub
+                    left = terms[sub.bit_length() - 1] if sub & (sub - 1) == 0 else kept[sub]
+                    right = terms[other.bit_length() - 1] if other & (other - 1) == 0 else kept[other]
+                    involved = left | right
+                    flops = (1 + (kept[mask] != involved)) * prod(sizes[idx] for idx in involved)
+                    flops += best[sub][0] + best[other][0]
+                    if mask not in best or flops < best[mask][0]:
+                        best[mask] = flops, (best[sub][1], best[other][1])
+                sub = (sub - 1) & mask
+        # the tree in the positional format of einsum_path
+        path, current = [], list(range(n))
+        def visit(tree):
+            if isinstance(tree, int):
+                return tree
+            left, right = visit(tree[0]), visit(tree[1])
+            positions = tuple(sorted((current.index(left), current.index(right))))
+            current.remove(left)
+            current.remove(right)
+            current.append(tree)
+            path.append(positions)
+            return tree
+        visit(best[full][1])
+        return path
+
+    def cost(self, shapes, path=None):
+        # the cost of an einsum, contracting along path (numpy einsum_path format; greedy if None)
+        expr = self.match([len(shape) for shape in shapes])
+        if len(expr.outputs) != 1:
+            raise ValueError('expect one output for einsum: "{}"'.format(expr.source))
+        sizes = expr.index_sizes(shapes)
+        if path is None:
+            path = expr.greedy_path(shapes)
+        elif path and path[0] == 'einsum_path':
+            path = path[1:]
+        terms = [frozenset(term) for term in expr.inputs]
+        output = frozenset(expr.output_indices)
+        flops = intermediate = 0
+        for positions in path:
+            positions = tuple(positions)
+            if len(set(positions)) != len(positions) or not all(0 <= k < len(terms) for k in positions):
+                raise ValueError('invalid contraction path for "{}": {}'.format(expr.source, path))
+            newterm, step_flops = _contract(terms, positions, output)
+            terms = [term for k, term in enumerate(terms) if k not in positions] + [newterm]
+            flops += step_flops(sizes)
+            if len(terms) > 1:
+                intermediate = max(intermediate, prod(sizes[idx] for idx in newterm))
+        if len(terms) != 1:
+            raise ValueError('contraction path does not contract all operands of "{}": {}'.format(expr.source, path))
+        return Cost(flops, intermediate, prod(sizes[idx] for idx in expr.outputs[0]))
+
+    def svd_cost_reduced(self, shapes, rank=None, path=None):
+        # the cost of an einsvd or einsumsvd with a reduced svd; path applies to the contraction
+        # of the inputs
+        contraction, m, n = self._factorized_cost(shapes, path)
+        k = min(m, n)
+        r = k if rank is None else min(rank, k)
+        intermediate = max(contraction.intermediate, contraction.output, m * k + k + k * n)
+        return Cost(contraction.flops + 4 * m * n * k, intermediate, m * r + r + r * n)
+
+    def svd_cost_rand(self, shapes, rank, niter=1, oversamp=5, path=None):
+        # the cost of an einsvd or einsumsvd with a randomized svd
+        contraction, m, n = self._factorized_cost(shapes, path)
+        k = min(m, n)
+        r = min(rank, k)
+        l = min(rank + oversamp, k)
+        flops = 2 * m * n * l * (2 * niter + 2) + 2 * (niter + 1) * max(m, n) * l * l + 4 * l * l * n + 2 * m * l * l
+        intermediate = max(contraction.intermediate, contraction.output, m * l + l + l * n)
+        return Cost(contraction.flops + flops, intermediate, m * r + r + r * n)
+
+    def svd_cost_implicit_rand(self, shapes, rank, niter=1):
+        # the cost of an einsumsvd that applies the operands to blocks of vectors instead of
+        # contracting them
+        expr = self.match([len(shape) for shape in shapes])
+        newindex, m, n = _matrix_sizes(expr, shapes)
+        r = min(rank, m, n)
+        sizes = expr.index_sizes(shapes)
+        sizes[newindex] = r
+        applications = []
+        for source, target in ((expr.outputs[1], expr.outputs[0]), (expr.outputs[0], expr.outputs[1])):
+            operator_expr = Expression([*expr.inputs, InputTerm(list(source), '')], [OutputTerm(list(target), [], '')], source=expr.source)
+            applications.append(operator_expr.cost([*shapes, tuple(sizes[idx] for idx in source)]))
+        flops = (niter + 1) * (sum(c.flops for c in applications) + 2 * (m + n) * r * r) + 4 * m * r * r + 2 * n * r * r
+        intermediate = max(max(c.intermediate for c in applications), m * r, n * r)
+        return Cost(flops, intermediate, m * r + r + r * n)
+
+    def qr_cost(self, shapes):
+        # the cost of an einqr; householder factorization and forming q
+        contraction, m, n = self._factorized_cost(shapes)
+        k = min(m, n)
+        flops = contraction.flops + 4 * m * n * k - 4 * k ** 3 // 3
+        return Cost(flops, max(contraction.intermediate, contraction.output), m * k + k * n)
+
+    def _factorized_cost(self, shapes, path=None):
+        # the cost of contracting the inputs, and the matrix sizes of the factorized tensor
+        expr = self.match([len(shape) for shape in shapes])
+        _, m, n = _matrix_sizes(expr, shapes)
+        einsum_expr, _ = split_einsumsvd(expr)
+        return einsum_expr.cost(shapes, path), m, n
+
     def __str__(self):
         inputs = ','.join(str(t) for t in self.inputs)
         outputs = ','.join(str(t) for t in self.outputs)
@@ -143,6 +322,28 @@ class Expression:
         return "Expression('{}')".format(str(self))
 
 
+def _contract(terms, positions, output):
+    # indices survive a step if they appear in the other terms or in the output
+    others = set(output).union(*(term for k, term in enumerate(terms) if k not in positions))
+    involved = frozenset().union(*(terms[k] for k in positions))
+    newterm = frozenset(idx for idx in involved if idx in others)
+    multiplier = len(positions) - 1 + (1 if newterm != involved else 0)
+    return newterm, lambda sizes: multiplier * prod(sizes[idx] for idx in involved)
+
+
+def _matrix_sizes(expr, shapes):
+    if len(expr.outputs) != 2:
+        raise ValueError('expect two outputs: "{}"'.format(expr.source))
+    newindices = expr.output_indices - expr.input_indices
+    if len(newindices) != 1:
+        raise ValueError('expect one new index in outputs: "{}"'.format(expr.source))
+    newindex = newindices.pop()
+    sizes = expr.index_sizes(shapes)
+    m = prod(sizes[idx] for idx in expr.outputs[0] if idx != newindex)
+    n = prod(sizes[idx] for idx in expr.outputs[1] if idx != newindex)
+    return newindex, m, n
+
+
 class InputTerm:
     def __init__(self, indices, source):
         self.indices = indices
@@ -0,0 +1,198 @@
+"""
+This module implements fused evaluation of elementwise expressions.
+"""
+
+import ast, concurrent.futures, functools, numbers, os, threading
+
+import numpy as np
+
+
+CHUNK_BYTES = 2**18
+
+# below this size the chunks are evaluated in the calling thread
+THREAD_BYTES = 2**22
+
+NTHREADS = os.cpu_count() or 1
+
+FUNCTIONS = {
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'exp': np.exp,
+    'log': np.log,
+    'sin': np.sin,
+    'cos': np.cos,
+    'tanh': np.tanh,
+    'real': np.real,
+    'imag': np.imag,
+    'conj': np.conj,
+    'minimum': np.minimum,
+    'maximum': np.maximum,
+    'where': np.where,
+}
+
+REDUCTIONS = {
+    'all': np.all,
+    'any': np.any,
+    'sum': np.sum,
+}
+
+_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Constant, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.BitAnd, ast.BitOr, ast.BitXor,
+    ast.USub, ast.UAdd, ast.Invert, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+
+class Program:
+    def __init__(self, source, body, names, functions, reduction):
+        self.source = source
+        self.body = body
+        self.names = names
+        self.functions = functions
+        self.reduction = reduction
+
+    def __call__(self, functions, operands):
+        namespace = {'__builtins__': {}}
+        namespace.update((name, functions[name]) for name in self.functions)
+        namespace.update(operands)
+        return eval(self.body, namespace)
+
+    def evaluate(self, functions, reductions, operands):
+        missing = set(self.names) - set(operands)
+        if missing:
+            raise ValueError('missing operands for expression "{}": {}'.format(self.source, ', '.join(sorted(missing))))
+        value = self(functions, operands)
+        return reductions[self.reduction](value) if self.reduction is not None else value
+
+    def __repr__(self):
+        return 'Program({!r})'.format(self.source)
+
+
+@functools.lru_cache(maxsize=256)
+def parse(source):
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError('invalid expression: "{}"'.format(source)) from e
+    reduction = None
+    node = tree.body
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in REDUCTIONS:
+        if len(node.args) != 1 or node.keywords:
+            raise ValueError('reduction {} takes exactly one argument: "{}"'.format(node.func.id, source))
+        reduction, node = node.func.id, node.args[0]
+    names, functions = set(), set()
+    callees = {id(child.func) for child in ast.walk(node) if isinstance(child, ast.Call)}
+    for child in ast.walk(node):
+        if not isinstance(child, _NODES):
+            raise ValueError('unsupported syntax {} in expression: "{}"'.format(type(child).__name__, source))
+        if isinstance(child, ast.Constant) and not isinstance(child.value, numbers.Number):
+            raise ValueError('unsupported constant {!r} in expression: "{}"'.format(child.value, source))
+        if isinstance(child, ast.Compare) and len(child.ops) != 1:
+            raise ValueError('chained comparisons are not supported: "{}"'.format(source))
+        if isinstance(child, ast.Call):
+            if not isinstance(child.func, ast.Name) or child.func.id not in FUNCTIONS or child.keywords:
+                raise ValueError('unsupported function call in expression: "{}"'.format(source))
+            functions.add(child.func.id)
+        elif isinstance(child, ast.Name) and id(child) not in callees:
+            names.add(child.id)
+    if names & functions:
+        raise ValueError('operand names shadow functions: {}'.format(', '.join(sorted(names & functions))))
+    body = compile(ast.Expression(node), '<expression>', 'eval')
+    return Program(source, body, tuple(sorted(names)), tuple(sorted(functions)), reduction)
+
+
+def chunks(shape, itemsize, chunk_bytes=CHUNK_BYTES):
+    # yields keys of leading-axis slices of about chunk_bytes each
+    if not shape:
+        yield ()
+        return
+    row = int(np.prod(shape[1:], dtype=int)) * itemsize
+    if row <= chunk_bytes or len(shape) == 1:
+        step = max(1, chunk_bytes // max(row, 1))
+        for start in range(0, shape[0], step):
+            yield (slice(start, min(start + step, shape[0])),)
+    else:
+        for i in range(shape[0]):
+            for key in chunks(shape[1:], itemsize, chunk_bytes):
+                yield (i, *key)
+
+
+_pool, _pool_size, _pool_lock = None, 0, threading.Lock()
+
+
+def get_pool(nthreads):
+    # one pool shared by all calls, grown when more threads are asked for
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool_size < nthreads:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool, _pool_size = concurrent.futures.ThreadPoolExecutor(nthreads), nthreads
+        return _pool
+
+
+def _reset_pool():
+    # the threads of the pool do not survive a fork
+    global _pool, _pool_size, _pool_lock
+    _pool, _pool_size, _pool_lock = None, 0, threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pool)
+
+
+def evaluate_arrays(program, operands, chunk_bytes=CHUNK_BYTES, nthreads=NTHREADS, thread_bytes=THREAD_BYTES):
+    # every chunk holds its temporaries in cache, and the chunks of large arrays are spread over a
+    # shared thread pool
+    operands = {name: value if isinstance(value, numbers.Number) else np.asarray(value) for name, value in operands.items()}
+    arrays = [value for value in operands.values() if isinstance(value, np.ndarray) and value.ndim > 0]
+    shape = np.broadcast_shapes(*(array.shape for array in arrays)) if arrays else ()
+    itemsize = max((array.dtype.itemsize for array in arrays), default=1)
+    nbytes = int(np.prod(shape, dtype=int)) * itemsize
+    if nbytes <= chunk_bytes:
+        return program.evaluate(FUNCTIONS, REDUCTIONS, operands)
+    nthreads = max(1, nthreads)
+    operands = {name: np.broadcast_to(value, shape) if isinstance(value, np.ndarray) else value for name, value in operands.items()}
+    def run(key):
+        return program.evaluate(FUNCTIONS, REDUCTIONS, {
+            name: value[key] if isinstance(value, np.ndarray) else value for name, value in operands.items()
+        })
+    keys = list(chunks(shape, itemsize, chunk_bytes))
+    mapped = get_pool(nthreads).map if nthreads > 1 and nbytes >= thread_bytes else map
+    if program.reduction in ('all', 'any'):
+        # chunks are checked in waves so that the first deciding chunk stops the rest
+        stop = program.reduction == 'any'
+        for start in range(0, len(keys), nthreads):
+            if any(bool(result) == stop for result in mapped(run, keys[start:start+nthreads])):
+                return stop
+        return not stop
+    elif program.reduction == 'sum':
+        return sum(mapped(run, keys))
+    first = np.asarray(run(keys[0]))
+    out = np.empty(shape, dtype=first.dtype)
+    out[keys[0]] = first
+    def write(key):
+        out[key] = run(key)
+    list(mapped(write, keys[1:]))
+    return out
+
+
+def evaluate_distributed(program, first, tensors, scalars, nproc, rank):
+    # every rank evaluates the elements it owns in the distribution of the ctf tensor first, which
+    # all the other ctf tensors share the shape of
+    import ctf
+    inds, values = first.read_local()
+    arrays = {name: values if tsr is first else tsr.read(inds) for name, tsr in tensors.items()}
+    local = evaluate_arrays(program, {**scalars, **arrays})
+    if program.reduction is not None:
+        partial = ctf.zeros(nproc, dtype=np.result_type(local) if program.reduction == 'sum' else float)
+        partial.write([rank], [local])
+        total = partial.sum()
+        if program.reduction == 'all':
+            return bool(total == nproc)
+        elif program.reduction == 'any':
+            return bool(total > 0)
+        return total
+    result = ctf.tensor(first.shape, dtype=local.dtype)
+    result.write(inds, local)
+    return result
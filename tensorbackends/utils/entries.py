@@ -0,0 +1,50 @@
+"""
+This module implements the indices and values of bulk reads and writes.
+"""
+
+import numpy as np
+
+
+def flatten(inds, shape):
+    # row-major flat indices from either flat indices of any shape or a tuple of coordinate
+    # arrays, one per axis; also the shape the values take
+    if isinstance(inds, tuple):
+        if len(inds) != len(shape):
+            raise ValueError('number of coordinate arrays does not match ndim: {}'.format(len(inds)))
+        coords = np.broadcast_arrays(*(np.asarray(i, dtype=np.int64) for i in inds))
+        return np.ravel_multi_index(coords, shape).reshape(-1), coords[0].shape
+    inds = np.asarray(inds, dtype=np.int64)
+    size = int(np.prod(shape, dtype=np.int64))
+    if inds.size and (inds.min() < -size or inds.max() >= size):
+        raise IndexError('index out of bounds for size {}'.format(size))
+    return np.where(inds < 0, inds + size, inds).reshape(-1), inds.shape
+
+def values(vals, n, dtype=None):
+    vals = np.asarray(vals, dtype=dtype)
+    return vals.reshape(-1) if vals.size == n else np.broadcast_to(vals, (n,))
+
+def issorted(flat):
+    # strictly increasing, so also free of duplicates
+    return bool(np.all(flat[1:] > flat[:-1]))
+
+def assign(target, key, vals, accumulate=False, unique=False):
+    if not accumulate:
+        target[key] = vals
+    elif unique:
+        target[key] += vals
+    else:
+        np.add.at(target, key, vals)
+
+def read_array(array, flat, shape):
+    if array.flags.c_contiguous:
+        return array.reshape(-1)[flat].reshape(shape)
+    return array[np.unravel_index(flat, array.shape)].reshape(shape)
+
+def write_array(array, flat, vals, accumulate=False):
+    # duplicate indices are summed when accumulating; sorted indices take a plain fancy-indexed
+    # update instead of the unbuffered np.add.at
+    unique = accumulate and issorted(flat)
+    if array.flags.c_contiguous:
+        assign(array.reshape(-1), flat, vals, accumulate, unique)
+    else:
+        assign(array, np.unravel_index(flat, array.shape), vals, accumulate, unique)
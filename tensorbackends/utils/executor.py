@@ -0,0 +1,77 @@
+"""
+This module implements asynchronous execution of backend operations.
+"""
+
+import concurrent.futures, os, threading
+
+
+class Executor:
+    # a task is handed to a worker thread only once the futures among its arguments are done, so
+    # tasks waiting for their inputs never hold a worker; an ordered executor instead runs its
+    # tasks one at a time in submission order, where the inputs of a task are always done already
+    def __init__(self, max_workers=None, ordered=False):
+        self.ordered = ordered
+        self.max_workers = 1 if ordered else max_workers or os.cpu_count() or 1
+        self._pool = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix='tensorbackends')
+
+    def submit(self, func, *args, **kwargs):
+        future = concurrent.futures.Future()
+        dependencies = set(futures_in((args, kwargs)))
+        remaining = len(dependencies)
+        lock = threading.Lock()
+        def ready(dependency):
+            nonlocal remaining
+            with lock:
+                remaining -= 1
+                if remaining > 0:
+                    return
+            self._start(future, func, args, kwargs)
+        if self.ordered or not dependencies:
+            self._start(future, func, args, kwargs)
+            return future
+        for dependency in dependencies:
+            dependency.add_done_callback(ready)
+        return future
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def _start(self, future, func, args, kwargs):
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = func(*resolve(args), **resolve(kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+        try:
+            self._pool.submit(run)
+        except RuntimeError as e:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(e)
+
+
+def futures_in(value):
+    if isinstance(value, concurrent.futures.Future):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            yield from futures_in(v)
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from futures_in(v)
+
+def resolve(value):
+    # the failure of an input is raised as the failure of the task
+    if isinstance(value, concurrent.futures.Future):
+        return value.result()
+    elif isinstance(value, list):
+        return [resolve(v) for v in value]
+    elif isinstance(value, tuple):
+        return tuple(resolve(v) for v in value)
+    elif isinstance(value, dict):
+        return {k: resolve(v) for k, v in value.items()}
+    else:
+        return value
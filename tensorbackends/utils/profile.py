@@ -0,0 +1,255 @@
+"""
+This module implements profiling hooks for backend operations.
+"""
+
+import collections, functools, json, threading, time
+
+import numpy as np
+
+from . import einstr
+
+
+PROFILED = (
+    'einsum',
+    'einsvd', 'einsvd_reduced', 'einsvd_rand',
+    'einsumsvd', 'einsumsvd_reduced', 'einsumsvd_rand', 'einsumsvd_implicit_rand',
+    'einqr', 'svd', 'qr', 'rsvd', 'inv',
+)
+
+_hooks = []
+_local = threading.local()
+
+
+def add_hook(hook):
+    _hooks.append(hook)
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+class Record:
+    def __init__(self, backend, op, args, kwargs, result, start, elapsed, depth):
+        tensors = [v for v in (*args, *kwargs.values()) if is_tensor(v)]
+        self.backend = backend.name
+        self.rank = backend.rank
+        self.op = op
+        self.subscripts = args[0] if args and isinstance(args[0], str) else None
+        self.shapes = [tuple(v.shape) for v in tensors]
+        self.dtypes = [dtype_name(v.dtype) for v in tensors]
+        self.flops = estimate_flops(backend, op, self.subscripts, self.shapes, args, kwargs)
+        self.nbytes = output_bytes(result)
+        self.start = start
+        self.elapsed = elapsed
+        self.depth = depth
+        self.thread = threading.get_ident()
+
+    def asdict(self):
+        return {
+            'backend': self.backend,
+            'rank': self.rank,
+            'op': self.op,
+            'subscripts': self.subscripts,
+            'shapes': self.shapes,
+            'dtypes': self.dtypes,
+            'flops': self.flops,
+            'nbytes': self.nbytes,
+            'start': self.start,
+            'elapsed': self.elapsed,
+            'depth': self.depth,
+        }
+
+    def __repr__(self):
+        return 'Record({}, {!r}, {:.3g}s)'.format(self.op, self.subscripts, self.elapsed)
+
+
+class Profile:
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.records = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        add_hook(self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_hook(self._record)
+
+    def _record(self, record):
+        if self.backend is None or record.backend == self.backend.name:
+            with self._lock:
+                self.records.append(record)
+
+    def summary(self, sort='time'):
+        # records of the same operation and subscripts are aggregated; nested calls are counted
+        # in their callers too
+        keys = {'time': 'time', 'count': 'count', 'flops': 'flops', 'bytes': 'nbytes'}
+        if sort not in keys:
+            raise ValueError('invalid sort key: {} (expected one of {})'.format(sort, ', '.join(keys)))
+        groups = collections.OrderedDict()
+        for record in self.records:
+            entry = groups.setdefault((record.op, record.subscripts), {
+                'op': record.op, 'subscripts': record.subscripts, 'count': 0, 'time': 0.0, 'flops': 0, 'nbytes': 0,
+            })
+            entry['count'] += 1
+            entry['time'] += record.elapsed
+            entry['flops'] += record.flops or 0
+            entry['nbytes'] += record.nbytes
+        return sorted(groups.values(), key=lambda entry: entry[keys[sort]], reverse=True)
+
+    def report(self, sort='time', limit=None):
+        lines = ['{:<26} {:<28} {:>7} {:>11} {:>11} {:>10} {:>11}'.format(
+            'op', 'subscripts', 'count', 'total', 'mean', 'GFLOP/s', 'out bytes')]
+        for entry in self.summary(sort)[:limit]:
+            gflops = entry['flops'] / entry['time'] / 1e9 if entry['time'] > 0 and entry['flops'] else 0.0
+            lines.append('{:<26} {:<28} {:>7} {:>10.3f}ms {:>10.3f}ms {:>10.2f} {:>11}'.format(
+                entry['op'], entry['subscripts'] or '', entry['count'], entry['time'] * 1e3,
+                entry['time'] / entry['count'] * 1e3, gflops, entry['nbytes']))
+        return '\n'.join(lines)
+
+    def rank_times(self):
+        # the wall times of the records of every rank, one array per rank; collective on
+        # distributed backends
+        backend = self.backend
+        elapsed = np.array([record.elapsed for record in self.records], dtype=float)
+        if backend is None or backend.nproc == 1:
+            return [elapsed]
+        # ranks may hold different numbers of records, so the counts are shared first and every
+        # rank writes its times at the prefix sum of the counts before it
+        counts = backend.zeros(backend.nproc, dtype=np.int64)
+        counts.write([backend.rank], [elapsed.size])
+        offsets = np.concatenate([[0], np.cumsum(counts.numpy())])
+        if offsets[-1] == 0:
+            return [np.zeros(0) for _ in range(backend.nproc)]
+        times = backend.zeros(int(offsets[-1]))
+        times.write(np.arange(offsets[backend.rank], offsets[backend.rank+1]), elapsed)
+        times = times.numpy()
+        return [times[offsets[rank]:offsets[rank+1]] for rank in range(backend.nproc)]
+
+    def to_json(self, path=None):
+        data = json.dumps([record.asdict() for record in self.records], indent=1)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(data)
+        return data
+
+    def to_chrome_trace(self, path=None):
+        events = [{
+            'name': record.op if record.subscripts is None else '{} {}'.format(record.op, record.subscripts),
+            'cat': record.backend,
+            'ph': 'X',
+            'ts': record.start * 1e6,
+            'dur': record.elapsed * 1e6,
+            'pid': record.rank,
+            'tid': record.thread,
+            'args': {'shapes': record.shapes, 'dtypes': record.dtypes, 'flops': record.flops, 'nbytes': record.nbytes},
+        } for record in self.records]
+        data = json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(data)
+        return data
+
+
+def profiled(op, func):
+    @functools.wraps(func)
+    def method(self, *args, **kwargs):
+        if not _hooks:
+            return func(self, *args, **kwargs)
+        return call(self, op, func, (self, *args), kwargs, args)
+    return method
+
+def profiled_call(backend, op, func):
+    @functools.wraps(func)
+    def wrapped(*args, **kwargs):
+        if not _hooks:
+            return func(*args, **kwargs)
+        return call(backend, op, func, args, kwargs, args)
+    return wrapped
+
+def call(backend, op, func, args, kwargs, recorded_args):
+    depth = getattr(_local, 'depth', 0)
+    _local.depth = depth + 1
+    try:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    finally:
+        _local.depth = depth
+    record = Record(backend, op, recorded_args, kwargs, result, start, elapsed, depth)
+    for hook in list(_hooks):
+        hook(record)
+    return result
+
+def instrument(cls):
+    for op in PROFILED:
+        if op in cls.__dict__:
+            setattr(cls, op, profiled(op, cls.__dict__[op]))
+    if '__getattr__' in cls.__dict__:
+        getattr_func = cls.__dict__['__getattr__']
+        @functools.wraps(getattr_func)
+        def __getattr__(self, attr):
+            result = getattr_func(self, attr)
+            if callable(result) and not attr.startswith('_'):
+                return profiled_call(self, attr, result)
+            return result
+        cls.__getattr__ = __getattr__
+    return cls
+
+
+def is_tensor(value):
+    return hasattr(value, 'shape') and hasattr(value, 'dtype') and not isinstance(value, (str, np.generic))
+
+def output_bytes(result):
+    if isinstance(result, (tuple, list)):
+        return sum(output_bytes(value) for value in result)
+    if is_tensor(result):
+        return int(np.prod(result.shape, dtype=int)) * itemsize(result.dtype)
+    return 0
+
+def dtype_name(dtype):
+    try:
+        return str(np.dtype(dtype))
+    except TypeError:
+        return str(dtype)
+
+def itemsize(dtype):
+    try:
+        return np.dtype(dtype).itemsize
+    except TypeError:
+        return getattr(dtype, 'itemsize', 0)
+
+def estimate_flops(backend, op, subscripts, shapes, args, kwargs):
+    # the estimates of einstr.Expression, with the svd options of backend; None if there is none
+    def params(names, offset):
+        # the einsumsvd family takes the parameters as keywords only
+        values = dict(zip(names, args[offset:])) if op.startswith('einsvd') or op == 'rsvd' else {}
+        values.update((name, kwargs[name]) for name in names if name in kwargs)
+        return values
+    try:
+        if op == 'einsum':
+            return einstr.parse(subscripts).cost(shapes).flops
+        elif op == 'einqr':
+            return einstr.parse(subscripts).qr_cost(shapes).flops
+        elif op in ('einsvd', 'einsumsvd'):
+            option = kwargs.get('option', args[2] if op == 'einsvd' and len(args) > 2 else None)
+            cost = backend.svd_cost(subscripts, shapes) if option is None else backend.svd_cost(subscripts, shapes, option)
+            return cost.flops
+        elif op in ('einsvd_reduced', 'einsumsvd_reduced'):
+            return einstr.parse(subscripts).svd_cost_reduced(shapes, **params(('rank',), 2)).flops
+        elif op in ('einsvd_rand', 'einsumsvd_rand'):
+            return einstr.parse(subscripts).svd_cost_rand(shapes, **params(('rank', 'niter', 'oversamp'), 2)).flops
+        elif op == 'einsumsvd_implicit_rand':
+            return einstr.parse(subscripts).svd_cost_implicit_rand(shapes, **params(('rank', 'niter'), 2)).flops
+        elif op == 'svd' and len(shapes[0]) == 2:
+            return einstr.parse('ij->ia,aj').svd_cost_reduced(shapes).flops
+        elif op == 'rsvd' and len(shapes[0]) == 2:
+            return einstr.parse('ij->ia,aj').svd_cost_rand(shapes, **params(('rank', 'niter', 'oversamp'), 1)).flops
+        elif op == 'qr' and len(shapes[0]) == 2:
+            return einstr.parse('ij->ia,aj').qr_cost(shapes).flops
+        elif op == 'inv' and len(shapes[0]) == 2:
+            return 2 * shapes[0][0] ** 3
+    except Exception:
+        pass
+    return None
+
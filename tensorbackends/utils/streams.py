@@ -0,0 +1,64 @@
+"""
+This module implements counter-based random streams.
+"""
+
+import os
+
+import numpy as np
+
+
+GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+MASK = (1 << 64) - 1
+
+
+def mix(x):
+    # the splitmix64 finalizer; uint64 arithmetic wraps around
+    x = np.asarray(x, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+def entropy():
+    return int.from_bytes(os.urandom(8), 'little')
+
+def key(seed, counter):
+    # one independent stream per seed and draw
+    with np.errstate(over='ignore'):
+        return mix(mix(np.uint64(int(seed) & MASK)) + GAMMA * np.uint64(counter + 1))
+
+def substream(key, i):
+    return mix(key ^ mix(np.uint64(i + 1)))
+
+def bits(key, inds):
+    # the value at a global index depends only on the key, not on who computes it
+    inds = np.asarray(inds).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        return mix(key + (inds + np.uint64(1)) * GAMMA)
+
+def uniform(key, inds):
+    return (bits(key, inds) >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+def normal(key, inds):
+    # box-muller with the radius and the angle drawn from separate substreams
+    radius = np.sqrt(-2.0 * np.log1p(-uniform(substream(key, 0), inds)))
+    return radius * np.cos(2.0 * np.pi * uniform(substream(key, 1), inds))
+
+def draw(distribution, key, inds, dtype=float, **params):
+    dtype = np.dtype(dtype)
+    if dtype.kind not in 'fc':
+        raise TypeError('unsupported dtype for random values: {}'.format(dtype))
+    parts = [substream(key, 2), substream(key, 3)] if dtype.kind == 'c' else [key]
+    if distribution == 'uniform':
+        low, high = params.get('low', 0.0), params.get('high', 1.0)
+        values = [low + (high - low) * uniform(k, inds) for k in parts]
+    elif distribution == 'normal':
+        loc, scale = params.get('loc', 0.0), params.get('scale', 1.0)
+        # complex values split the variance evenly between the real and the imaginary part
+        values = [scale * normal(k, inds) / np.sqrt(len(parts)) for k in parts]
+        values[0] = values[0] + loc
+    else:
+        raise ValueError('unknown distribution: {}'.format(distribution))
+    value = values[0] + 1j * values[1] if dtype.kind == 'c' else values[0]
+    return value.astype(dtype)
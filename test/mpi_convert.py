@@ -0,0 +1,50 @@
+"""
+Checks scattering and gathering between numpy and the distributed backends across ranks.
+Run under MPI with two ranks, e.g.
+
+    mpirun -n 2 python test/mpi_convert.py
+
+It exits with status 77 when a backend does not run on two ranks.
+"""
+
+import importlib, sys
+
+import numpy as np
+
+import tensorbackends as tbs
+
+
+convert = importlib.import_module('tensorbackends.extensions.convert')
+
+
+NOT_DISTRIBUTED = 77
+
+
+def check(name):
+    tb = tbs.get(name)
+    if tb.nproc != 2:
+        sys.exit(NOT_DISTRIBUTED)
+    root = tb.nproc - 1
+    isroot = tb.rank == root
+    x = np.arange(12, dtype=complex).reshape(3, 1, 4) * (1 + 1j)
+    # only root holds the tensor; the others learn its shape and dtype from the broadcast
+    meta = convert.broadcast(tb, (x.shape, x.dtype) if isroot else None, root)
+    assert meta == (x.shape, x.dtype), meta
+    a = convert.convert(tbs.get('numpy'), x if isroot else None, tb, root=root, chunk_size=5)
+    assert isinstance(a, tb.tensor) and a.shape == x.shape and a.dtype == x.dtype
+    assert np.allclose(a.numpy(), x)
+    # gather back to root in chunks
+    b = convert.convert(tb, a, 'numpy', root=root, chunk_size=5)
+    if isroot:
+        assert np.allclose(b.numpy(), x)
+    else:
+        assert b is None
+    # replicas on every rank
+    c = convert.convert(tbs.get('numpy'), x, tb, root=None, chunk_size=5)
+    assert np.allclose(c.numpy(), x)
+    assert np.allclose(convert.convert(tb, c, 'numpy', root=None).numpy(), x)
+
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or ['ctf', 'ctfview']:
+        check(name)
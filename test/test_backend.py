@@ -1,7 +1,10 @@
-import unittest
+import importlib, json, time, unittest
+from unittest import mock
+
+import numpy as np
 
 import tensorbackends as tbs
-from tensorbackends.utils import test_with_backend
+from tensorbackends.utils import executor, test_with_backend
 
 
 @test_with_backend()
@@ -9,6 +12,15 @@ class BackendTest(unittest.TestCase):
     def test_random(self, tb):
         self.assertIsInstance(tb.random, tbs.interface.Random)
 
+    def test_random_normal(self, tb):
+        a = tb.random.normal(1.0, 2.0, size=(2,3))
+        self.assertIsInstance(a, tb.tensor)
+        self.assertEqual(a.shape, (2,3))
+        self.assertIsInstance(tb.random.normal(), float)
+        if tb.name in ('numpy', 'ctf', 'ctfview'):
+            self.assertEqual(tb.random.normal(size=(2,3), dtype=complex).dtype, complex)
+            self.assertEqual(tb.random.random((2,3), dtype='float32').dtype, 'float32')
+
     def test_tensor(self, tb):
         self.assertTrue(issubclass(tb.tensor, tbs.interface.Tensor))
 
@@ -75,6 +87,151 @@ class BackendTest(unittest.TestCase):
         self.assertTrue(tb.allclose(z4, c.reshape(1,9)))
 
 
+    def test_einsum_cache(self, tb):
+        cache = tb.enable_einsum_cache(max_bytes=2**20)
+        try:
+            a = tb.astensor([[1,2],[3,4]], dtype=float)
+            b = tb.astensor([[5,6],[7,8]], dtype=float)
+            x = tb.einsum('ij,jk->ik', a, b)
+            y = tb.einsum('ab, bc -> ac', a, b)
+            self.assertIsNot(x, y)
+            self.assertTrue(tb.allclose(x, y))
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            # results never share storage with the entry or with each other
+            x += 1
+            y[0,0] = 0
+            w = tb.einsum('ij,jk->ik', a, b)
+            self.assertTrue(tb.allclose(w, tb.astensor([[19,22],[43,50]], dtype=float)))
+            self.assertEqual((cache.hits, cache.misses), (2, 1))
+            a[0,0] = 0
+            z = tb.einsum('ij,jk->ik', a, b)
+            self.assertIsNot(x, z)
+            self.assertTrue(tb.allclose(z, tb.astensor([[14,16],[43,50]], dtype=float)))
+            self.assertEqual(cache.stats()['hit_rate'], 2/4)
+            tb.enable_einsum_cache(max_bytes=32)
+            tb.einsum('ij,jk->ik', a, b)
+            tb.einsum('ij,kj->ik', a, b)
+            self.assertEqual(tb.einsum_cache.evictions, 1)
+            self.assertLessEqual(tb.einsum_cache.nbytes, 32)
+        finally:
+            tb.disable_einsum_cache()
+
+    def test_network(self, tb):
+        x, y, z = np.random.random((3, 4)), np.random.random((4, 5, 2)), np.random.random((2, 3))
+        net = tb.network()
+        net.add('x', 'ij', tb.astensor(x))
+        net.add('y', 'jkl', tb.astensor(y))
+        net.add('z', 'lm', tb.astensor(z))
+        self.assertEqual(net.open_indices(), 'ikm')
+        self.assertTrue(np.allclose(net.contract().numpy(), np.einsum('ij,jkl,lm->ikm', x, y, z)))
+        self.assertTrue(np.allclose(net.contract(['x', 'y'], 'lik').numpy(), np.einsum('ij,jkl->lik', x, y)))
+        self.assertTrue(np.allclose(net.environment('y').numpy(), np.einsum('ij,lm->jlim', x, z)))
+        w = np.random.random((2, 3))
+        net.replace('z', tb.astensor(w))
+        net.stats.clear()
+        self.assertTrue(np.allclose(net.contract().numpy(), np.einsum('ij,jkl,lm->ikm', x, y, w)))
+        self.assertEqual(net.stats['miss'], 1)
+        self.assertEqual(net.stats['hit'], 1)
+
+    def test_einsum_conj(self, tb):
+        x = np.random.random((3, 4)) + 1j * np.random.random((3, 4))
+        y = np.random.random((4, 2)) + 1j * np.random.random((4, 2))
+        a, b = tb.astensor(x), tb.astensor(y)
+        c = tb.einsum('ij,jk->ik', a, b, conj=(True, False))
+        self.assertTrue(np.allclose(c.numpy(), x.conj() @ y))
+        # both operands are larger than the output, so only the output is conjugated
+        c = tb.einsum('ij,jk->ik', a, b, conj=(True, True))
+        self.assertTrue(np.allclose(c.numpy(), x.conj() @ y.conj()))
+        c = tb.einsum('ij,ij->', a, a, conj=(True, False))
+        self.assertTrue(np.isclose(c, np.vdot(x, x)))
+        c = tb.einsum('ij,jk->ik', tb.astensor(x.real), b, conj=(True, False))
+        self.assertTrue(np.allclose(c.numpy(), x.real @ y))
+
+    def test_submit(self, tb):
+        x, y = np.random.random((3, 4)), np.random.random((4, 5))
+        a, b = tb.astensor(x), tb.astensor(y)
+        c = tb.einsum_async('ij,jk->ik', a, b)
+        d = tb.submit('einsum', 'ik,ij->kj', c, a)
+        u, s, vh = tb.einsvd_async('kj->ka,aj', d).result()
+        self.assertTrue(np.allclose(d.result().numpy(), (x @ y).T @ x))
+        self.assertTrue(np.allclose(tb.einsum('ka,a,aj->kj', u, s, vh).numpy(), (x @ y).T @ x))
+        q, r = tb.einqr_async('ik->ia,ak', c).result()
+        self.assertTrue(np.allclose(tb.einsum('ia,ak->ik', q, r).numpy(), x @ y))
+        failed = tb.submit('einsum', 'ij,jk->ik', a)
+        with self.assertRaises(Exception):
+            tb.submit('einsum', 'ij->ji', failed).result()
+        self.assertEqual(tb.executor.ordered, tb.distributed and tb.nproc > 1)
+
+    def test_convert(self, tb):
+        x = np.random.random((3, 4))
+        a = tb.convert(x, tb)
+        self.assertIsInstance(a, tb.tensor)
+        b = tb.convert(a, 'numpy')
+        self.assertIsInstance(b, tbs.get('numpy').tensor)
+        self.assertTrue(np.allclose(b.numpy(), x))
+        # entries stream in chunks when either side is distributed
+        c = tbs.extensions.convert(tb, b, tb, chunk_size=5)
+        self.assertTrue(np.allclose(c.numpy(), x))
+        self.assertTrue(np.allclose(tbs.extensions.convert(tb, c, 'numpy', chunk_size=5).numpy(), x))
+        d = tb.from_local((3, 4), [1, 6], [1.0, 2.0])
+        self.assertTrue(np.allclose(d.numpy().ravel()[[0, 1, 6]], [0.0, 1.0, 2.0]))
+        if tb.name in ('ctf', 'ctfview'):
+            self.check_scatter(tb, x)
+
+    def check_scatter(self, tb, x):
+        # on a single rank; test/mpi_convert.py checks scattering across ranks under mpirun
+        a = tbs.extensions.convert(tbs.get('numpy'), x, tb, chunk_size=5)
+        self.assertTrue(np.allclose(a.numpy(), x))
+        convert_module = importlib.import_module('tensorbackends.extensions.convert')
+        meta = ((3, 1, 4), np.dtype(complex))
+        self.assertEqual(convert_module.broadcast(tb, meta, tb.rank), meta)
+        with self.assertRaises(ValueError):
+            tbs.extensions.convert(tbs.get('numpy'), None, tb)
+
+    def test_profile(self, tb):
+        a = tb.astensor([[1,2],[3,4]], dtype=float)
+        with tb.profile() as prof:
+            tb.einsum('ij,jk->ik', a, a)
+            tb.einsvd('ij->ia,aj', a)
+        tb.einsum('ij,jk->ik', a, a)
+        ops = [record.op for record in prof.records]
+        self.assertEqual(ops.count('einsum'), 1)
+        self.assertIn('einsvd', ops)
+        record = prof.records[ops.index('einsum')]
+        self.assertEqual(record.subscripts, 'ij,jk->ik')
+        self.assertEqual(record.shapes, [(2,2), (2,2)])
+        self.assertEqual(record.flops, 16)
+        self.assertGreaterEqual(record.elapsed, 0)
+        self.assertIn('einsum', prof.report(sort='count'))
+        self.assertEqual(len(json.loads(prof.to_json())), len(prof.records))
+        self.assertEqual(len(json.loads(prof.to_chrome_trace())['traceEvents']), len(prof.records))
+        times = prof.rank_times()
+        self.assertEqual(len(times), tb.nproc)
+        self.assertTrue(np.allclose(times[tb.rank], [record.elapsed for record in prof.records]))
+        if tb.name in ('ctf', 'ctfview'):
+            # as rank 1 of two, where rank 0 holds no records
+            with mock.patch.object(type(tb), 'nproc', new_callable=mock.PropertyMock, return_value=2), \
+                    mock.patch.object(type(tb), 'rank', new_callable=mock.PropertyMock, return_value=1):
+                times = prof.rank_times()
+            self.assertEqual([len(t) for t in times], [0, len(prof.records)])
+
+    def test_evaluate(self, tb):
+        a = tb.astensor([[1,2,3],[4,5,6]], dtype=float)
+        b = tb.astensor([[1,2,3],[4,5,7]], dtype=float)
+        c = tb.evaluate('abs(a - b) <= atol + rtol * abs(b)', a=a, b=b, atol=0.5, rtol=0.0)
+        self.assertIsInstance(c, tb.tensor)
+        self.assertEqual(c.numpy().tolist(), [[True, True, True], [True, True, False]])
+        self.assertFalse(tb.evaluate('all(abs(a - b) <= 0.5)', a=a, b=b))
+        self.assertTrue(tb.evaluate('any(a == b)', a=a, b=b))
+        self.assertEqual(tb.evaluate('sum(a * b)', a=a, b=b), 97)
+        d = tb.evaluate('sqrt(a) * 2 - b', a=a, b=b)
+        self.assertTrue(tb.allclose(d, tb.astensor([[1, 2*2**0.5-2, 2*3**0.5-3], [0, 2*5**0.5-5, 2*6**0.5-7]])))
+        with self.assertRaises(ValueError):
+            tb.evaluate('a.T + b', a=a, b=b)
+        e = tb.ones((300, 400))
+        self.assertTrue(tb.allclose(tb.evaluate('e * 2 + 1', e=e), 3))
+        self.assertFalse(tb.evaluate('any(e > 1)', e=e))
+
     def test_einsvd(self, tb):
         a = tb.astensor([[1,0,0,0],[0,2,0,0],[0,0,3,0],[0,0,0,4]], dtype=float).reshape(2,2,2,2)
         u, s, v = tb.einsvd('ijkl->(ij)s,s(kl)', a)
@@ -182,3 +339,16 @@ class BackendTest(unittest.TestCase):
         self.assertEqual(vh.shape, (2,4))
         s_true = tb.astensor([20, 10])
         self.assertTrue(tb.allclose(s, s_true))
+
+
+class ExecutorTest(unittest.TestCase):
+    def test_ordered(self):
+        ordered = executor.Executor(max_workers=4, ordered=True)
+        self.assertEqual(ordered.max_workers, 1)
+        order = []
+        first = ordered.submit(time.sleep, 0.05)
+        last = ordered.submit(lambda _: order.append('dependent'), first)
+        ordered.submit(order.append, 'independent').result()
+        self.assertTrue(last.done())
+        self.assertEqual(order, ['dependent', 'independent'])
+        ordered.shutdown()
@@ -0,0 +1,54 @@
+import os, tempfile, unittest
+
+from tensorbackends.utils import benchmark
+
+
+@benchmark.benchmark_with_backend(optional=['torch'], sizes=[2, 4])
+class SampleBenchmark:
+    def bench_einsum(self, tb, n):
+        a = tb.ones((n, n))
+        return benchmark.Case(lambda: tb.einsum('ij,jk->ik', a, a), flops=2*n**3)
+
+    def bench_variants(self, tb, n):
+        return {
+            'zeros': benchmark.Case(lambda: tb.zeros((n,)), nbytes=8*n),
+            'missing': benchmark.Case(lambda: tb.missing_operation(n)),
+        }
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_run(self):
+        results = benchmark.run([SampleBenchmark], backends=['numpy'], sizes=[4], repeat=2)
+        names = [result['benchmark'] for result in results]
+        self.assertEqual(names, [
+            'SampleBenchmark.bench_einsum', 'SampleBenchmark.bench_variants[zeros]', 'SampleBenchmark.bench_variants[missing]',
+        ])
+        self.assertEqual({result['size'] for result in results}, {4})
+        self.assertEqual(results[0]['unit'], 'FLOP/s')
+        self.assertGreater(results[0]['throughput'], 0)
+        self.assertGreater(results[1]['peak_traced_bytes'], 0)
+        self.assertIn('error', results[2])
+
+    def test_untraced(self):
+        # torch allocates outside of tracemalloc, so no peak memory is reported for it
+        results = benchmark.run([SampleBenchmark], pattern='einsum', sizes=[2], repeat=1)
+        peaks = {result['backend']: result['peak_traced_bytes'] for result in results}
+        self.assertIsNotNone(peaks['numpy'])
+        self.assertIsNone(peaks.get('torch'))
+
+    def test_compare(self):
+        results = benchmark.run([SampleBenchmark], backends=['numpy'], pattern='einsum', repeat=1, memory=False)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            benchmark.save(results, path)
+            baseline = benchmark.load(path)
+        self.assertEqual(len(baseline), 2)
+        slower = [dict(result, time=result['time'] * 2) for result in results]
+        comparisons = benchmark.compare(slower, baseline, threshold=0.5)
+        self.assertEqual(len(comparisons), 2)
+        self.assertTrue(all(comparison['regression'] for comparison in comparisons))
+        self.assertFalse(any(comparison['regression'] for comparison in benchmark.compare(results, baseline)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+
+import numpy as np
+
+import tensorbackends as tbs
+from tensorbackends.backends.blocksparse import Leg
+
+
+class BlockSparseTest(unittest.TestCase):
+    def setUp(self):
+        self.tb = tbs.get('blocksparse')
+        self.tb.random.seed(42)
+
+    def test_dense_roundtrip(self):
+        legs = [Leg({0: 2, 1: 3}, 1), Leg({0: 1, 1: 2}, -1)]
+        a = self.tb.random.random(legs)
+        self.assertEqual(a.shape, (5, 3))
+        self.assertEqual(a.nnz, 2*1 + 3*2)
+        b = self.tb.fromdense(a.numpy(), legs)
+        self.assertTrue(self.tb.allclose(a, b))
+
+    def test_einsum(self):
+        i, j, k = Leg({0: 2, 1: 3}), Leg({-1: 2, 0: 1, 1: 2}), Leg({0: 3, 2: 1})
+        a = self.tb.random.random([i, j.dual()])
+        b = self.tb.random.random([j, k.dual()], charge=-1)
+        c = self.tb.einsum('ij,jk->ik', a, b)
+        self.assertEqual(c.charge, -1)
+        self.assertTrue(np.allclose(c.numpy(), np.einsum('ij,jk->ik', a.numpy(), b.numpy())))
+        n = self.tb.einsum('ij,ij->', a.conj(), a)
+        self.assertAlmostEqual(n, np.linalg.norm(a.numpy())**2)
+
+    def test_einsum_zn(self):
+        i, j = Leg({0: 2, 1: 2, 2: 1}, modulus=3), Leg({0: 1, 1: 1, 2: 2}, modulus=3)
+        a = self.tb.random.random([i, j, i.dual()], charge=1)
+        b = self.tb.random.random([i, j.dual()], charge=2)
+        c = self.tb.einsum('ijk,kj->i', a, b)
+        self.assertEqual(c.charge, 0)
+        self.assertTrue(np.allclose(c.numpy(), np.einsum('ijk,kj->i', a.numpy(), b.numpy())))
+
+    def test_einsvd(self):
+        legs = [Leg({0: 2, 1: 2}), Leg({0: 1, 1: 2}), Leg({0: 2, 1: 1, 2: 2}, -1)]
+        a = self.tb.random.random(legs, charge=1)
+        u, s, vh = self.tb.einsvd('ijk->isj,ks', a)
+        self.assertEqual(u.charge, 0)
+        usv = self.tb.einsum('isj,s,ks->ijk', u, s, vh)
+        self.assertTrue(self.tb.allclose(usv, a))
+        s_true = np.linalg.svd(a.numpy().reshape(12, 5), compute_uv=False)
+        self.assertTrue(np.allclose(np.sort(s.numpy())[::-1], s_true[:s.shape[0]]))
+
+    def test_einsvd_options(self):
+        from tensorbackends.interface import ReducedSVD, RandomizedSVD
+        legs = [Leg({0: 3, 1: 3}), Leg({0: 3, 1: 3}, -1)]
+        a = self.tb.random.random(legs)
+        s_true = np.sort(np.linalg.svd(a.numpy(), compute_uv=False))[::-1]
+        for option in [ReducedSVD(rank=3), RandomizedSVD(rank=3, niter=4, oversamp=3)]:
+            with self.subTest(option=option):
+                u, s, vh = self.tb.einsvd('ij->ia,aj', a, option=option)
+                self.assertEqual(s.shape, (3,))
+                self.assertTrue(np.allclose(np.sort(s.numpy())[::-1], s_true[:3]))
+
+    def test_einqr(self):
+        legs = [Leg({0: 3, 1: 2}), Leg({0: 1, 1: 2}), Leg({0: 2, 1: 2}, -1)]
+        a = self.tb.random.random(legs)
+        q, r = self.tb.einqr('ijk->iaj,ak', a)
+        self.assertTrue(self.tb.allclose(self.tb.einsum('iaj,ak->ijk', q, r), a))
+        qq = self.tb.einsum('iaj,ibj->ab', q.conj(), q)
+        self.assertTrue(np.allclose(qq.numpy(), np.eye(qq.shape[0])))
+
+    def test_charge_violation(self):
+        legs = [Leg({0: 1, 1: 1}), Leg({0: 1, 1: 1}, -1)]
+        a = self.tb.zeros(legs)
+        a.write([0, 3], [1.0, 2.0])
+        with self.assertRaises(ValueError):
+            a.write([1], [1.0])
+        self.assertTrue(np.allclose(a.numpy(), [[1, 0], [0, 2]]))
+
+    def test_elementwise_product(self):
+        legs = [Leg({0: 2, 1: 1}), Leg({0: 1, 1: 2}, -1)]
+        a = self.tb.random.random(legs, charge=1)
+        b = self.tb.random.random(legs, charge=1)
+        c = a * b
+        self.assertEqual(c.charge, 1)
+        self.assertTrue(np.allclose(c.numpy(), a.numpy() * b.numpy()))
+        d = a * self.tb.random.random(legs, charge=0)
+        self.assertEqual(d.nnz, 0)
+        self.assertTrue(np.allclose(d.numpy(), 0))
+
+    def test_random_dtype(self):
+        legs = [Leg({0: 2, 1: 1}), Leg({0: 1, 1: 2}, -1)]
+        self.assertEqual(self.tb.random.random(legs, dtype=np.float32).dtype, np.float32)
+        a = self.tb.random.normal(size=legs, charge=1, dtype=complex)
+        self.assertEqual(a.dtype, complex)
+        self.assertTrue(all(np.any(block.imag != 0) for block in a.blocks.values()))
+        self.assertIsInstance(self.tb.random.uniform(-1, 1, dtype=complex), complex)
+
+    def test_leg_flows(self):
+        i, j = Leg({0: 2, 1: 1}), Leg({0: 1, 1: 2})
+        a = self.tb.random.random([i, j.dual()])
+        b = self.tb.random.random([j, i.dual()])
+        self.assertTrue(np.allclose(self.tb.einsum('ij,jk->ik', a, b).numpy(), a.numpy() @ b.numpy()))
+        # contracting two legs of the same flow does not conserve charge
+        with self.assertRaises(ValueError):
+            self.tb.einsum('ij,kj->ik', a, a)
+        with self.assertRaises(ValueError):
+            self.tb.einsum('ij,ij->ij', a, a.conj())
+
+    def test_read_write(self):
+        legs = [Leg({0: 2, 1: 1}), Leg({0: 1, 1: 2}, -1)]
+        a = self.tb.zeros(legs)
+        a.write(([0, 2, 2], [0, 1, 1]), [1.0, 2.0, 3.0], accumulate=True)
+        self.assertTrue(np.allclose(a.read(([0, 2, 1], [0, 1, 0])), [1.0, 5.0, 0.0]))
+        self.assertTrue(np.allclose(a.read([[0, 7]]), [[1.0, 5.0]]))
@@ -0,0 +1,74 @@
+import os, tempfile, unittest
+
+import numpy as np
+
+import tensorbackends as tbs
+
+
+class ChunkedTest(unittest.TestCase):
+    def setUp(self):
+        self.tb = tbs.get('chunked')
+        self.chunk_bytes, self.memory_limit = self.tb.chunk_bytes, self.tb.store.memory_limit
+        self.tb.configure(chunk_bytes=64, memory_limit=1024)
+
+    def tearDown(self):
+        self.tb.configure(chunk_bytes=self.chunk_bytes, memory_limit=self.memory_limit)
+
+    def test_spill(self):
+        a = self.tb.astensor(np.arange(600, dtype=float).reshape(20, 30))
+        self.assertGreater(a.nchunks, 1)
+        self.assertGreater(self.tb.store.nspilled, 0)
+        self.assertLessEqual(self.tb.store.nbytes, 1024)
+        self.assertTrue(np.array_equal(a.numpy(), np.arange(600, dtype=float).reshape(20, 30)))
+
+    def test_einsum(self):
+        x, y = np.random.random((6, 7, 5)), np.random.random((5, 6, 3))
+        a, b = self.tb.astensor(x), self.tb.astensor(y)
+        c = self.tb.einsum('ijk,kil->(jl)', a, b)
+        self.assertTrue(np.allclose(c.numpy(), np.einsum('ijk,kil->jl', x, y).reshape(-1)))
+        self.assertTrue(np.isclose(self.tb.einsum('ijk,ijk->', a, a), np.sum(x * x)))
+        # many groups of summed blocks per output block
+        x, y = np.random.random((4, 60)), np.random.random((60, 3))
+        c = self.tb.einsum('ij,jk->ik', self.tb.astensor(x), self.tb.astensor(y))
+        self.assertGreater(c.nchunks, 1)
+        self.assertTrue(np.allclose(c.numpy(), x @ y))
+
+    def test_in_core(self):
+        a = self.tb.astensor(np.random.random((20, 30)))
+        with self.assertRaises(MemoryError):
+            self.tb.svd(a)
+        with self.assertRaises(MemoryError):
+            a.cumsum()
+        b = self.tb.astensor(np.random.random((3, 3)))
+        self.assertTrue(np.allclose(self.tb.inv(b).numpy(), np.linalg.inv(b.numpy())))
+
+    def test_views(self):
+        x = np.random.random((7, 4, 9))
+        a = self.tb.astensor(x)
+        self.assertTrue(np.array_equal(a.transpose(2, 0, 1).numpy(), x.transpose(2, 0, 1)))
+        self.assertTrue(np.array_equal(a.reshape(14, 18).numpy(), x.reshape(14, 18)))
+        self.assertTrue(np.array_equal(a[1:6:2, 3, ::4].numpy(), x[1:6:2, 3, ::4]))
+        a[2:5, :, 1] = 0
+        x[2:5, :, 1] = 0
+        self.assertTrue(np.array_equal(a.numpy(), x))
+
+    def test_advanced_indexing(self):
+        x = np.random.random((7, 4, 9))
+        a = self.tb.astensor(x)
+        self.assertTrue(np.array_equal(a[::-1].numpy(), x[::-1]))
+        self.assertTrue(np.array_equal(a[[1, 0, 5]].numpy(), x[[1, 0, 5]]))
+        self.assertTrue(np.array_equal(a[np.array([3, 2]), ..., 1:4].numpy(), x[np.array([3, 2]), ..., 1:4]))
+
+    def test_reductions(self):
+        x = np.random.random((9, 11))
+        a = self.tb.astensor(x)
+        self.assertTrue(np.isclose(a.sum(), x.sum()))
+        self.assertTrue(np.allclose(a.max(axis=0).numpy(), x.max(axis=0)))
+        self.assertTrue(np.isclose(a.norm(), np.linalg.norm(x)))
+
+    def test_save_load(self):
+        x = np.random.random((10, 10))
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'a.npy')
+            self.tb.save(self.tb.astensor(x), filename)
+            self.assertTrue(np.array_equal(self.tb.load(filename).numpy(), x))
@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+
+import tensorbackends as tbs
+
+
+@unittest.skipUnless(tbs.isavailable('ctfview'), 'Backend ctfview is not availabe')
+class CTFViewTest(unittest.TestCase):
+    def setUp(self):
+        self.tb = tbs.get('ctfview')
+
+    def test_slice_view(self):
+        x = np.random.random((4, 5, 6))
+        a = self.tb.astensor(x).transpose(2, 0, 1)
+        c = a[1:5:2, 3]
+        self.assertIsNotNone(c.selection)
+        self.assertEqual(c.shape, (2, 5))
+        self.assertTrue(np.allclose(c.numpy(), x.transpose(2, 0, 1)[1:5:2, 3]))
+        self.assertEqual(c.indices, ((1,), (0,)))
+        self.assertEqual(a[2, 3, 4], x[3, 4, 2])
+        b = a[1:5:2, 3, ::-2]
+        self.assertEqual(b.shape, (2, 3))
+        self.assertTrue(np.allclose(b.numpy(), x.transpose(2, 0, 1)[1:5:2, 3, ::-2]))
+        y = np.random.random((5, 2))
+        d = self.tb.einsum('ij,jk->ik', c, self.tb.astensor(y))
+        self.assertTrue(np.allclose(d.numpy(), x.transpose(2, 0, 1)[1:5:2, 3] @ y))
+
+    def test_slice_fused(self):
+        x = np.random.random((3, 4, 5))
+        a = self.tb.astensor(x).reshape(12, 5)
+        self.assertTrue(np.allclose(a[7].numpy(), x.reshape(12, 5)[7]))
+        self.assertTrue(np.allclose(a[:, 1:3].numpy(), x.reshape(12, 5)[:, 1:3]))
+        self.assertTrue(np.allclose(a[2:9].numpy(), x.reshape(12, 5)[2:9]))
+
+    def test_elementwise_view(self):
+        x, y = np.random.random((3, 4, 5)), np.random.random((4, 3, 5))
+        a = self.tb.astensor(x)
+        b = a.transpose(2, 0, 1)
+        c = self.tb.astensor(y).transpose(2, 1, 0)
+        d = -b * 2 + c
+        self.assertEqual(d.indices, ((2,), (0,), (1,)))
+        self.assertEqual(d.tsr.shape, (3, 4, 5))
+        self.assertTrue(np.allclose(d.numpy(), -x.transpose(2, 0, 1) * 2 + y.transpose(2, 1, 0)))
+        e = c - b
+        self.assertEqual(e.indices, ((2,), (1,), (0,)))
+        self.assertTrue(np.allclose(e.numpy(), y.transpose(2, 1, 0) - x.transpose(2, 0, 1)))
+        f = self.tb.astensor(y.transpose(2, 1, 0).copy())
+        self.assertTrue(self.tb.allclose(f, c))
+        b += c
+        self.assertTrue(np.allclose(b.numpy(), x.transpose(2, 0, 1) + y.transpose(2, 1, 0)))
+        self.assertTrue(np.allclose(a.numpy(), x))
+
+    def test_einsvd_view(self):
+        x = np.random.random((3, 4, 5, 2))
+        a = self.tb.astensor(x).transpose(2, 0, 3, 1).reshape(5, 6, 4)
+        u, s, vh = self.tb.einsvd('ijk->(ki)a,ja', a)
+        self.assertEqual(a.indices, ((2,), (0, 3), (1,)))
+        self.assertEqual((u.shape, s.shape, vh.shape), ((20, 6), (6,), (6, 6)))
+        self.assertEqual(u.indices, ((0, 1), (2,)))
+        expected = x.transpose(2, 0, 3, 1).reshape(5, 6, 4)
+        usv = np.einsum('kia,a,ja->ijk', u.numpy().reshape(4, 5, 6), s.numpy(), vh.numpy())
+        self.assertTrue(np.allclose(usv, expected))
+        u, s, vh = self.tb.einsvd('ijk->ia,jka', a, option=tbs.interface.ReducedSVD(rank=2))
+        self.assertEqual((u.shape, s.shape, vh.shape), ((5, 2), (2,), (6, 4, 2)))
+
+    def test_split_reshape(self):
+        x = np.random.random((6, 4))
+        a = self.tb.astensor(x)
+        b = a.reshape(2, 3, 4)
+        self.assertEqual(b.splits, ((2, 3), (4,)))
+        self.assertEqual(b.shape, (2, 3, 4))
+        c = b.reshape(6, 4)
+        self.assertIsNone(c.splits)
+        self.assertIs(c._tsr, a.tsr)
+        d = b.transpose(2, 0, 1)
+        self.assertTrue(np.allclose(d.numpy(), x.reshape(2, 3, 4).transpose(2, 0, 1)))
+        y = np.random.random((4, 3))
+        e = self.tb.einsum('kij,kj->i', d, self.tb.astensor(y))
+        self.assertTrue(np.allclose(e.numpy(), np.einsum('ijk,kj->i', x.reshape(2, 3, 4), y)))
+
+    def test_einsum_conflicting_groups(self):
+        x, y, z = np.random.random((2, 6, 5)), np.random.random((5, 12)), np.random.random((3, 4, 5))
+        a = self.tb.astensor(x).reshape(12, 5)
+        b = self.tb.astensor(y)
+        c = self.tb.astensor(z).reshape(12, 5)
+        self.tb.einsum_paths.clear()
+        d = self.tb.einsum('ij,jk,kl->il', a, b, c)
+        self.assertTrue(np.allclose(d.numpy(), x.reshape(12, 5) @ y @ z.reshape(12, 5)))
+        self.assertEqual(self.tb.einsum_paths['fallback'], 0)
+        self.assertEqual(self.tb.einsum_paths['split'], 1)
+        self.assertEqual(b.indices, ((0,), (1,)))
+        self.assertEqual(a.indices, ((0, 1), (2,)))
+
+    def test_reduction_view(self):
+        x = np.random.random((3, 4, 5, 2)) + 1j * np.random.random((3, 4, 5, 2))
+        a = self.tb.astensor(x).transpose(2, 0, 3, 1).reshape(5, 6, 4)
+        expected = x.transpose(2, 0, 3, 1).reshape(5, 6, 4)
+        tsr = a._tsr
+        self.assertTrue(np.isclose(a.sum(), expected.sum()))
+        self.assertTrue(np.allclose(a.sum(axis=1).numpy(), expected.sum(axis=1)))
+        self.assertTrue(np.allclose(a.sum(axis=(0, 2), keepdims=True).numpy(), expected.sum(axis=(0, 2), keepdims=True)))
+        self.assertTrue(np.allclose(self.tb.sum(a, -1).numpy(), expected.sum(axis=-1)))
+        self.assertTrue(np.isclose(a.norm2(), np.linalg.norm(expected)))
+        b = a.conj()
+        self.assertEqual(b.indices, a.indices)
+        self.assertTrue(np.allclose(b.numpy(), expected.conj()))
+        self.assertIs(a._tsr, tsr)
+
+    def test_random_streams(self):
+        self.tb.random.seed(7)
+        a = self.tb.random.random((2, 3))
+        b = self.tb.random.normal(size=4, dtype=complex)
+        self.tb.random.seed(7)
+        c = self.tb.random.random(6)
+        self.assertTrue(np.array_equal(a.numpy().reshape(6), c.numpy()))
+        self.assertNotEqual(self.tb.random.random(), self.tb.random.random())
+        self.assertEqual(b.dtype, complex)
+        self.assertEqual(self.tb.random.uniform(-1, 1, size=(5,), dtype=np.float32).dtype, np.float32)
+
+
+if __name__ == '__main__':
+    unittest.main()
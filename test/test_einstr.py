@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+import tensorbackends as tbs
+from tensorbackends.utils import einstr
+
+
+class EinstrTest(unittest.TestCase):
+    def test_einsum_cost(self):
+        shapes = [(10, 200), (200, 3), (3, 400)]
+        expr = einstr.parse('ij,jk,kl->il')
+        path, _ = np.einsum_path('ij,jk,kl->il', *(np.empty(shape) for shape in shapes), optimize='greedy')
+        self.assertEqual(expr.greedy_path(shapes), path[1:])
+        cost = expr.cost(shapes)
+        self.assertEqual((cost.flops, cost.intermediate, cost.output), (2*10*200*3 + 2*10*3*400, 30, 4000))
+        self.assertEqual(expr.cost(shapes, path).flops, cost.flops)
+        self.assertEqual(expr.cost(shapes, [(0, 1, 2)]).flops, 3*10*200*3*400)
+        self.assertEqual(einstr.parse('...ij,jk->...ik').cost([(2, 3, 4), (4, 5)]).output, 30)
+        with self.assertRaises(ValueError):
+            expr.cost(shapes, [(0, 1)])
+        with self.assertRaises(ValueError):
+            expr.cost([(10, 200), (100, 3), (3, 400)])
+
+    def test_optimal_path(self):
+        subscripts = 'ab,bc,cd,da,ae,ce->'
+        shapes = [(8, 2), (2, 8), (8, 2), (2, 8), (8, 3), (8, 3)]
+        expr = einstr.parse(subscripts)
+        path = expr.optimal_path(shapes)
+        self.assertLessEqual(expr.cost(shapes, path).flops, expr.cost(shapes).flops)
+        operands = [np.random.random(shape) for shape in shapes]
+        optimal, _ = np.einsum_path(subscripts, *operands, optimize='optimal')
+        self.assertLessEqual(expr.cost(shapes, path).flops, expr.cost(shapes, optimal).flops)
+        self.assertTrue(np.allclose(np.einsum(subscripts, *operands, optimize=['einsum_path', *path]), np.einsum(subscripts, *operands)))
+
+    def test_decomposition_cost(self):
+        expr = einstr.parse('ijk->ia,jka')
+        shapes = [(10, 20, 30)]
+        reduced = expr.svd_cost_reduced(shapes, rank=4)
+        self.assertEqual(reduced.flops, 4*10*600*10)
+        self.assertEqual(reduced.output, 10*4 + 4 + 4*600)
+        randomized = expr.svd_cost_rand(shapes, rank=2, niter=1, oversamp=1)
+        self.assertLess(randomized.flops, reduced.flops)
+        self.assertEqual(randomized.output, 10*2 + 2 + 2*600)
+        self.assertEqual(expr.qr_cost(shapes).output, 10*10 + 10*600)
+        expr = einstr.parse('ij,jk->ia,ak')
+        shapes = [(100, 20), (20, 300)]
+        explicit = expr.svd_cost_reduced(shapes)
+        implicit = expr.svd_cost_implicit_rand(shapes, rank=3)
+        self.assertGreaterEqual(explicit.intermediate, 100*300)
+        self.assertLess(implicit.intermediate, explicit.intermediate)
+        # the backends map the svd options to the estimates
+        tb = tbs.get('numpy')
+        self.assertEqual(tb.svd_cost('ij,jk->ia,ak', shapes).flops, explicit.flops)
+        self.assertEqual(tb.svd_cost('ij,jk->ia,ak', shapes, tbs.interface.ImplicitRandomizedSVD(rank=3)).flops, implicit.flops)
+        with self.assertRaises(ValueError):
+            tb.svd_cost('ij,jk->ia,ak', shapes, tbs.interface.Option())
+
+
+if __name__ == '__main__':
+    unittest.main()
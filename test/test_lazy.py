@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+
+import tensorbackends as tbs
+
+
+class LazyTest(unittest.TestCase):
+    def setUp(self):
+        self.tb = tbs.get('lazy')
+
+    def test_merge_einsum(self):
+        x, y, z = np.random.random((3, 4)), np.random.random((4, 5)), np.random.random((5, 2))
+        a, b, c = (self.tb.astensor(t) for t in (x, y, z))
+        ab = self.tb.einsum('ij,jk->ik', a, b)
+        abc = self.tb.einsum('ik,kl->il', ab, c)
+        del ab
+        self.assertEqual(abc.shape, (3, 2))
+        self.assertIsNone(abc.value)
+        self.assertTrue(np.allclose(abc.numpy(), x @ y @ z))
+        self.assertEqual(abc.op, 'leaf')
+
+    def test_shared_intermediate(self):
+        x = np.random.random((4, 4))
+        a = self.tb.astensor(x)
+        b = a @ a
+        c, d = b @ a, b.T @ a
+        self.assertTrue(np.allclose(c.numpy(), x @ x @ x))
+        self.assertTrue(np.allclose(d.numpy(), (x @ x).T @ x))
+
+    def test_fold_scalars(self):
+        x = np.random.random((3, 3))
+        a = self.tb.astensor(x)
+        b = a * 2 * 3
+        self.assertIs(b.args[0], a)
+        self.assertEqual(b.args[1], 6)
+        c = -(2 * self.tb.einsum('ij,jk->ik', a.T, b)) / 4
+        self.assertEqual(c.op, 'einsum')
+        self.assertTrue(np.allclose(c.numpy(), -(2 * x.T @ (6 * x)) / 4))
+
+    def test_inplace(self):
+        x = np.random.random((2, 3))
+        a = self.tb.astensor(x.copy())
+        b = a + 1
+        a += 2
+        a[0, 0] = 0
+        self.assertTrue(np.allclose(b.numpy(), x + 1))
+        expected = x + 2
+        expected[0, 0] = 0
+        self.assertTrue(np.allclose(a.numpy(), expected))
+
+    def test_long_chain(self):
+        a = self.tb.ones((2, 2))
+        b = a
+        for _ in range(5000):
+            b = b + a
+        self.assertTrue(np.allclose(b.numpy(), 5001))
+
+    def test_base(self):
+        for name in ['numpy', 'ctf', 'torch']:
+            if not tbs.isavailable(name):
+                continue
+            tb = tbs.get('lazy-{}'.format(name))
+            self.assertIs(tb.base, tbs.get(name))
+            self.assertIs(tb, tbs.get('lazy-{}'.format(name)))
+            a = tb.astensor(np.arange(6.0).reshape(2, 3))
+            b = (a.transpose(1, 0) * 2).reshape(6)
+            self.assertIsInstance(b.unwrap(), type(tbs.get(name).astensor([1.0]).unwrap()))
+            self.assertTrue(np.allclose(b.numpy(), np.arange(6.0).reshape(2, 3).T.reshape(6) * 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import os, shlex, subprocess, sys, unittest
+
+import tensorbackends as tbs
+
+
+SCRIPT = os.path.join(os.path.dirname(__file__), 'mpi_convert.py')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the command launching two ranks, e.g. TENSORBACKENDS_MPIRUN='mpirun -n 2'
+MPIRUN = os.environ.get('TENSORBACKENDS_MPIRUN')
+
+
+@unittest.skipIf(not MPIRUN, 'TENSORBACKENDS_MPIRUN is not set')
+class MPITest(unittest.TestCase):
+    def run_script(self, name):
+        if not tbs.isavailable(name):
+            self.skipTest('Backend {} is not availabe'.format(name))
+        # the ranks import this checkout even if it is not installed
+        path = os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))
+        process = subprocess.run([*shlex.split(MPIRUN), sys.executable, SCRIPT, name],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=300,
+            env=dict(os.environ, PYTHONPATH=path))
+        if process.returncode == 77:
+            self.skipTest('Backend {} does not run on two ranks'.format(name))
+        self.assertEqual(process.returncode, 0, process.stdout.decode(errors='replace'))
+
+    def test_convert_ctf(self):
+        self.run_script('ctf')
+
+    def test_convert_ctfview(self):
+        self.run_script('ctfview')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+import tensorbackends as tbs
+
+
+@unittest.skipUnless(tbs.isavailable('numpy-mp'), 'Backend numpy-mp is not availabe')
+class NumPyMPTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tb = tbs.get('numpy-mp')
+        cls.saved = cls.tb.nproc, cls.tb.parallel_bytes, cls.tb.parallel_flops
+        # split every operation over two workers
+        cls.tb.configure(nproc=2, parallel_bytes=0, parallel_flops=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        nproc, parallel_bytes, parallel_flops = cls.saved
+        cls.tb.configure(nproc=nproc, parallel_bytes=parallel_bytes, parallel_flops=parallel_flops)
+
+    def test_shared(self):
+        a = self.tb.astensor(np.random.random((4, 5)))
+        self.assertTrue(a.shared)
+        self.assertTrue(self.tb.zeros((3, 2)).shared)
+        self.assertEqual(self.tb.nproc, 2)
+        self.assertEqual(self.tb.rank, 0)
+
+    def test_ranks(self):
+        # the workers are ranks 0 to nproc - 1, told apart from the controlling process by a flag
+        probe = '(lambda m: (m.rank, m.controller))(__import__("tensorbackends.backends.numpymp.shm_utils", fromlist=["rank"]))'
+        workers = set(self.tb.pool.map(eval, [probe] * 20))
+        self.assertTrue(all(0 <= rank < self.tb.nproc and not controller for rank, controller in workers))
+        self.assertTrue(tbs.backends.numpymp.shm_utils.controller)
+
+    def test_einsum(self):
+        x, y = np.random.random((6, 5)), np.random.random((5, 4))
+        a, b = self.tb.astensor(x), self.tb.astensor(y)
+        self.assertTrue(np.allclose(self.tb.einsum('ij,jk->ik', a, b).numpy(), x @ y))
+        self.assertTrue(np.allclose(self.tb.einsum('ij,jk->(ik)', a, b).numpy(), (x @ y).reshape(-1)))
+        # no output index to split, so the workers add up partial sums
+        self.assertTrue(np.isclose(self.tb.einsum('ij,ij->', a, a), np.sum(x * x)))
+
+    def test_elementwise(self):
+        x, y = np.random.random((6, 5)), np.random.random(5)
+        a, b = self.tb.astensor(x), self.tb.astensor(y)
+        self.assertTrue(np.allclose((a * b + 1).numpy(), x * y + 1))
+        self.assertTrue(np.allclose(self.tb.evaluate('exp(x) - y', x=a, y=b).numpy(), np.exp(x) - y))
+        self.assertTrue(np.isclose(self.tb.evaluate('sum(x * x)', x=a), np.sum(x * x)))
+        a -= b
+        self.assertTrue(np.allclose(a.numpy(), x - y))
+
+    def test_reduction(self):
+        x = np.random.random((6, 5, 4))
+        a = self.tb.astensor(x)
+        self.assertTrue(np.allclose(a.sum(axis=1).numpy(), x.sum(axis=1)))
+        self.assertTrue(np.allclose(self.tb.max(a, axis=(0, 2), keepdims=True).numpy(), x.max(axis=(0, 2), keepdims=True)))
+        self.assertTrue(np.isclose(a.sum(), x.sum()))
+        self.assertEqual(a.min(), x.min())
+
+    def test_random(self):
+        size = (600, 1000)
+        self.tb.random.seed(42)
+        tbs.get('numpy').random.seed(42)
+        a = self.tb.random.random(size)
+        b = tbs.get('numpy').random.random(size)
+        self.assertTrue(a.shared)
+        self.assertTrue(np.array_equal(a.numpy(), b.numpy()))
+        self.tb.random.seed(3)
+        x = self.tb.random.randint(0, 1000, 3)
+        self.tb.random.seed(3)
+        self.assertTrue(np.array_equal(self.tb.random.randint(0, 1000, 3).numpy(), x.numpy()))
+        self.assertIsInstance(x, self.tb.tensor)
+        # drawing from a fresh generator leaves the global state alone
+        self.tb.random._generator = None
+        np.random.seed(1)
+        expected = np.random.rand()
+        np.random.seed(1)
+        self.tb.random.random(3)
+        self.assertEqual(np.random.rand(), expected)
+        self.assertIsNot(self.tb.random, tbs.get('numpy').random)
+
+
+if __name__ == '__main__':
+    unittest.main()
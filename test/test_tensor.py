@@ -42,3 +42,17 @@ class TensorTest(unittest.TestCase):
         for shape in [(4,1,4,1,1), (2,2,2,2),(16,),(1,8,2)]:
             with self.subTest(shape=shape):
                 self.assertEqual(a.reshape(*shape).shape, shape)
+
+    def test_read_write(self, tb):
+        import numpy as np
+        a = tb.zeros((3,4))
+        a.write([1, 6, 11], [1.0, 2.0, 3.0])
+        self.assertTrue(np.allclose(a.read([[1, 6], [11, 0]]), [[1.0, 2.0], [3.0, 0.0]]))
+        a.write(([0, 2], [3, 3]), 4.0)
+        self.assertTrue(np.allclose(a.read(([0, 2], [3, 3])), [4.0, 4.0]))
+        a.write([6, 1, 6], [1.0, 1.0, 1.0], accumulate=True)
+        self.assertTrue(np.allclose(a.read([1, 6]), [2.0, 4.0]))
+        a.write([5, 7], [1.0, 2.0], accumulate=True)
+        expected = np.zeros((3,4))
+        expected.flat[[1, 3, 5, 6, 7, 11]] = [2.0, 4.0, 1.0, 4.0, 2.0, 4.0]
+        self.assertTrue(np.allclose(a.numpy(), expected))